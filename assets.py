@@ -0,0 +1,348 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pygame as pg
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))  # 画像・音声ファイルの置かれたディレクトリ
+ATLAS_KEY = "__atlas__"  # アトラス全体のキー
+
+
+class AssetRegistry:
+    """
+    画像・音声を起動時に一度だけ読み込み，キーで引けるようにキャッシュするクラス
+    スプライトの生成時にはファイルを読まず，このクラスから取り出す
+    """
+    def __init__(self, base: str = ASSET_DIR):
+        """
+        引数 base：アセットファイルの基準ディレクトリ
+        """
+        self.base = base
+        self.image_specs = {}  # キー → 画像の読込み方法
+        self.sound_specs = {}  # キー → 音声の読込み方法
+        self.raw = {}  # キー → 読込み済みで画面の形式に変換する前のSurface
+        self.images = {}  # キー → 読込み済みSurface
+        self.sounds = {}  # キー → 読込み済みSound
+        self.nbytes = {}  # キー → 保持しているバイト数
+        self.hits = 0  # キャッシュから返せた回数
+        self.misses = 0  # キャッシュに無く，その場で読み込んだ回数
+        self.thread = None  # バックグラウンドで読み込むスレッド
+        self.done = 0  # 読み込み終えた数
+        self.atlas = None  # (アトラスの画素ファイルの相対パス, 大きさ, キー → アトラス内の矩形)
+
+    def path(self, rel: str) -> str:
+        return os.path.join(self.base, rel)
+
+    def image_spec(self, key: str, rel: str | None = None, *, src: str | None = None,
+                   alpha: bool = True, size: tuple[int, int] | None = None,
+                   angle: float = 0, zoom: float = 1.0, flip: tuple[bool, bool] = (False, False)):
+        """
+        画像の読込み方法を登録する（読込み自体はpreloadかimageで行う）
+        引数1 key：画像のキー
+        引数2 rel：基準ディレクトリからの相対パス
+        引数 src：ファイルの代わりに元にする登録済み画像のキー
+        引数 alpha：Trueならconvert_alpha，Falseならconvertする
+        引数 size：拡大縮小後の大きさ
+        引数 angle, zoom：rotozoomの回転角度と倍率
+        引数 flip：左右，上下の反転
+        """
+        self.image_specs[key] = (rel, src, alpha, size, angle, zoom, flip)
+
+    def sound_spec(self, key: str, rel: str, volume: float | None = None):
+        """
+        音声の読込み方法を登録する
+        引数1 key：音声のキー
+        引数2 rel：基準ディレクトリからの相対パス
+        引数3 volume：音量（Noneなら既定値）
+        """
+        self.sound_specs[key] = (rel, volume)
+
+    def source_file(self, key: str) -> str:
+        """
+        画像の元になるファイルの相対パスを返す（srcで登録した画像は元の画像をたどる）
+        """
+        rel, src = self.image_specs[key][:2]
+        while rel is None:
+            rel, src = self.image_specs[src][:2]
+        return rel
+
+    def spec_digest(self, keys) -> str:
+        """
+        画像の読込み方法と元のファイルの中身のハッシュを返す（アトラスが登録内容と合っているかの確認に使う）
+        引数 keys：対象の画像のキーの並び
+        """
+        digest = hashlib.sha1(repr([(key, self.image_specs[key]) for key in sorted(keys)]).encode())
+        for rel in sorted({self.source_file(key) for key in keys}):  # 画像ファイルを差し替えたときも作り直させる
+            with open(self.path(rel), "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def use_atlas(self, index_rel: str) -> bool:
+        """
+        アトラスの索引を読み，そこに含まれる画像は個別のファイルの代わりにアトラスから切り出すようにする
+        画像の読込み方法をすべて登録した後に呼ぶ．索引が無いか，登録内容と合わないときは何もしない
+        引数 index_rel：索引ファイル（atlas_pack.pyで作る）の基準ディレクトリからの相対パス
+        戻り値：アトラスを使うならTrue
+        """
+        try:
+            with open(self.path(index_rel), encoding="utf-8") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return False
+        sprites = index["sprites"]
+        if any(key not in self.image_specs for key in sprites) or index["digest"] != self.spec_digest(sprites):
+            return False  # 画像の読込み方法が変わった（atlas_pack.pyで作り直す）
+        image_rel = os.path.join(os.path.dirname(index_rel), index["image"])
+        self.atlas = (image_rel, tuple(index["size"]), {key: tuple(rect) for key, rect in sprites.items()})
+        return True
+
+    def _decode_atlas(self) -> pg.Surface:
+        """
+        アトラスの画素（RGBAの生データ）を一度で読み込む（展開の処理は無い）
+        """
+        image_rel, size, rects = self.atlas
+        with open(self.path(image_rel), "rb") as f:
+            data = f.read()
+        img = pg.image.frombuffer(data, size, "RGBA")
+        self.raw[ATLAS_KEY] = img
+        return img
+
+    def _decode_image(self, key: str) -> pg.Surface:
+        """
+        画像ファイルを読み込み，拡大・回転・反転までを行う（画面が無くてもできる処理だけ）
+        """
+        rel, src, alpha, size, angle, zoom, flip = self.image_specs[key]
+        if src is not None:
+            img = self.raw[src] if src in self.raw else self._decode_image(src)
+        else:
+            img = pg.image.load(self.path(rel))
+        if size is not None:
+            img = pg.transform.scale(img, size)
+        if angle != 0 or zoom != 1.0:
+            img = pg.transform.rotozoom(img, angle, zoom)
+        if flip != (False, False):
+            img = pg.transform.flip(img, *flip)
+        self.raw[key] = img
+        return img
+
+    def _convert_image(self, key: str) -> pg.Surface:
+        """
+        読込み済みの画像を画面の形式に変換してキャッシュに入れる（画面の作成後に主スレッドで行う）
+        """
+        alpha = self.image_specs[key][2]
+        raw = self.raw[key] if key in self.raw else self._decode_image(key)
+        img = raw.convert_alpha() if alpha else raw.convert()
+        self.images[key] = img
+        self.nbytes[key] = img.get_bytesize() * img.get_width() * img.get_height()
+        return img
+
+    def _load_image(self, key: str) -> pg.Surface:
+        self._decode_image(key)
+        return self._convert_image(key)
+
+    def _load_sound(self, key: str) -> pg.mixer.Sound:
+        rel, volume = self.sound_specs[key]
+        snd = pg.mixer.Sound(self.path(rel))
+        if volume is not None:
+            snd.set_volume(volume)
+        self.sounds[key] = snd
+        self.nbytes[key] = len(snd.get_raw())
+        return snd
+
+    def _decode_all(self):
+        """
+        登録済みの画像・音声をすべて読み込む（バックグラウンドのスレッドで実行される）
+        アトラスを使うときは，アトラスに含まれる画像はアトラスを一度読むだけで済ませる
+        """
+        if self.atlas is not None:
+            self._decode_atlas()
+            self.done += len(self.atlas[2])
+        for key in self.image_specs:
+            if self.atlas is not None and key in self.atlas[2]:
+                continue
+            if key not in self.raw and key not in self.images:
+                self._decode_image(key)
+            self.done += 1
+        if pg.mixer.get_init() is not None:
+            for key in self.sound_specs:
+                if key not in self.sounds:
+                    self._load_sound(key)
+                self.done += 1
+
+    def load_in_background(self):
+        """
+        登録済みの画像・音声の読込みをバックグラウンドのスレッドで始める
+        """
+        self.done = 0
+        self.thread = threading.Thread(target=self._decode_all, daemon=True)
+        self.thread.start()
+
+    def loading(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def progress(self) -> float:
+        """
+        バックグラウンドでの読込みの進み具合（0～1）を返す
+        """
+        total = len(self.image_specs) + len(self.sound_specs)
+        return min(1.0, self.done / total) if total else 1.0
+
+    def finish(self):
+        """
+        バックグラウンドでの読込みの終了を待ち，画像を画面の形式に変換する（主スレッドで呼ぶ）
+        """
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if ATLAS_KEY in self.raw:  # アトラスを一度だけ変換し，各画像はその部分Surfaceにする
+            sheet = self.raw.pop(ATLAS_KEY).convert_alpha()
+            self.nbytes[ATLAS_KEY] = sheet.get_bytesize() * sheet.get_width() * sheet.get_height()
+            for key, rect in self.atlas[2].items():
+                if key not in self.images:
+                    self.images[key] = sheet.subsurface(rect)
+        for key in self.image_specs:
+            if key not in self.images:
+                self._convert_image(key)
+        self.raw.clear()
+
+    def preload(self):
+        """
+        登録済みの画像・音声をすべて読み込んでおく
+        """
+        self.load_in_background()
+        self.finish()
+
+    def image(self, key: str) -> pg.Surface:
+        """
+        キーに対応する画像Surfaceを返す
+        未読込みならその場で読み込む（missとして数える）
+        """
+        img = self.images.get(key)
+        if img is not None:
+            self.hits += 1
+            return img
+        self.misses += 1
+        return self._load_image(key)
+
+    def sound(self, key: str) -> pg.mixer.Sound:
+        """
+        キーに対応するSoundを返す
+        未読込みならその場で読み込む（missとして数える）
+        """
+        snd = self.sounds.get(key)
+        if snd is not None:
+            self.hits += 1
+            return snd
+        self.misses += 1
+        return self._load_sound(key)
+
+    def circle(self, rad: int, color: tuple[int, int, int]) -> pg.Surface:
+        """
+        半径rad，色colorの円を描いたSurfaceを返す（黒を透過色にする）
+        同じ半径と色の組み合わせは一度だけ描画して使い回す
+        """
+        key = f"circle{rad}_{color[0]}_{color[1]}_{color[2]}"
+        img = self.images.get(key)
+        if img is not None:
+            self.hits += 1
+            return img
+        self.misses += 1
+        return self._render_circle(key, rad, color)
+
+    def _render_circle(self, key: str, rad: int, color: tuple[int, int, int]) -> pg.Surface:
+        img = pg.Surface((2*rad, 2*rad))
+        pg.draw.circle(img, color, (rad, rad), rad)
+        img.set_colorkey((0, 0, 0))
+        self.images[key] = img
+        self.nbytes[key] = img.get_bytesize() * img.get_width() * img.get_height()
+        return img
+
+    def prerender_circles(self, rads, colors):
+        """
+        半径の一覧と色の一覧のすべての組み合わせについて円Surfaceを描いておく
+        """
+        for color in colors:
+            for rad in rads:
+                key = f"circle{rad}_{color[0]}_{color[1]}_{color[2]}"
+                if key not in self.images:
+                    self._render_circle(key, rad, color)
+
+    def stats(self) -> dict:
+        """
+        キャッシュの利用状況を辞書で返す
+        戻り値：hits, misses, 画像数, 音声数, 保持バイト数
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "images": len(self.images),
+            "sounds": len(self.sounds),
+            "bytes": sum(self.nbytes.values()),
+        }
+
+
+class RotationCache:
+    """
+    回転・拡大済みのSurfaceを，量子化した角度をキーにして保持するLRUキャッシュ
+    """
+    def __init__(self, img: pg.Surface, zoom: float = 1.0, step: float = 1.0, maxsize: int = 256):
+        """
+        引数1 img：回転させる元画像
+        引数2 zoom：rotozoomの倍率
+        引数3 step：角度の量子化幅（度）
+        引数4 maxsize：保持する回転画像の最大数
+        """
+        self.img = img
+        self.zoom = zoom
+        self.step = step
+        self.maxsize = maxsize
+        self.cache = OrderedDict()  # 量子化角度 → 回転済みSurface
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, angle: float) -> int:
+        """
+        角度を量子化したキーを返す（360度で一周させる）
+        """
+        return round(angle / self.step) % round(360 / self.step)
+
+    def get(self, angle: float) -> pg.Surface:
+        """
+        角度angleに回転させた画像を返す
+        キャッシュに無ければrotozoomして追加し，古いものから捨てる
+        """
+        k = self.key(angle)
+        img = self.cache.get(k)
+        if img is not None:
+            self.hits += 1
+            self.cache.move_to_end(k)
+            return img
+        self.misses += 1
+        img = pg.transform.rotozoom(self.img, k * self.step, self.zoom)
+        self.cache[k] = img
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return img
+
+    def warm(self, angles):
+        """
+        角度の一覧について回転画像を先に作っておく（hit/missには数えない）
+        """
+        for angle in angles:
+            k = self.key(angle)
+            if k not in self.cache:
+                self.cache[k] = pg.transform.rotozoom(self.img, k * self.step, self.zoom)
+                if len(self.cache) > self.maxsize:
+                    self.cache.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.cache), "hit_rate": self.hit_rate()}
+
+
+ASSETS = AssetRegistry()  # ゲーム全体で共有するアセットキャッシュ
@@ -0,0 +1,149 @@
+"""
+スプライト画像（拡大・回転・反転済みのものを含む）を1枚のアトラスに詰め込み，索引と一緒に書き出すモジュール
+アトラスは展開の要らないRGBAの生データで保存し，ゲームの起動時はそれを一度読むだけで各画像を部分Surfaceとして使う
+画像や読込み方法（register_assets()）を変えたら作り直す（索引が合わなければ個別のファイルから読み込む）
+
+使い方：python atlas_pack.py [--width 1024] [--compare 20]
+作ったファイル（fig/atlas.json，fig/atlas.rgba）はリポジトリに入れない．無ければ個別のファイルから読み込む
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg
+
+import musou_kokaton as game
+from assets import ASSETS, AssetRegistry
+
+PADDING = 1  # 画像の間の隙間（px）
+
+
+def pack(sizes: dict[str, tuple[int, int]], width: int) -> tuple[dict[str, tuple[int, int, int, int]], int]:
+    """
+    画像を高さの順に棚（行）へ左から並べる
+    引数1 sizes：キー → 画像の大きさ
+    引数2 width：アトラスの幅
+    戻り値：キー → アトラス内の矩形(x, y, w, h)，アトラスの高さ
+    """
+    rects = {}
+    x = y = shelf = 0  # 今の棚の左端からの位置，棚の上端，棚の高さ
+    for key in sorted(sizes, key=lambda k: (-sizes[k][1], -sizes[k][0], k)):
+        w, h = sizes[key]
+        if w > width:
+            raise ValueError(f"{key}：幅{w}の画像はアトラスの幅{width}に入りません")
+        if x + w > width:  # 入らなければ次の棚へ
+            x, y, shelf = 0, y + shelf + PADDING, 0
+        rects[key] = (x, y, w, h)
+        x += w + PADDING
+        shelf = max(shelf, h)
+    return rects, y + shelf
+
+
+def sprite_keys(registry: AssetRegistry) -> list[str]:
+    """
+    アトラスに入れる画像（透過画像のうちゲーム中に描くもの）のキーを返す
+    こうかとん画像は8方向の画像を登録した番号（操作用と表情）しか描かないので，ほかの番号は入れない
+    """
+    specs = registry.image_specs
+    return [key for key, spec in specs.items()
+            if spec[2] and not (key[:4] == "bird" and key[4:].isdigit() and f"{key}_r" not in specs)]
+
+
+def build(index_rel: str = game.ATLAS_INDEX, width: int = 1024) -> dict:
+    """
+    register_assets()で登録した透過画像を個別のファイルから読み込んでアトラスを作り，画像と索引を書き出す
+    背景などの不透明な大きい画像と，ゲーム中に描かないこうかとん画像は含めない
+    引数1 index_rel：索引ファイルの基準ディレクトリからの相対パス
+    引数2 width：アトラスの幅
+    戻り値：索引の辞書
+    """
+    game.register_assets()
+    keys = sprite_keys(ASSETS)
+    imgs = {key: ASSETS.image(key) for key in keys}
+    rects, height = pack({key: img.get_size() for key, img in imgs.items()}, width)
+    sheet = pg.Surface((width, height), pg.SRCALPHA, 32)
+    sheet.fill((0, 0, 0, 0))
+    for key, (x, y, w, h) in rects.items():
+        sheet.blit(imgs[key], (x, y), special_flags=pg.BLEND_RGBA_ADD)  # 透明な下地に画素をそのまま写す
+    image_name = os.path.splitext(os.path.basename(index_rel))[0] + ".rgba"
+    with open(ASSETS.path(os.path.join(os.path.dirname(index_rel), image_name)), "wb") as f:
+        f.write(pg.image.tobytes(sheet, "RGBA"))  # 起動時に展開しなくて済むよう圧縮しない
+    index = {"image": image_name, "size": [width, height], "digest": ASSETS.spec_digest(keys), "sprites": rects}
+    with open(ASSETS.path(index_rel), "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return index
+
+
+def check(index_rel: str = game.ATLAS_INDEX) -> int:
+    """
+    アトラスから切り出した画像が個別のファイルから作った画像と同じ画素かを確かめる
+    戻り値：一致しなかった画像の数
+    """
+    files, packed = load_registry(False, index_rel), load_registry(True, index_rel)
+    bad = 0
+    for key in packed.atlas[2]:
+        if pg.image.tobytes(files.images[key], "RGBA") != pg.image.tobytes(packed.images[key], "RGBA"):
+            print(f"{key}：画素が一致しません")
+            bad += 1
+    return bad
+
+
+def load_registry(atlas: bool, index_rel: str = game.ATLAS_INDEX, sprites_only: bool = False) -> AssetRegistry:
+    """
+    新しいAssetRegistryに登録して画像を読み込む（音声は読まない）
+    引数1 atlas：Trueならアトラスを使い，Falseなら個別のファイルから読む
+    引数2 index_rel：索引ファイルの基準ディレクトリからの相対パス
+    引数3 sprites_only：Trueなら不透明な背景画像を読まない
+    """
+    saved = game.ASSETS
+    game.ASSETS = registry = AssetRegistry()  # register_assets()はgame.ASSETSに登録する
+    try:
+        game.register_assets()
+        if sprites_only:
+            for key in [key for key, spec in registry.image_specs.items() if not spec[2]]:
+                del registry.image_specs[key]
+        if atlas and not registry.use_atlas(index_rel):
+            raise SystemExit(f"{index_rel}：アトラスが無いか古くなっています（atlas_pack.pyで作り直す）")
+        registry.preload()
+    finally:
+        game.ASSETS = saved
+    return registry
+
+
+def compare(repeat: int, index_rel: str = game.ATLAS_INDEX) -> dict:
+    """
+    個別のファイルから読む場合とアトラスから読む場合の画像の読込み時間を，
+    スプライトだけと背景画像を含めた全体とで計測する
+    戻り値：(対象, 読み方) → 読込み時間の中央値と最小値（ms）
+    """
+    result = {}
+    for target, sprites_only in (("sprites", True), ("all", False)):
+        for name, atlas in (("files", False), ("atlas", True)):
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                load_registry(atlas, index_rel, sprites_only)
+                times.append((time.perf_counter() - start) * 1000)
+            result[target, name] = {"p50_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3)}
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="スプライト画像のアトラスを作る")
+    parser.add_argument("--width", type=int, default=1024, help="アトラスの幅")
+    parser.add_argument("--compare", type=int, metavar="N", help="作った後に読込み時間をN回ずつ計測して比べる")
+    args = parser.parse_args()
+    pg.display.init()  # 音声は読まないので画面だけ
+    pg.display.set_mode((1, 1))
+    index = build(width=args.width)
+    print(f"{len(index['sprites'])} sprites -> {index['image']}")
+    if check():
+        raise SystemExit(1)
+    if args.compare:
+        for (target, name), r in compare(args.compare).items():
+            print(f"{target:8s}{name:6s} p50 {r['p50_ms']:8.3f}ms  min {r['min_ms']:8.3f}ms")
+    pg.quit()
@@ -0,0 +1,97 @@
+import math
+import time
+
+import pygame as pg
+
+
+class AudioManager:
+    """
+    SEの再生を管理するクラス
+    play()で受け付けた再生要求をフレームの終わりのflush()でまとめて処理し，
+    同じSEの同時・短時間の連続再生は1回（回数に応じて少し大きな音量）にまとめる
+    チャンネル数には上限を設け，空きが無いときは優先度の低いSEを止めるか，要求を捨てる
+    """
+    def __init__(self, channels: int = 8, window: float = 0.05, volume: float = 0.8, boost: bool = True):
+        """
+        引数1 channels：SEに使うチャンネル数（BGMはpg.mixer.musicなので別枠）
+        引数2 window：同じSEをまとめる時間（秒）
+        引数3 volume：チャンネルの音量
+        引数4 boost：Trueならまとめた数に応じて音量を上げる
+        """
+        pg.mixer.set_num_channels(channels)
+        self.channels = [pg.mixer.Channel(i) for i in range(channels)]
+        self.window = window
+        self.volume = volume
+        self.boost = boost
+        self.per_frame = None  # 1回のflush()で鳴らすSEの数の上限（Noneなら上限なし）
+        self.sounds = {}  # キー → (Sound, 優先度)
+        self.queue = {}  # キー → このフレームの再生要求の数
+        self.last_played = {}  # キー → 最後に再生した時刻
+        self.chan_prio = [0] * channels  # チャンネルごとの再生中のSEの優先度
+        self.requested = 0  # 再生要求の総数
+        self.played = 0  # 実際に再生した数
+        self.merged = 0  # 他の再生にまとめた要求の数
+        self.dropped = 0  # チャンネルが足りずに捨てた要求の数
+
+    def register(self, key: str, sound: pg.mixer.Sound, priority: int = 0):
+        """
+        SEを登録する
+        引数1 key：SEのキー
+        引数2 sound：Sound
+        引数3 priority：優先度（大きいほど優先される）
+        """
+        self.sounds[key] = (sound, priority)
+
+    def play(self, key: str):
+        """
+        SEの再生を要求する（実際の再生はflush()で行う）
+        """
+        self.queue[key] = self.queue.get(key, 0) + 1
+        self.requested += 1
+
+    def _channel_for(self, priority: int) -> int | None:
+        """
+        空いているチャンネル，無ければ優先度priorityより低いSEを再生中のチャンネルを返す
+        """
+        lowest = None
+        for i, chan in enumerate(self.channels):
+            if not chan.get_busy():
+                return i
+            if self.chan_prio[i] < priority and (lowest is None or self.chan_prio[i] < self.chan_prio[lowest]):
+                lowest = i
+        return lowest
+
+    def flush(self, now: float | None = None):
+        """
+        このフレームの再生要求を優先度の高い順に処理する
+        """
+        if not self.queue:
+            return
+        now = time.perf_counter() if now is None else now
+        played = 0
+        for key in sorted(self.queue, key=lambda k: -self.sounds[k][1]):
+            count = self.queue[key]
+            sound, priority = self.sounds[key]
+            if now - self.last_played.get(key, -math.inf) < self.window:  # 直前に鳴らしたばかり
+                self.merged += count
+                continue
+            i = self._channel_for(priority)
+            if i is None or (self.per_frame is not None and played >= self.per_frame):
+                self.dropped += count
+                continue
+            chan = self.channels[i]
+            chan.stop()
+            if self.boost:  # まとめた数だけ少し大きく
+                chan.set_volume(min(1.0, self.volume * (1 + 0.25*math.log2(count))))
+            else:
+                chan.set_volume(self.volume)
+            chan.play(sound)
+            self.chan_prio[i] = priority
+            self.last_played[key] = now
+            self.played += 1
+            played += 1
+            self.merged += count - 1
+        self.queue.clear()
+
+    def stats(self) -> dict:
+        return {"requested": self.requested, "played": self.played, "merged": self.merged, "dropped": self.dropped}
@@ -0,0 +1,256 @@
+"""
+メインループの負荷の高い場面を再現し，フレーム時間を計測するベンチマーク
+画面が無くても動くように，SDLのダミードライバで実行する
+
+使い方：python benchmark.py [--frames 500] [--only bombs2000] [--out bench.json]
+      python benchmark.py --resolution 800x450 1280x720 1600x900（内部解像度ごとに計測する）
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+import musou_kokaton as game
+from headless import KeyState
+from render import Renderer
+
+PHASES = ("spawn", "collide", "update", "draw", "present")  # 計測する処理の区切り
+MERGED = {"event": "spawn"}  # 細かい区切りをまとめる先
+
+
+def percentile(vals: list[float], p: float) -> float:
+    """
+    valsのpパーセンタイル値を返す（最近傍法）
+    """
+    if not vals:
+        return 0.0
+    s = sorted(vals)
+    return s[max(0, math.ceil(p/100*len(s))-1)]
+
+
+def immortal(world: game.World):
+    """
+    計測中にゲームが終わらないよう，残機とボスのHPを十分に大きくする
+    """
+    world.life.life = 10**9
+    world.boss.boss_hp = 10**9
+
+
+def stopped_enemy(x: int, y: int) -> game.Enemy:
+    """
+    (x, y)で停止している敵機を作る
+    """
+    emy = game.Enemy()
+    emy.rect.center = x, y
+    emy.vy = 0
+    emy.state = "stop"
+    return emy
+
+
+def check_count(group, least: int, n: int):
+    """
+    計測中に爆弾などが減りすぎて，負荷の高い場面でなくなっていないかを確かめる
+    引数1 group：数を確かめるグループ（len()で数が分かるもの）
+    引数2 least：最低限の数
+    引数3 n：フレーム数（エラーメッセージ用）
+    """
+    if len(group) < least:
+        raise RuntimeError(f"{n}フレーム目に数が{len(group)}まで減りました（{least}以上のはず）")
+
+
+def check_speed(bombs, limit: float, n: int):
+    """
+    爆弾の速さが上限を超えていないかを確かめる（BombArrayでもBombスプライトのグループでもよい）
+    """
+    top = max(bombs.speed[:len(bombs)].tolist() if isinstance(bombs, game.BombArray) else [b.speed for b in bombs],
+              default=0.0)
+    if top > limit:
+        raise RuntimeError(f"{n}フレーム目に爆弾の速さが{top}になりました（{limit}以下のはず）")
+
+
+def setup_idle(world: game.World):
+    immortal(world)
+
+
+def setup_enemies(world: game.World):
+    immortal(world)
+    for _ in range(200):
+        world.emys.add(stopped_enemy(random.randint(0, game.WIDTH), random.randint(50, game.HEIGHT//2)))
+
+
+def setup_bombs(world: game.World, score: int = game.BOUNCE_SCORE):
+    """
+    爆弾2000個が画面内で跳ね返り続ける状態を作る
+    引数2 score：始めるスコア（BOUNCE_SCOREなら跳ね返るだけ，ACCEL_SCORE以上なら跳ね返るたびに加速する）
+    戻り値：毎フレーム爆弾の数を確かめる関数
+    """
+    immortal(world)
+    world.score.score_up(score)
+    for _ in range(2000):  # 画面中に散らばった位置から，投下ごとに狙う点を変えてばらばらの向きに投下する
+        world.bird.rect.center = random.randint(0, game.WIDTH), random.randint(0, game.HEIGHT)
+        world.drop_bomb(stopped_enemy(random.randint(60, game.WIDTH-60), random.randint(0, game.HEIGHT-200)))
+    world.bird.rect.center = game.WIDTH//2, -game.HEIGHT  # 爆弾は画面の端で跳ね返るので画面外のこうかとんには当たらない
+    return lambda world, n: check_count(world.bombs, 1900, n)
+
+
+def setup_bombs_accel(world: game.World):
+    """
+    爆弾2000個が跳ね返るたびに加速する状態を作る（速さはBOMB_MAX_SPEEDまで）
+    戻り値：毎フレーム爆弾の数と速さを確かめる関数
+    """
+    check = setup_bombs(world, game.ACCEL_SCORE)
+
+    def check_accel(world: game.World, n: int):
+        check(world, n)
+        check_speed(world.bombs, game.BOMB_MAX_SPEED, n)
+    return check_accel
+
+
+def setup_boss(world: game.World):
+    immortal(world)
+    world.tmr = game.sec2tick(game.BOSS_APPEAR_TIME)
+    boss = game.Boss()
+    boss.rect.centery = boss.bound
+    boss.vy = 0
+    boss.state = "stop"
+    boss.interval = 1  # 毎ティック爆弾を投下する
+    world.boss_mv.add(boss)
+    world.boss.flag = 1
+    for _ in range(500):
+        world.drop_boss_bomb(boss)
+
+
+def setup_neobeam(world: game.World):
+    immortal(world)
+    world.score.score_up(10**6)
+    world.gravity.add(game.Gravity(world.bird, 10**9))
+    for i in range(20):
+        world.emys.add(stopped_enemy(80*i, 150))
+
+
+def setup_explosions(world: game.World):
+    immortal(world)
+    world.gravity.add(game.Gravity(world.bird, 10**9))
+    for i in range(10):  # 毎ティック重力球に爆弾を投下し，爆発を出し続ける
+        emy = stopped_enemy(160*i + 80, 100)
+        emy.interval = 1
+        world.emys.add(emy)
+
+
+def neobeam_input(n: int) -> tuple[KeyState, list[pg.event.Event]]:
+    # 左シフトを押したまま毎フレームスペースを押してNeoBeamを撃ち続ける
+    return KeyState([pg.K_LSHIFT]), [pg.event.Event(pg.KEYDOWN, key=pg.K_SPACE)]
+
+
+def no_input(n: int) -> tuple[KeyState, list[pg.event.Event]]:
+    return KeyState(), []
+
+
+SCENARIOS = {  # シナリオ名 → (初期化関数（毎フレームの確認用の関数を返すことがある）, 入力関数)
+    "idle": (setup_idle, no_input),
+    "enemies200": (setup_enemies, no_input),
+    "bombs2000": (setup_bombs, no_input),
+    "bombs2000_accel": (setup_bombs_accel, no_input),
+    "boss": (setup_boss, no_input),
+    "neobeam_gravity": (setup_neobeam, neobeam_input),
+    "explosions": (setup_explosions, no_input),
+}
+
+
+def run_scenario(name: str, frames: int, seed: int = 0, dirty: bool = True, vector_bombs: bool | None = None,
+                 vector_effects: bool | None = None) -> dict:
+    """
+    シナリオnameをframesフレーム実行し，フレーム時間と処理の区切りごとの時間を返す
+    """
+    setup, inputs = SCENARIOS[name]
+    random.seed(seed)
+    world = game.World(mute=True, vector_bombs=vector_bombs, vector_effects=vector_effects)
+    check = setup(world)
+    renderer = Renderer(game.screen, game.bg_imgs_lst[0], dirty=dirty, scale=game.render_scale())
+    times = {phase: [] for phase in PHASES}
+    frame_times = []
+    last = [0.0]
+
+    def hook(phase: str):
+        now = time.perf_counter()
+        times[MERGED.get(phase, phase)][-1] += now - last[0]
+        last[0] = now
+
+    world.phase_hook = hook
+    for n in range(frames):
+        for phase in PHASES:
+            times[phase].append(0.0)
+        key_lst, events = inputs(n)
+        start = last[0] = time.perf_counter()
+        world.step(key_lst, events)
+        world.draw(renderer)
+        hook("draw")
+        renderer.present()
+        hook("present")
+        frame_times.append(last[0] - start)
+        if check is not None:
+            check(world, n)
+    ms = lambda v: round(v*1000, 4)
+    return {
+        "frames": frames,
+        "resolution": "{}x{}".format(*game.screen.get_size()),
+        "p50_ms": ms(percentile(frame_times, 50)),
+        "p95_ms": ms(percentile(frame_times, 95)),
+        "p99_ms": ms(percentile(frame_times, 99)),
+        "mean_ms": ms(sum(frame_times)/frames),
+        "phases_ms": {
+            phase: {"mean": ms(sum(v)/frames), "p95": ms(percentile(v, 95))} for phase, v in times.items()
+        },
+        "final": {k: v for k, v in world.state().items() if k != "sprites"},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="メインループのシナリオ別ベンチマーク")
+    parser.add_argument("--frames", type=int, default=500, help="シナリオごとのフレーム数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+    parser.add_argument("--only", nargs="*", choices=list(SCENARIOS), help="実行するシナリオ")
+    parser.add_argument("--full-redraw", action="store_true", help="毎フレーム全画面を描き直す")
+    parser.add_argument("--sprite-bombs", action="store_true", help="爆弾をBombArrayでなくBombスプライトで処理する")
+    parser.add_argument("--sprite-effects", action="store_true", help="爆発をEffectArrayでなくExplosionスプライトで処理する")
+    parser.add_argument("--resolution", nargs="*", type=game.parse_size, metavar="WxH",
+                        help="計測する内部解像度（複数指定すると結果の名前に@WxHを付ける）")
+    parser.add_argument("--out", default="bench.json", help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+    game.init(loading_screen=False)
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pg.version.ver,
+            "machine": platform.machine(),
+            "frames": args.frames,
+            "seed": args.seed,
+            "dirty": not args.full_redraw,
+            "resolutions": [f"{w}x{h}" for w, h in args.resolution or [(game.WIDTH, game.HEIGHT)]],
+            "vector_bombs": not args.sprite_bombs and game.BombArray.available(),
+            "vector_effects": not args.sprite_effects and game.EffectArray.available(),
+        },
+        "scenarios": {},
+    }
+    for size in args.resolution or [None]:
+        game.set_resolution(size)
+        for name in args.only or SCENARIOS:
+            result = run_scenario(name, args.frames, args.seed, dirty=not args.full_redraw,
+                                  vector_bombs=False if args.sprite_bombs else None,
+                                  vector_effects=False if args.sprite_effects else None)
+            if len(args.resolution or ()) > 1:
+                name = f"{name}@{result['resolution']}"
+            report["scenarios"][name] = result
+            print(f"{name:16s} p50 {result['p50_ms']:8.3f}ms  p95 {result['p95_ms']:8.3f}ms  p99 {result['p99_ms']:8.3f}ms")
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    pg.quit()
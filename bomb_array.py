@@ -0,0 +1,334 @@
+import random
+
+import pygame as pg
+
+try:
+    import numpy as np
+except ImportError:  # numpyが無い環境では従来のBombスプライトを使う
+    np = None
+
+from assets import ASSETS
+
+CELL = 64  # 当たり判定のグリッド1マスの大きさ（爆弾の中心だけを入れるのでcollision.Colliderより細かくする）
+ROW = 1 << 20  # マスの番号を1つの整数にするときの行の幅
+FEW_BOMBS = 32  # 爆弾がこの数以下なら，配列で候補を作らずに爆弾ごとにColliderのグリッドへ問い合わせる
+
+
+def rect_round(v: float) -> int:
+    """
+    pg.Rectの属性に小数を代入したときと同じく，0から遠い方へ四捨五入する
+    """
+    return int(v + 0.5) if v >= 0 else -int(-v + 0.5)
+
+
+class BombView:
+    """
+    BombArrayの中の爆弾1つ分を，スプライトのようにrectとradiusで参照するためのクラス
+    （爆発エフェクトの位置指定や当たり判定の結果として使う）
+    """
+    __slots__ = ("rect", "radius", "color")
+
+    def __init__(self, cx: int, cy: int, rad: int, color: tuple[int, int, int]):
+        self.rect = pg.Rect(0, 0, 2*rad, 2*rad)
+        self.rect.center = int(cx), int(cy)
+        self.radius = rad
+        self.color = color
+
+
+class BombArray:
+    """
+    敵機・ボスの爆弾を，位置・速度・速さ・半径・色の配列（struct of arrays）でまとめて管理するクラス
+    移動と壁での跳ね返りを全爆弾について一度に計算する
+    スコアによる振る舞い（100未満：壁で消える，100以上：跳ね返る，200以上：跳ね返るたびに1.15倍速，max_speedまで）はBombと同じ
+    位置はBombのrectと同じく整数で持ち，1ティックの移動量は0の方へ切り捨てる（Rect.move_ipと同じ）
+    """
+    fields = ("pos", "prev", "vel", "speed", "rad", "color")  # 爆弾ごとの配列の属性名
+    def __init__(self, colors: list[tuple[int, int, int]], width: int, height: int, capacity: int = 256,
+                 max_speed: float = float("inf")):
+        """
+        引数1 colors：爆弾の色の一覧（Bomb.colors）
+        引数2 width, height：画面の大きさ
+        引数3 capacity：最初に確保する爆弾の数（足りなくなったら倍に増やす）
+        引数4 max_speed：跳ね返りで加速するときの速さの上限（BOMB_MAX_SPEED）
+        """
+        self.colors = colors
+        self.width = width
+        self.height = height
+        self.max_speed = max_speed
+        self.n = 0  # 生きている爆弾の数
+        self.pos = np.zeros((capacity, 2), dtype=np.int32)  # 中心座標
+        self.prev = np.zeros((capacity, 2), dtype=np.int32)  # 直前のティックの中心座標（描画の補間用）
+        self.vel = np.zeros((capacity, 2))  # 方向ベクトル
+        self.speed = np.zeros(capacity)  # 速さ
+        self.rad = np.zeros(capacity, dtype=np.int32)  # 半径
+        self.color = np.zeros(capacity, dtype=np.int32)  # 色の番号
+        self.imgs = {}  # (色の番号, 半径) → 円Surface
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __bool__(self) -> bool:
+        return self.n > 0
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self.view(i)
+
+    def clear(self):
+        self.n = 0
+
+    def reserve(self, n: int):
+        """
+        n個の爆弾が入るまで配列を大きくする
+        """
+        while len(self.speed) < n:
+            self._grow()
+
+    def view(self, i: int) -> BombView:
+        return BombView(self.pos[i, 0], self.pos[i, 1], int(self.rad[i]), self.colors[self.color[i]])
+
+    def _grow(self):
+        cap = 2 * len(self.speed)
+        for name in __class__.fields:
+            old = getattr(self, name)
+            new = np.zeros((cap,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def add(self, cx: int, cy: int, vx: float, vy: float, rad: int, color: int, speed: float = 6) -> int:
+        """
+        爆弾を1つ追加し，その番号を返す
+        """
+        if self.n == len(self.speed):
+            self._grow()
+        i = self.n
+        self.pos[i] = self.prev[i] = cx, cy
+        self.vel[i] = vx, vy
+        self.speed[i] = speed
+        self.rad[i] = rad
+        self.color[i] = color
+        self.n += 1
+        return i
+
+    def spawn(self, emy: pg.sprite.Sprite, bird: pg.sprite.Sprite) -> int:
+        """
+        敵機emyからこうかとんbirdに向かう爆弾を追加する（Bomb.resetと同じ乱数の使い方をする）
+        """
+        rad = random.randint(10, 50)  # 爆弾円の半径：10以上50以下の乱数
+        color = random.randrange(len(self.colors))  # 爆弾円の色：色の一覧からランダム選択
+        x_diff, y_diff = bird.rect.centerx-emy.rect.centerx, bird.rect.centery-emy.rect.centery
+        norm = (x_diff**2+y_diff**2) ** 0.5
+        return self.add(emy.rect.centerx, rect_round(emy.rect.centery+emy.rect.height/2),
+                        x_diff/norm, y_diff/norm, rad, color)
+
+    def spawn_spread(self, boss: pg.sprite.Sprite, bird: pg.sprite.Sprite, spread: int = 200) -> int:
+        """
+        ボスbossの下端付近（左右にspreadの幅で散らす）からこうかとんbirdに向かう爆弾を追加する
+        （Boss_bomb.resetと同じ乱数の使い方をする．色は色の一覧の最初の色）
+        """
+        rad = random.randint(10, 50)
+        x_diff, y_diff = bird.rect.centerx-boss.rect.centerx, bird.rect.centery-boss.rect.centery
+        norm = (x_diff**2+y_diff**2) ** 0.5
+        cx = boss.rect.centerx + random.randrange(-spread, spread)
+        cy = rect_round(boss.rect.centery + boss.rect.height/2)
+        return self.add(cx, cy, x_diff/norm, y_diff/norm, rad, 0, speed=random.randint(2, 10))
+
+    def remove(self, dead):
+        """
+        dead（長さnの真理値配列）がTrueの爆弾を取り除き，残りを前に詰める（順番は保つ）
+        """
+        n = self.n
+        keep = ~dead
+        k = int(keep.sum())
+        if k == n:
+            return
+        for name in __class__.fields:
+            arr = getattr(self, name)
+            arr[:k] = arr[:n][keep]
+        self.n = k
+
+    def update(self, tier: int):
+        """
+        全爆弾を速度ベクトルに基づき一度に移動させ，壁に当たったものを消すか跳ね返す
+        引数 tier：スコアによる爆弾の段階（Bomb.updateと同じ）
+        """
+        n = self.n
+        if n == 0:
+            return
+        pos, vel, speed, rad = self.pos[:n], self.vel[:n], self.speed[:n], self.rad[:n]
+        self.prev[:n] = pos
+        pos += np.trunc(vel * speed[:, None]).astype(pos.dtype)  # Rect.move_ipと同じく切り捨てる
+        out_x = (pos[:, 0] - rad < 0) | (self.width < pos[:, 0] + rad)  # 横方向のはみ出し判定
+        out_y = (pos[:, 1] - rad < 0) | (self.height < pos[:, 1] + rad)  # 縦方向のはみ出し判定
+        if tier == 0:  # スコアが100未満の時、壁に当たると消える
+            self.remove(out_x | out_y)
+            return
+        vel[out_x, 0] *= -1  # スコアが100以上の時、壁で跳ね返る
+        vel[out_y, 1] *= -1
+        if tier >= 2:  # スコアが200以上の時、速さが1.15倍される（max_speedまで）
+            out = out_x | out_y
+            speed[out] = np.minimum(speed[out] * 1.15, self.max_speed)
+
+    def attract(self, wells: list[tuple[int, int]], strength: float, reach: float):
+        """
+        重力球の中心wellsに向かって，中心からの距離に反比例する強さで全爆弾を引き寄せる
+        届く範囲の爆弾だけ，速度ベクトルに引力を足して向きと速さを求め直す
+        引数1 wells：重力球の中心座標の並び
+        引数2 strength：引力の強さ（距離で割った値が1ティックの速度の変化）
+        引数3 reach：引力の届く中心からの距離
+        """
+        n = self.n
+        if n == 0 or not wells:
+            return
+        diff = np.asarray(wells, dtype=float)[None, :, :] - self.pos[:n, None, :]  # 爆弾×重力球の向き
+        dist = np.sqrt(diff[..., 0]*diff[..., 0] + diff[..., 1]*diff[..., 1])  # math.sqrtと同じ丸め
+        near = (dist < reach) & (dist > 0)
+        rows = np.flatnonzero(near.any(axis=1))
+        if len(rows) == 0:
+            return
+        near, dist, diff = near[rows], dist[rows], diff[rows]
+        safe = np.where(near, dist, 1.0)
+        pull = np.where(near, strength / (safe*safe), 0.0)  # 単位ベクトル（diff/dist）×strength/dist
+        v = self.vel[rows] * self.speed[rows, None] + (diff * pull[..., None]).sum(axis=1)
+        speed = np.sqrt(v[:, 0]*v[:, 0] + v[:, 1]*v[:, 1])
+        moving = speed > 0
+        self.vel[rows[moving]] = v[moving] / speed[moving, None]
+        self.speed[rows] = speed
+
+    @staticmethod
+    def sprite_boxes(sprites: list[pg.sprite.Sprite]):
+        """
+        スプライトの当たり判定の形を配列にする
+        戻り値：left, top, right, bottom, 中心x, 中心y, 半径（無ければ-1）の7行×スプライト数の配列
+        """
+        rows = [(*s.rect.topleft, *s.rect.bottomright, *s.rect.center, getattr(s, "radius", -1)) for s in sprites]
+        return np.array(rows, dtype=np.int64).reshape(-1, 7).T.copy()
+
+    def _touch(self, b, s, boxes):
+        """
+        爆弾とスプライトの組ごとに接触しているかを返す（collision.collideと同じ判定を整数で行う）
+        radius属性を持つスプライトとは円同士，持たないスプライトとは円と矩形で判定する
+        引数1 b：爆弾の番号の配列
+        引数2 s：組になるスプライトの番号の配列
+        引数3 boxes：sprite_boxes()の配列
+        """
+        cx = self.pos[b, 0].astype(np.int64)
+        cy = self.pos[b, 1].astype(np.int64)
+        r = self.rad[b].astype(np.int64)
+        left, top, right, bottom, scx, scy, srad = (col[s] for col in boxes)
+        dx = cx - np.minimum(np.maximum(cx, left), right)
+        dy = cy - np.minimum(np.maximum(cy, top), bottom)
+        hit = dx*dx + dy*dy <= r*r
+        circle = np.flatnonzero(srad >= 0)  # 円のスプライト（重力球など）との組は円同士で判定し直す
+        if len(circle):
+            dx, dy, rr = cx[circle] - scx[circle], cy[circle] - scy[circle], r[circle] + srad[circle]
+            hit[circle] = dx*dx + dy*dy <= rr*rr
+        return hit
+
+    def _candidates(self, boxes):
+        """
+        爆弾の中心をグリッドのマスに振り分け，各スプライトの形を爆弾の最大半径だけ広げた範囲の
+        マスにある爆弾だけを候補の組にする（爆弾数×スプライト数の総当たりをしない）
+        戻り値：候補の組の爆弾の番号，スプライトの番号の配列（スプライトの番号の順に並ぶ）
+        """
+        n = self.n
+        pos = self.pos[:n].astype(np.int64)
+        keys = pos[:, 1] // CELL * ROW + pos[:, 0] // CELL
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        reach = int(self.rad[:n].max())
+        left, top, right, bottom, scx, scy, srad = boxes
+        circle = srad >= 0  # 円のスプライトは円を囲む正方形も含める
+        x0 = (np.where(circle, np.minimum(left, scx-srad), left) - reach) // CELL
+        x1 = (np.where(circle, np.maximum(right, scx+srad), right) + reach) // CELL
+        y0 = (np.where(circle, np.minimum(top, scy-srad), top) - reach) // CELL
+        y1 = (np.where(circle, np.maximum(bottom, scy+srad), bottom) + reach) // CELL
+        w = x1 - x0 + 1
+        cells = w * (y1 - y0 + 1)  # スプライトごとのマスの数
+        sid = np.repeat(np.arange(boxes.shape[1]), cells)
+        k = np.arange(len(sid)) - np.repeat(np.cumsum(cells) - cells, cells)  # スプライトの中でのマスの番号
+        cell_keys = (y0[sid] + k // w[sid]) * ROW + x0[sid] + k % w[sid]
+        lo = np.searchsorted(keys, cell_keys, "left")
+        count = np.searchsorted(keys, cell_keys, "right") - lo
+        total = int(count.sum())
+        if total == 0:
+            return sid[:0], sid[:0]
+        start = np.repeat(lo - (np.cumsum(count) - count), count)
+        return order[start + np.arange(total)], np.repeat(sid, count)
+
+    def groupcollide(self, group: pg.sprite.AbstractGroup, dokill: bool, collider=None) -> list[BombView]:
+        """
+        groupと接触した爆弾をすべて取り除き，そのBombViewのリストを返す
+        pg.sprite.groupcollide(bombs, group, True, dokill)と同じく，爆弾の順に判定して
+        既にkillされたスプライトは後の爆弾には当たらない
+        引数3 collider：そのフレームのCollider（爆弾が少ないときはgroupのグリッドを使い回す）
+        """
+        if self.n == 0 or not group:
+            return []
+        if collider is not None and self.n <= FEW_BOMBS:
+            views = [self.view(i) for i in range(self.n)]
+            dead = np.array([bool(collider.spritecollide(v, group, dokill)) for v in views])
+            self.remove(dead)
+            return [v for v, d in zip(views, dead) if d]
+        sprites = group.sprites()
+        boxes = __class__.sprite_boxes(sprites)
+        b, s = self._candidates(boxes)
+        hit = self._touch(b, s, boxes)
+        b, s = b[hit], s[hit]
+        if len(b) == 0:
+            return []
+        dead = np.zeros(self.n, dtype=bool)
+        if dokill:
+            # 爆弾の順に判定すると，スプライトはそれに当たる最初の爆弾でkillされ，
+            # 爆弾はまだkillされていないスプライトに当たったとき（＝あるスプライトの最初の爆弾のとき）だけ消える
+            starts = np.flatnonzero(np.concatenate(([True], s[1:] != s[:-1])))  # 組はスプライトの順に並んでいる
+            first = np.minimum.reduceat(b, starts)  # スプライトごとの最初の爆弾
+            killed = s[starts]
+            dead[first] = True
+            for j in killed[np.lexsort((killed, first))].tolist():  # killする順番もpg.sprite.groupcollideと同じ
+                sprites[j].kill()
+        else:
+            dead[b] = True
+        views = [self.view(i) for i in np.flatnonzero(dead)]
+        self.remove(dead)
+        return views
+
+    def spritecollide(self, sprite: pg.sprite.Sprite, dokill: bool) -> list[BombView]:
+        """
+        spriteと接触した爆弾のBombViewのリストを返す（スプライト1つなので全爆弾と直接判定する）
+        引数2 dokill：Trueなら接触した爆弾を取り除く
+        """
+        n = self.n
+        if n == 0:
+            return []
+        dead = self._touch(np.arange(n), np.zeros(n, dtype=np.intp), __class__.sprite_boxes([sprite]))
+        views = [self.view(i) for i in np.flatnonzero(dead)]
+        if dokill and views:
+            self.remove(dead)
+        return views
+
+    def blit_list(self, alpha: float = 1.0) -> list[tuple[pg.Surface, tuple[int, int]]]:
+        """
+        描画用の(円Surface, 左上座標)のリストを返す
+        引数 alpha：直前のティックから現在までの補間の割合
+        """
+        n = self.n
+        if n == 0:
+            return []
+        pos = self.pos[:n]
+        if alpha < 1.0:
+            pos = self.prev[:n] + (pos - self.prev[:n]) * alpha
+        rad = self.rad[:n]
+        topleft = np.rint(pos - rad[:, None]).astype(int).tolist()
+        imgs = self.imgs
+        blits = []
+        for c, r, xy in zip(self.color[:n].tolist(), rad.tolist(), topleft):
+            img = imgs.get((c, r))
+            if img is None:
+                img = imgs[(c, r)] = ASSETS.circle(r, self.colors[c])
+            blits.append((img, xy))
+        return blits
@@ -0,0 +1,281 @@
+"""
+スクリプトで動くボットに多数のゲームをヘッドレスで遊ばせ，バランス調整用の統計をまとめるモジュール
+ゲームはプロセスプールで並列に，時間調整なしで進める．同じシード・方針・設定からは同じ結果になる
+
+使い方：python botplay.py --games 1000 --policy dodger gunner [--set BOSS_HP=30]
+      python botplay.py --games 200 --sweep BOSS_HP=30,50,80 --out botplay.json
+"""
+import argparse
+import importlib
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+import musou_kokaton as game
+from benchmark import percentile
+from headless import KeyState, RandomInput
+
+CONFIG_KEYS = ("BOSS_HP", "BOSS_APPEAR_TIME", "ENEMY_INTERVAL", "BOUNCE_SCORE", "ACCEL_SCORE", "BOMB_MAX_SPEED",
+               "HYPER_COST", "GRAVITY_COST", "LIFE_UP_SCORE", "HYPER_TIME", "GRAVITY_TIME")  # 変更できる設定
+CURVE_STEP = 5.0  # スコアの推移を記録する間隔（秒）
+
+
+class Policy:
+    """
+    ボットの方針の基底クラス
+    reset()でゲームごとに初期化し，frame()で毎ティックの入力を返す
+    """
+    def reset(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def frame(self, world: game.World, n: int) -> tuple[KeyState, list[pg.event.Event]]:
+        return KeyState(), []
+
+    @staticmethod
+    def keydown(*keys: int) -> list[pg.event.Event]:
+        return [pg.event.Event(pg.KEYDOWN, key=k) for k in keys]
+
+
+class IdlePolicy(Policy):
+    """
+    何もしない（基準用）
+    """
+
+
+class RandomPolicy(Policy):
+    """
+    headless.RandomInputと同じ，ランダムな移動とビーム
+    """
+    def reset(self, seed: int):
+        self.inputs = RandomInput(seed)
+
+    def frame(self, world, n):
+        return self.inputs.frame(n)
+
+
+class DodgerPolicy(Policy):
+    """
+    近くの爆弾から逃げ，逃げる必要がないときは敵機の真下に移動して上にビームを撃つ
+    スコアに余裕があれば，爆弾が多いときに重力球，ぶつかりそうなときに無敵状態を使う
+    """
+    danger = 220  # この距離より近い爆弾から逃げる
+    home_y = game.HEIGHT - 150  # 普段いる高さ
+
+    @staticmethod
+    def threats(world):
+        yield from world.bombs
+        yield from world.boss_bomb
+
+    def frame(self, world, n):
+        bird = world.bird
+        bx, by = bird.rect.center
+        near, close = [], 0
+        for b in __class__.threats(world):
+            dx, dy = bx - b.rect.centerx, by - b.rect.centery
+            d = math.hypot(dx, dy) - b.radius
+            if d < self.danger:
+                near.append((d, dx, dy))
+            if d < 300:
+                close += 1
+        keys, events = set(), []
+        if near:  # 一番近い爆弾から離れる向きに動く
+            d, dx, dy = min(near)
+            if abs(dx) > 5:
+                keys.add(pg.K_RIGHT if dx > 0 else pg.K_LEFT)
+            if abs(dy) > 5:
+                keys.add(pg.K_DOWN if dy > 0 else pg.K_UP)
+            if d < 40 and bird.state != "hyper" and world.score.flags["hyper"]:
+                events += self.keydown(pg.K_RSHIFT)
+        else:
+            target = min(world.emys, key=lambda e: abs(e.rect.centerx - bx), default=None)
+            if target is not None and abs(target.rect.centerx - bx) > 20:
+                keys.add(pg.K_RIGHT if target.rect.centerx > bx else pg.K_LEFT)
+            elif by > self.home_y:
+                keys.add(pg.K_UP)  # 上を向いて撃つ
+            elif by < self.home_y - 40:
+                keys.add(pg.K_DOWN)
+            elif n % 4 == 0:
+                keys.add(pg.K_UP)
+        if n % 5 == 0:
+            events += self.keydown(pg.K_SPACE)
+        if close >= 6 and not world.gravity and world.score.flags["gravity"]:
+            events += self.keydown(pg.K_TAB)
+        return KeyState(keys), events
+
+
+class GunnerPolicy(DodgerPolicy):
+    """
+    DodgerPolicyと同じく逃げながら，ビームの代わりにNeoBeam（左シフト＋スペース）を撃ち続ける
+    """
+    def frame(self, world, n):
+        keys, events = super().frame(world, n)
+        if n % 5 == 0:
+            return KeyState(keys.keys | {pg.K_LSHIFT}), events
+        return keys, events
+
+
+POLICIES = {"idle": IdlePolicy, "random": RandomPolicy, "dodger": DodgerPolicy, "gunner": GunnerPolicy}
+
+
+def load_policy(name: str) -> Policy:
+    """
+    方針の名前（POLICIESのキー，または"モジュール:クラス"）から方針を作る
+    """
+    if name in POLICIES:
+        return POLICIES[name]()
+    module, cls = name.split(":")
+    return getattr(importlib.import_module(module), cls)()
+
+
+def parse_value(text: str) -> int | float:
+    value = float(text)
+    return int(value) if value.is_integer() and "." not in text else value
+
+
+def parse_config(items: list[str]) -> dict:
+    """
+    "名前=値"の並びを設定の辞書にする
+    """
+    config = {}
+    for item in items:
+        name, value = item.split("=")
+        if name not in CONFIG_KEYS:
+            raise SystemExit(f"変更できない設定です：{name}（{', '.join(CONFIG_KEYS)}）")
+        config[name] = parse_value(value)
+    return config
+
+
+def config_label(config: dict) -> str:
+    return ",".join(f"{k}={v}" for k, v in sorted(config.items())) or "default"
+
+
+def init_worker():
+    game.init(loading_screen=False)
+
+
+def play_game(job: tuple) -> dict:
+    """
+    ゲームを1回遊び，その結果を返す（プロセスプールの各プロセスで呼ばれる）
+    引数 job：(シード, 方針の名前, 設定の辞書, 最大の秒数)
+    """
+    seed, policy_name, config, max_seconds = job
+    saved = {k: getattr(game, k) for k in config}
+    for k, v in config.items():  # 設定を変えてからWorldを作る
+        setattr(game, k, v)
+    try:
+        random.seed(seed)
+        world = game.World(mute=True)
+        policy = load_policy(policy_name)
+        policy.reset(seed)
+        max_ticks = game.sec2tick(max_seconds)
+        curve_ticks = game.sec2tick(CURVE_STEP)
+        curve = []
+        peaks = world.counts()
+        n = 0
+        while n < max_ticks:
+            key_lst, events = policy.frame(world, n)
+            n += 1
+            result = world.step(key_lst, events)
+            for k, v in world.counts().items():
+                if v > peaks[k]:
+                    peaks[k] = v
+            if n % curve_ticks == 0:
+                curve.append(world.score.score)
+            if result is not None:
+                break
+        return {
+            "seed": seed,
+            "policy": policy_name,
+            "config": config_label(config),
+            "result": world.result or "timeout",
+            "seconds": n * game.DT,
+            "score": world.score.score,
+            "boss_hp": world.boss.boss_hp,
+            "curve": curve,
+            "peaks": peaks,
+        }
+    finally:
+        for k, v in saved.items():
+            setattr(game, k, v)
+
+
+def aggregate(games: list[dict]) -> dict:
+    """
+    同じ方針・設定のゲームの結果をまとめる
+    """
+    n = len(games)
+    secs = [g["seconds"] for g in games]
+    scores = [g["score"] for g in games]
+    longest = max(len(g["curve"]) for g in games)
+    curve = []
+    for i in range(longest):  # その時点まで生き残ったゲームの平均スコアと生存率
+        vals = [g["curve"][i] for g in games if len(g["curve"]) > i]
+        curve.append({"t": (i+1)*CURVE_STEP, "alive": round(len(vals)/n, 4), "score": round(sum(vals)/len(vals), 2)})
+    peaks = {k: {"max": max(g["peaks"][k] for g in games), "mean": round(sum(g["peaks"][k] for g in games)/n, 2)}
+             for k in games[0]["peaks"] if k != "quality"}
+    rate = lambda r: round(sum(g["result"] == r for g in games)/n, 4)
+    return {
+        "games": n,
+        "boss_kill_rate": rate("clear"),
+        "gameover_rate": rate("gameover"),
+        "timeout_rate": rate("timeout"),
+        "survival_s": {"mean": round(sum(secs)/n, 2), "p50": percentile(secs, 50), "p95": percentile(secs, 95)},
+        "score": {"mean": round(sum(scores)/n, 2), "p50": percentile(scores, 50), "max": max(scores)},
+        "score_curve": curve,
+        "peaks": peaks,
+    }
+
+
+def run(games: int, policies: list[str], configs: list[dict], seed: int = 0, max_seconds: float = 120.0,
+        workers: int | None = None) -> dict:
+    """
+    方針×設定ごとにgames回ずつゲームを遊ばせ，まとめた結果を返す
+    シードはseed, seed+1, ...を方針・設定によらず共通に使う
+    """
+    jobs = [(seed+i, p, c, max_seconds) for p in policies for c in configs for i in range(games)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                             initializer=init_worker) as pool:
+        results = list(pool.map(play_game, jobs, chunksize=max(1, len(jobs) // (4*(workers or os.cpu_count() or 1)))))
+    elapsed = time.perf_counter() - start
+    groups = {}
+    for r in results:
+        groups.setdefault((r["policy"], r["config"]), []).append(r)
+    return {
+        "meta": {"games": len(jobs), "seconds": round(elapsed, 2), "games_per_s": round(len(jobs)/elapsed, 2),
+                 "seed": seed, "max_seconds": max_seconds, "workers": workers or os.cpu_count()},
+        "results": [{"policy": p, "config": c, **aggregate(g)} for (p, c), g in groups.items()],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ボットに遊ばせてバランス調整用の統計をまとめる")
+    parser.add_argument("--games", type=int, default=100, help="方針・設定ごとのゲーム数")
+    parser.add_argument("--policy", nargs="+", default=["dodger"], help="方針（名前または モジュール:クラス）")
+    parser.add_argument("--set", nargs="*", default=[], metavar="NAME=VALUE", help="全体に適用する設定")
+    parser.add_argument("--sweep", nargs="*", default=[], metavar="NAME=V1,V2", help="値を振る設定（組み合わせを全部試す）")
+    parser.add_argument("--seed", type=int, default=0, help="最初のシード")
+    parser.add_argument("--max-seconds", type=float, default=120.0, help="1ゲームの最大のシミュレーション時間（秒）")
+    parser.add_argument("--workers", type=int, help="プロセス数（既定はCPU数）")
+    parser.add_argument("--out", default="botplay.json", help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+    base = parse_config(args.set)
+    axes = [[f"{name}={v}" for v in values.split(",")] for name, values in (s.split("=") for s in args.sweep)]
+    configs = [{**base, **parse_config(list(combo))} for combo in itertools.product(*axes)]
+    report = run(args.games, args.policy, configs, args.seed, args.max_seconds, args.workers)
+    for r in report["results"]:
+        print(f"{r['policy']:8s} {r['config']:30s} kill {r['boss_kill_rate']:6.1%}  "
+              f"survival {r['survival_s']['mean']:7.1f}s  score {r['score']['mean']:8.1f}")
+    print(f"{report['meta']['games']} games in {report['meta']['seconds']}s", flush=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
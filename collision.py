@@ -0,0 +1,143 @@
+import pygame as pg
+
+
+def collide(a: pg.sprite.Sprite, b: pg.sprite.Sprite) -> bool:
+    """
+    2つのスプライトが接触しているかを判定する
+    radius属性を持つスプライトは円（中心はrect.center），持たないものは矩形として扱う
+    """
+    ra = getattr(a, "radius", None)
+    rb = getattr(b, "radius", None)
+    if ra is None and rb is None:  # 矩形同士
+        return a.rect.colliderect(b.rect)
+    if ra is not None and rb is not None:  # 円同士
+        dx = a.rect.centerx - b.rect.centerx
+        dy = a.rect.centery - b.rect.centery
+        return dx*dx + dy*dy <= (ra+rb)*(ra+rb)
+    if ra is None:  # 円と矩形：aを円，bを矩形に揃える
+        a, b, ra = b, a, rb
+    # 円の中心に最も近い矩形上の点との距離で判定
+    cx, cy = a.rect.center
+    r = b.rect
+    nx = min(max(cx, r.left), r.right)
+    ny = min(max(cy, r.top), r.bottom)
+    dx, dy = cx-nx, cy-ny
+    return dx*dx + dy*dy <= ra*ra
+
+
+class SpatialHash:
+    """
+    一様グリッドでスプライトを管理し，近くにあるスプライトだけを候補として返すクラス
+    """
+    def __init__(self, cell: int = 128):
+        """
+        引数 cell：グリッド1マスの大きさ（ピクセル）
+        """
+        self.cell = cell
+        self.cells = {}  # (列, 行) → スプライトのリスト
+
+    def clear(self):
+        self.cells.clear()
+
+    def _span(self, rect: pg.Rect) -> tuple[range, range]:
+        c = self.cell
+        return range(rect.left//c, rect.right//c+1), range(rect.top//c, rect.bottom//c+1)
+
+    def insert(self, sprite: pg.sprite.Sprite):
+        cells = self.cells
+        xs, ys = self._span(sprite.rect)
+        for x in xs:
+            for y in ys:
+                lst = cells.get((x, y))
+                if lst is None:
+                    cells[(x, y)] = [sprite]
+                else:
+                    lst.append(sprite)
+
+    def build(self, sprites):
+        """
+        スプライトの一覧からグリッドを作り直す
+        """
+        self.cells.clear()
+        for sprite in sprites:
+            self.insert(sprite)
+
+    def query(self, rect: pg.Rect) -> list[pg.sprite.Sprite]:
+        """
+        rectと同じマスに入っているスプライトを重複なしで返す
+        """
+        cells = self.cells
+        found = []
+        seen = set()
+        xs, ys = self._span(rect)
+        for x in xs:
+            for y in ys:
+                for sprite in cells.get((x, y), ()):
+                    if id(sprite) not in seen:
+                        seen.add(id(sprite))
+                        found.append(sprite)
+        return found
+
+
+class Collider:
+    """
+    pg.sprite.groupcollide / spritecollide と同じ結果を空間ハッシュで求めるクラス
+    グループごとのグリッドは1フレームに一度だけ作り，同じフレーム内の判定で使い回す
+    """
+    def __init__(self, cell: int = 128):
+        """
+        引数 cell：グリッド1マスの大きさ（ピクセル）
+        """
+        self.cell = cell
+        self.hashes = {}  # id(グループ) → そのフレームのSpatialHash
+        self.tests = 0  # 詳細判定を行った回数
+
+    def begin_frame(self):
+        """
+        フレームの始めに呼び，前のフレームのグリッドを破棄する
+        """
+        self.hashes.clear()
+        self.tests = 0
+
+    def hash_of(self, group: pg.sprite.AbstractGroup) -> SpatialHash:
+        h = self.hashes.get(id(group))
+        if h is None:
+            h = SpatialHash(self.cell)
+            h.build(group)
+            self.hashes[id(group)] = h
+        return h
+
+    def spritecollide(self, sprite: pg.sprite.Sprite, group: pg.sprite.AbstractGroup,
+                      dokill: bool) -> list[pg.sprite.Sprite]:
+        """
+        spriteと接触しているgroup内のスプライトのリストを返す
+        引数3 dokill：Trueなら接触したスプライトをkill()する
+        """
+        hits = []
+        for other in self.hash_of(group).query(sprite.rect):
+            if other in group:  # 同じフレームで既にkillされたものは除く
+                self.tests += 1
+                if collide(sprite, other):
+                    hits.append(other)
+        if dokill:
+            for other in hits:
+                other.kill()
+        return hits
+
+    def groupcollide(self, groupa: pg.sprite.AbstractGroup, groupb: pg.sprite.AbstractGroup,
+                     dokilla: bool, dokillb: bool) -> dict:
+        """
+        groupaの各スプライトをキー，接触したgroupbのスプライトのリストを値とする辞書を返す
+        引数3 dokilla：Trueなら接触したgroupaのスプライトをkill()する
+        引数4 dokillb：Trueなら接触したgroupbのスプライトをkill()する
+        """
+        crashed = {}
+        if not groupa or not groupb:
+            return crashed
+        for a in groupa.sprites():
+            hits = self.spritecollide(a, groupb, dokillb)
+            if hits:
+                crashed[a] = hits
+                if dokilla:
+                    a.kill()
+        return crashed
@@ -0,0 +1,123 @@
+import pygame as pg
+
+try:
+    import numpy as np
+except ImportError:  # numpyが無い環境では従来のExplosionスプライトを使う
+    np = None
+
+from assets import ASSETS
+
+
+class EffectArray:
+    """
+    爆発エフェクトを，位置・経過ティック・寿命・画像の番号の配列でまとめて管理するクラス
+    配列は足りなくなったら倍に増やし，全エフェクトの時間を一度に進める
+    見た目と寿命はExplosionと同じ（10ティックごとに2枚の画像を切り替え，寿命が尽きたら消える）
+    """
+    fields = ("pos", "age", "lifetime", "frame")  # エフェクトごとの配列の属性名
+    def __init__(self, capacity: int = 512):
+        """
+        引数 capacity：最初に確保するエフェクトの数（足りなくなったら倍に増やす）
+        """
+        self.n = 0  # 表示中のエフェクトの数
+        self.pos = np.zeros((capacity, 2), dtype=np.int32)  # 画像の左上座標
+        self.age = np.zeros(capacity, dtype=np.int32)  # 出してからのティック数
+        self.lifetime = np.zeros(capacity, dtype=np.int32)  # 寿命（ティック）
+        self.frame = np.zeros(capacity, dtype=np.int32)  # 表示する画像の番号
+        self.imgs = []  # 画像の番号 → 画像（load_images()で読み込む）
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __bool__(self) -> bool:
+        return self.n > 0
+
+    def clear(self):
+        self.n = 0
+
+    def reserve(self, n: int):
+        """
+        n個のエフェクトが入るまで配列を大きくする
+        """
+        while len(self.age) < n:
+            self._grow()
+
+    def _grow(self):
+        cap = 2 * len(self.age)
+        for name in __class__.fields:
+            old = getattr(self, name)
+            new = np.zeros((cap,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def load_images(self):
+        if not self.imgs:
+            self.imgs = [ASSETS.image("explosion"), ASSETS.image("explosion_flip")]
+
+    def spawn(self, obj, life: int):
+        """
+        objの中心に爆発エフェクトを1つ出す（Explosion(obj, life)と同じ）
+        引数1 obj：爆発するスプライト（rectを持つもの）
+        引数2 life：爆発時間（ティック）
+        """
+        self.load_images()
+        if self.n == len(self.age):
+            self._grow()
+        w, h = self.imgs[0].get_size()
+        cx, cy = obj.rect.center
+        i = self.n
+        self.pos[i] = cx - w//2, cy - h//2
+        self.age[i] = 0
+        self.lifetime[i] = life
+        self.frame[i] = 0
+        self.n += 1
+
+    def add(self, *sprites):
+        """
+        pg.sprite.Group.add()の代わりに，Explosionスプライトをエフェクトとして取り込む
+        取り込んだスプライトはkill()してプールに戻す
+        """
+        for s in sprites:
+            self.spawn(s, s.life)
+            s.kill()
+
+    def remove(self, dead):
+        """
+        dead（長さnの真理値配列）がTrueのエフェクトを取り除き，残りを前に詰める（順番は保つ）
+        """
+        n = self.n
+        keep = ~dead
+        k = int(keep.sum())
+        if k == n:
+            return
+        for name in __class__.fields:
+            arr = getattr(self, name)
+            arr[:k] = arr[:n][keep]
+        self.n = k
+
+    def update(self):
+        """
+        全エフェクトの時間を1ティック進め，画像を切り替えて寿命が尽きたものを消す
+        """
+        n = self.n
+        if n == 0:
+            return
+        age = self.age[:n]
+        age += 1
+        life = self.lifetime[:n] - age  # Explosion.lifeと同じ残り時間
+        self.frame[:n] = life // 10 % 2
+        self.remove(life < 0)
+
+    def blit_list(self, alpha: float = 1.0) -> list[tuple[pg.Surface, tuple[int, int]]]:
+        """
+        描画用の(画像, 左上座標)のリストを返す（エフェクトは動かないので補間しない）
+        """
+        n = self.n
+        if n == 0:
+            return []
+        imgs = self.imgs
+        return [(imgs[f], xy) for f, xy in zip(self.frame[:n].tolist(), self.pos[:n].tolist())]
@@ -0,0 +1,114 @@
+from collections import deque
+
+import pygame as pg
+
+QUALITY_EVENT = pg.USEREVENT + 1  # 品質レベルの変更をWorldに伝えるイベント（入力として記録される）
+
+
+class Quality:
+    """
+    品質レベルごとの，ゲームに必須でない処理の量の設定（Noneは上限なし）
+    """
+    def __init__(self, level: int, name: str, explosion_scale: float, max_explosions: int | None,
+                 sfx_per_frame: int | None, enemy_interval_scale: float, max_enemies: int | None,
+                 max_bombs: int | None):
+        self.level = level
+        self.name = name
+        self.explosion_scale = explosion_scale  # 爆発時間の倍率
+        self.max_explosions = max_explosions  # 同時に表示する爆発の数
+        self.sfx_per_frame = sfx_per_frame  # 1フレームに鳴らすSEの数
+        self.enemy_interval_scale = enemy_interval_scale  # 敵機の出現間隔の倍率
+        self.max_enemies = max_enemies  # 同時に存在する敵機の数
+        self.max_bombs = max_bombs  # 同時に存在する敵機の爆弾の数
+
+
+QUALITY_LEVELS = (
+    Quality(0, "minimal", 0.2, 8, 1, 2.0, 12, 150),
+    Quality(1, "low", 0.4, 20, 2, 1.5, 20, 250),
+    Quality(2, "medium", 0.6, 40, 4, 1.0, 30, 400),
+    Quality(3, "high", 1.0, None, None, 1.0, None, None),
+)
+FULL_QUALITY = QUALITY_LEVELS[-1]
+
+
+class Governor:
+    """
+    計測したフレーム時間を見て，目標の時間に収まるように品質レベルを上げ下げするクラス
+    フレーム時間の指数移動平均が目標のdown倍を超えたら1段下げ，up倍を下回る状態が続いたら1段上げる
+    """
+    def __init__(self, budget: float, down: float = 0.9, up: float = 0.6, smoothing: float = 0.1,
+                 hold: int = 30, recover: int = 120, history: int = 100):
+        """
+        引数1 budget：1フレームの目標時間（秒）
+        引数2 down：品質を下げるフレーム時間（budgetに対する割合）
+        引数3 up：品質を上げるフレーム時間（budgetに対する割合）
+        引数4 smoothing：指数移動平均の係数
+        引数5 hold：品質を変えた後，次に下げるまで待つフレーム数
+        引数6 recover：品質を上げるのに必要な，余裕のあるフレームの連続数
+        引数7 history：覚えておく判断の数
+        """
+        self.budget = budget
+        self.down = down
+        self.up = up
+        self.smoothing = smoothing
+        self.hold = hold
+        self.recover = recover
+        self.level = FULL_QUALITY.level
+        self.avg = None  # フレーム時間の指数移動平均（秒）
+        self.frame = 0
+        self.last_change = 0  # 起動直後の数フレームでは下げない
+        self.calm = 0  # 余裕のあるフレームの連続数
+        self.decisions = deque(maxlen=history)  # (フレーム番号, 変更前, 変更後, 平均フレーム時間ms)
+
+    @property
+    def quality(self) -> Quality:
+        return QUALITY_LEVELS[self.level]
+
+    def update(self, frame_time: float) -> bool:
+        """
+        1フレーム分のフレーム時間を受け取り，必要なら品質レベルを変える
+        引数 frame_time：そのフレームの処理時間（秒）
+        戻り値：品質レベルを変えたらTrue
+        """
+        self.frame += 1
+        if self.avg is None:
+            self.avg = frame_time
+        else:
+            self.avg += (frame_time - self.avg) * self.smoothing
+        new = self.level
+        if self.avg > self.budget * self.down:
+            self.calm = 0
+            if self.level > 0 and self.frame - self.last_change >= self.hold:
+                new = self.level - 1
+        elif self.avg < self.budget * self.up:
+            self.calm += 1
+            if self.level < FULL_QUALITY.level and self.calm >= self.recover:
+                new = self.level + 1
+        else:
+            self.calm = 0
+        if new == self.level:
+            return False
+        self.decisions.append((self.frame, self.level, new, round(self.avg*1000, 3)))
+        self.level = new
+        self.last_change = self.frame
+        self.calm = 0
+        return True
+
+    def event(self) -> pg.event.Event:
+        """
+        現在の品質レベルをWorldに伝えるイベントを返す
+        """
+        return pg.event.Event(QUALITY_EVENT, level=self.level)
+
+    def state(self) -> dict:
+        """
+        調整用に，現在の品質レベルと設定，これまでの判断を返す
+        """
+        return {
+            "level": self.level,
+            "name": self.quality.name,
+            "avg_ms": round((self.avg or 0.0)*1000, 3),
+            "budget_ms": round(self.budget*1000, 3),
+            "quality": dict(vars(self.quality)),
+            "decisions": list(self.decisions),
+        }
@@ -0,0 +1,192 @@
+"""
+画面・音声を使わずにゲームを高速に進めるヘッドレス実行用モジュール
+同じシードと同じ入力からは必ず同じ結果が得られる
+
+使い方：python headless.py --frames 3000 --seed 1 [--script 入力.json] [--render]
+      python headless.py --replay 記録.krp（main()で記録した入力を再生する）
+      python headless.py --replay 記録.krp --load-state 状態.kks（保存した状態のティックから続きを再生する）
+      python headless.py --check-modes（配列版とスプライト版で最終状態が一致するか確かめる）
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+# pygameを読み込む前にSDLのダミードライバを指定する
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+import musou_kokaton as game
+import snapshot
+from render import Renderer
+from replay import InputLog
+
+
+class KeyState:
+    """
+    pg.key.get_pressed()の代わりに使う，押下キーの集合を添字で引けるクラス
+    """
+    def __init__(self, keys=()):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.keys
+
+
+def key_code(name: str) -> int:
+    """
+    "SPACE"や"LEFT"などのキー名をpygameのキーコードに変換する
+    """
+    return getattr(pg, f"K_{name}")
+
+
+class ScriptedInput:
+    """
+    台本（区間ごとに押し続けるキーと一定間隔で押すキー）に従って入力を作るクラス
+    台本の1項目：{"from": 開始フレーム, "to": 終了フレーム, "hold": [キー名...],
+                  "press": [キー名...], "every": 押す間隔}
+    """
+    def __init__(self, script: list[dict]):
+        self.script = [
+            (item.get("from", 0), item.get("to", sys.maxsize),
+             frozenset(key_code(k) for k in item.get("hold", ())),
+             [key_code(k) for k in item.get("press", ())], max(1, item.get("every", 1)))
+            for item in script
+        ]
+
+    @classmethod
+    def load(cls, path: str) -> "ScriptedInput":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def frame(self, n: int) -> tuple[KeyState, list[pg.event.Event]]:
+        """
+        nフレーム目の入力を返す
+        戻り値：押下キーの状態，KEYDOWNイベントのリスト
+        """
+        held = set()
+        events = []
+        for start, end, hold, press, every in self.script:
+            if start <= n <= end:
+                held |= hold
+                if (n-start) % every == 0:
+                    events += [pg.event.Event(pg.KEYDOWN, key=k) for k in press]
+        return KeyState(held), events
+
+
+class RandomInput:
+    """
+    シードから決まる疑似乱数で十字キーとビームを操作する入力（台本を指定しないときの既定）
+    """
+    moves = [(), ("UP",), ("DOWN",), ("LEFT",), ("RIGHT",), ("UP", "LEFT"), ("UP", "RIGHT"),
+             ("DOWN", "LEFT"), ("DOWN", "RIGHT")]
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.held = KeyState()
+
+    def frame(self, n: int) -> tuple[KeyState, list[pg.event.Event]]:
+        if n % 25 == 0:  # 25フレームごとに移動方向を変える
+            self.held = KeyState(key_code(k) for k in self.rng.choice(__class__.moves))
+        events = []
+        if n % 10 == 0:
+            events.append(pg.event.Event(pg.KEYDOWN, key=pg.K_SPACE))
+        if self.rng.random() < 0.01:
+            events.append(pg.event.Event(pg.KEYDOWN, key=pg.K_TAB))
+        return self.held, events
+
+
+def state_digest(state: dict) -> str:
+    """
+    ゲーム世界の状態から比較用のハッシュ値を求める
+    """
+    return hashlib.sha1(json.dumps(state, sort_keys=True).encode()).hexdigest()
+
+
+def run(frames: int, seed: int, inputs=None, render: bool = False, load_state: str | None = None,
+        save_state: str | None = None, vector: bool | None = None) -> dict:
+    """
+    ゲームをframesフレーム分，できるだけ速く進める
+    引数1 frames：進めるフレーム数
+    引数2 seed：乱数のシード
+    引数3 inputs：frame(n)で入力を返すオブジェクト（Noneならシードから決まるRandomInput）
+    引数4 render：Trueならダミー画面への描画も行う
+    引数5 load_state：snapshot.save()で保存したファイル．その状態（乱数を含む）のティックからframesまで進める
+    引数6 save_state：最後の状態を保存するファイル
+    引数7 vector：爆弾と爆発を配列でまとめて処理するか（Noneならnumpyがあれば使う）
+    戻り値：実行結果（フレーム数，所要時間，fps，最終状態とそのハッシュ値）
+    """
+    random.seed(seed)
+    if inputs is None:
+        inputs = RandomInput(seed)
+    game.init(loading_screen=False)
+    world = game.World(mute=True, vector_bombs=vector, vector_effects=vector)
+    if load_state:
+        with open(load_state, "rb") as f:
+            snapshot.load(world, f.read())
+    renderer = Renderer(game.screen, game.bg_imgs_lst[0]) if render else None
+    start = time.perf_counter()
+    n = first = world.tmr
+    while n < frames:
+        key_lst, events = inputs.frame(n)
+        n += 1
+        if world.step(key_lst, events) is not None:
+            break
+        if renderer is not None:
+            world.draw(renderer)
+            renderer.present()
+    elapsed = time.perf_counter() - start
+    if save_state:
+        with open(save_state, "wb") as f:
+            f.write(snapshot.save(world))
+    state = world.state()
+    return {
+        "seed": seed,
+        "frames": n,
+        "seconds": elapsed,
+        "fps": (n-first) / elapsed if elapsed > 0 else 0.0,
+        "startup_seconds": game.startup_seconds,
+        "digest": state_digest(state),
+        "state": {k: v for k, v in state.items() if k != "sprites"},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ヘッドレスでゲームを進めて速度と最終状態を表示する")
+    parser.add_argument("--frames", type=int, default=3000, help="進めるフレーム数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+    parser.add_argument("--script", help="入力の台本（JSON）")
+    parser.add_argument("--render", action="store_true", help="ダミー画面への描画も行う")
+    parser.add_argument("--replay", help="入力の記録ファイル（シードとフレーム数も記録から決める）")
+    parser.add_argument("--load-state", help="この保存した状態のティックから進める（snapshot.py）")
+    parser.add_argument("--save-state", help="最後の状態をこのファイルに保存する")
+    parser.add_argument("--check-modes", action="store_true",
+                        help="配列版とスプライト版で同じ最終状態になるかを確かめる（違えば終了コード1）")
+    args = parser.parse_args()
+    inputs = ScriptedInput.load(args.script) if args.script else None
+    if args.replay:
+        try:
+            inputs = InputLog.load(args.replay)
+        except ValueError as e:  # 入力記録でないか，形式のバージョンが違う
+            raise SystemExit(e)
+        args.seed, args.frames = inputs.seed, len(inputs)
+    if args.check_modes:  # 入力は毎回作り直して，両方の版に同じ入力を与える
+        results = {}
+        for vector in (True, False):
+            if args.replay:
+                inputs = InputLog.load(args.replay)
+            elif args.script:
+                inputs = ScriptedInput.load(args.script)
+            results["array" if vector else "sprites"] = run(args.frames, args.seed, inputs, vector=vector)
+        for name, result in results.items():
+            print(f"{name:8s} frames {result['frames']:5d}  digest {result['digest']}")
+        pg.quit()
+        sys.exit(0 if len({r["digest"] for r in results.values()}) == 1 else 1)
+    print(json.dumps(run(args.frames, args.seed, inputs, args.render, args.load_state, args.save_state),
+                     ensure_ascii=False, indent=2))
+    pg.quit()
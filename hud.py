@@ -0,0 +1,69 @@
+import pygame as pg
+
+
+class GlyphAtlas:
+    """
+    フォントと色ごとに，1文字ずつ描画したSurfaceを保持するクラス
+    数字などの文字列はこの文字画像を並べて作るので，フォントの描画は最初の一度だけで済む
+    """
+    def __init__(self, font: pg.font.Font, color: tuple[int, int, int], chars: str = "0123456789:-"):
+        """
+        引数1 font：フォント
+        引数2 color：文字色
+        引数3 chars：先に描画しておく文字
+        """
+        self.font = font
+        self.color = color
+        self.glyphs = {}  # 文字 → 文字画像
+        for c in chars:
+            self.glyph(c)
+
+    def glyph(self, c: str) -> pg.Surface:
+        img = self.glyphs.get(c)
+        if img is None:
+            img = self.glyphs[c] = self.font.render(c, 0, self.color)
+        return img
+
+    def compose(self, text: str, prefix: pg.Surface | None = None) -> pg.Surface:
+        """
+        文字画像を横に並べてtextの画像を作る
+        引数2 prefix：先頭に置く画像（ラベルなど）
+        """
+        imgs = [prefix] if prefix is not None else []
+        imgs += [self.glyph(c) for c in text]
+        w = sum(img.get_width() for img in imgs)
+        h = max((img.get_height() for img in imgs), default=0)
+        surf = pg.Surface((w, h), pg.SRCALPHA)
+        x = 0
+        blits = []
+        for img in imgs:
+            blits.append((img, (x, 0)))
+            x += img.get_width()
+        surf.blits(blits, doreturn=False)
+        return surf
+
+
+class HudText:
+    """
+    ラベルと値からなるHUDの文字列画像を，値が変わったときだけ作り直すクラス
+    """
+    def __init__(self, atlas: GlyphAtlas, label: str = ""):
+        """
+        引数1 atlas：値の描画に使う文字画像の集合
+        引数2 label：値の前に付けるラベル（一度だけ描画する）
+        """
+        self.atlas = atlas
+        self.label = atlas.font.render(label, 0, atlas.color) if label else None
+        self.value = None
+        self.image = None
+        self.renders = 0  # 画像を作り直した回数
+
+    def get(self, value) -> pg.Surface:
+        """
+        値valueを表示する画像を返す（前回と同じ値なら作り直さない）
+        """
+        if self.image is None or value != self.value:
+            self.value = value
+            self.image = self.atlas.compose(str(value), self.label)
+            self.renders += 1
+        return self.image
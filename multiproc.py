@@ -0,0 +1,524 @@
+"""
+ゲーム世界のシミュレーションを別プロセスで行い，メインプロセスは入力と描画だけを行うモジュール
+シミュレーション側はティックごとにスプライトの種類・画像の番号・位置とHUDの値を
+共有メモリのダブルバッファに書き込み，描画側は最新の完成した方を読んで描く
+
+使い方：python multiproc.py [--seed 1] [--max-fps 0]
+      python multiproc.py --bench 600 [--scenario bombs2000]（単一プロセスとの比較）
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import random
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+import pygame as pg
+
+import musou_kokaton as game
+from assets import ASSETS
+from governor import Governor
+from render import Renderer
+from replay import KeyMask, decode_events, encode_events, encode_keys
+
+# スプライトの種類（描画順）
+GRAVITY, BIRD, BEAM, ENEMY, BOSS, BOMB, BOSS_BOMB, EXPLOSION = range(8)
+RESULTS = (None, "gameover", "clear")  # 結果の番号 → World.result
+
+CONTROL = struct.Struct("<Q")  # 書き込み済みのスナップショットの数
+SLOT_HEAD = struct.Struct("<QIdiiidbbI")  # seq, tick, 時刻, スコア, 残機, ボスHP, 経過時間, 結果, 品質, スプライト数
+ENTITY = "i"  # 1スプライト：種類, 画像の番号, x, y, 直前のx, 直前のy（int32×6．画面外に飛んだ爆弾の座標も入る）
+ENTITY_SIZE = 6 * struct.calcsize(ENTITY)
+MAX_ENTITIES = 8192  # 1つのスナップショットに書けるスプライトの数
+
+
+class Snapshot:
+    """
+    共有メモリから読み出した1ティック分の世界の状態
+    """
+    __slots__ = ("tick", "stamp", "score", "life", "boss_hp", "elapsed", "result", "quality", "entities")
+
+    def __init__(self, head: tuple, entities: tuple):
+        _, self.tick, self.stamp, self.score, self.life, self.boss_hp, self.elapsed, result, \
+            self.quality, _ = head
+        self.result = RESULTS[result]
+        self.entities = entities  # (種類, 画像の番号, x, y, 直前のx, 直前のy)を平らに並べたもの
+
+
+class SnapshotBuffer:
+    """
+    スナップショットを2つ分置ける共有メモリ
+    書き込み側は古い方の枠に書いてから書き込み数を進め，読み出し側は最新の枠を読む
+    枠ごとのseqは書き込み中だけ奇数になり，読み出し中に書き換えられたら読み直す
+    （偶数のseqは他の値をすべて書いた後に，それだけを最後に書く）
+    """
+    def __init__(self, name: str | None = None, max_entities: int = MAX_ENTITIES):
+        """
+        引数1 name：既存の共有メモリの名前（Noneなら新しく作る）
+        引数2 max_entities：1つのスナップショットに書けるスプライトの数
+        """
+        self.max_entities = max_entities
+        self.slot_size = SLOT_HEAD.size + max_entities*ENTITY_SIZE
+        size = CONTROL.size + 2*self.slot_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.written = 0
+        self.dropped = 0  # 枠に入りきらずに捨てたスプライトの数
+
+    def offset(self, slot: int) -> int:
+        return CONTROL.size + slot*self.slot_size
+
+    def write(self, tick: int, hud: tuple, flat: list[int]):
+        """
+        スナップショットを書き込む
+        引数1 tick：ティック番号
+        引数2 hud：(スコア, 残機, ボスHP, 経過時間, 結果の番号, 品質レベル)
+        引数3 flat：encode_world()が返すスプライトの列
+        """
+        buf = self.shm.buf
+        count = len(flat) // 6
+        if count > self.max_entities:
+            self.dropped += count - self.max_entities
+            count = self.max_entities
+            flat = flat[:count*6]
+        off = self.offset(self.written % 2)
+        seq = struct.unpack_from("<Q", buf, off)[0] + 1  # 奇数：書き込み中
+        struct.pack_into("<Q", buf, off, seq)
+        struct.pack_into(f"<{len(flat)}{ENTITY}", buf, off+SLOT_HEAD.size, *flat)
+        SLOT_HEAD.pack_into(buf, off, seq, tick, time.perf_counter(), *hud, count)
+        struct.pack_into("<Q", buf, off, seq+1)  # 偶数：書き込み完了
+        self.written += 1
+        CONTROL.pack_into(buf, 0, self.written)
+
+    def read(self) -> Snapshot | None:
+        """
+        最新のスナップショットを読み出す（まだ書かれていなければNone）
+        """
+        buf = self.shm.buf
+        while True:
+            written = CONTROL.unpack_from(buf, 0)[0]
+            if written == 0:
+                return None
+            off = self.offset((written-1) % 2)
+            head = SLOT_HEAD.unpack_from(buf, off)
+            if head[0] % 2:  # 書き込み中
+                continue
+            entities = struct.unpack_from(f"<{head[-1]*6}{ENTITY}", buf, off+SLOT_HEAD.size)
+            if struct.unpack_from("<Q", buf, off)[0] == head[0]:
+                return Snapshot(head, entities)
+
+    def close(self, unlink: bool = False):
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def encode_world(world: game.World) -> tuple[tuple, list[int]]:
+    """
+    ゲーム世界をスナップショットの形（HUDの値，スプライトの列）に変換する
+    """
+    flat = []
+    add = flat.extend
+
+    def sprites(kind: int, group, variant):
+        for s in group:
+            x, y = s.rect.topleft
+            px, py = getattr(s, "prev_pos", None) or (x, y)
+            add((kind, variant(s), x, y, px, py))
+
+    bird = world.bird
+    bird_ids = {id(img): i for i, img in enumerate(bird.sprites.values())}
+    sprites(GRAVITY, world.gravity, lambda s: 0)
+    sprites(BIRD, (bird,), lambda s: bird_ids.get(id(s.image), 0))
+    sprites(BEAM, world.beams, lambda s: s.rot_key)
+    sprites(ENEMY, world.emys, lambda s: game.Enemy.imgs.index(s.image))
+    sprites(BOSS, world.boss_mv, lambda s: 0)
+    if world.vector_bombs:  # 配列から直接変換する
+        for kind, bombs, colored in ((BOMB, world.bombs, True), (BOSS_BOMB, world.boss_bomb, False)):
+            n = len(bombs)
+            rad = bombs.rad[:n]
+            for c, r, (x, y), (px, py) in zip(bombs.color[:n].tolist(), rad.tolist(),
+                                               (bombs.pos[:n] - rad[:, None]).round().astype(int).tolist(),
+                                               (bombs.prev[:n] - rad[:, None]).round().astype(int).tolist()):
+                add((kind, c*64 + r if colored else r, x, y, px, py))
+    else:
+        colors = game.Bomb.colors
+        sprites(BOMB, world.bombs, lambda s: colors.index(s.color)*64 + s.radius)
+        sprites(BOSS_BOMB, world.boss_bomb, lambda s: s.radius)
+    exps = world.exps
+    if world.vector_effects:
+        n = len(exps)
+        for f, (x, y) in zip(exps.frame[:n].tolist(), exps.pos[:n].tolist()):
+            add((EXPLOSION, f, x, y, x, y))
+    else:
+        sprites(EXPLOSION, exps, lambda s: 0 if s.image is s.imgs[0] else 1)
+    hud = (world.score.score, world.life.life, world.boss.boss_hp, world.timer.get_elapsed_time(),
+           RESULTS.index(world.result), world.quality.level)
+    return hud, flat
+
+
+class SnapshotPainter:
+    """
+    スナップショットをWorld.draw()と同じ見た目で描くクラス
+    """
+    def __init__(self):
+        self.score = game.Score()
+        self.life = game.Life()
+        self.gameover = game.Gameover()
+        self.timer = game.Timer()
+        self.time_text = game.HudText(self.score.atlas)
+        self.bird_imgs = list(game.Bird.sprite_table(3).values())
+        self.imgs = {}  # (種類, 画像の番号) → 画像
+
+    def image(self, kind: int, variant: int) -> pg.Surface:
+        img = self.imgs.get((kind, variant))
+        if img is None:
+            if kind == GRAVITY:
+                img = game.Gravity.make_image(200)
+            elif kind == BIRD:
+                img = self.bird_imgs[variant]
+            elif kind == BEAM:
+                img = game.Beam.rot_cache.get(variant * game.Beam.rot_cache.step)
+            elif kind == ENEMY:
+                img = game.Enemy.imgs[variant]
+            elif kind == BOSS:
+                img = game.Boss.img
+            elif kind == BOMB:
+                img = ASSETS.circle(variant % 64, game.Bomb.colors[variant // 64])
+            elif kind == BOSS_BOMB:
+                img = ASSETS.circle(variant, game.Boss_bomb.color)
+            else:
+                img = ASSETS.image("explosion" if variant == 0 else "explosion_flip")
+            self.imgs[kind, variant] = img
+        return img
+
+    def draw(self, renderer: Renderer, snap: Snapshot, alpha: float = 1.0):
+        """
+        スナップショットを画面に描く
+        引数3 alpha：直前のティックから現在までの補間の割合
+        """
+        screen = renderer.screen
+        self.timer.elapsed = snap.elapsed
+        game.change_background(screen, self.timer)
+        renderer.set_background(game.bg_imgs_lst[game.bg_img_i])  # 切り替わったらこのフレームで全画面を描き直す
+        renderer.begin()
+        time_text = f"{int(snap.elapsed // 60):02d}:{int(snap.elapsed % 60):02d}"
+        renderer.blit(self.time_text.get(time_text), (32, 100))
+        e = snap.entities
+        image = self.image
+        blits = []
+        for i in range(0, len(e), 6):
+            x, y, px, py = e[i+2:i+6]
+            if alpha < 1.0:
+                x, y = round(px + (x-px)*alpha), round(py + (y-py)*alpha)
+            blits.append((image(e[i], e[i+1]), (x, y)))
+        renderer.cur.extend(screen.blits(blits))
+        self.score.score = snap.score
+        self.life.life = snap.life
+        renderer.mark(self.score.update(screen))
+        renderer.mark(self.life.update(screen))
+
+    def draw_result(self, screen: pg.Surface, snap: Snapshot):
+        """
+        ゲーム終了時の画面を描いて転送する（World.draw_resultと同じ）
+        """
+        e = snap.entities
+        for i in range(0, len(e), 6):
+            if e[i] == BIRD:
+                screen.blit(self.image(BIRD, e[i+1]), e[i+2:i+4])
+        self.score.score = snap.score
+        self.score.update(screen)
+        if snap.result == "gameover":
+            self.life.life = snap.life
+            self.life.update(screen)
+            self.gameover.update(screen)
+        pg.display.update()
+
+
+class SnapshotWorld:
+    """
+    最新のスナップショットをWorldの代わりにSceneManagerへ渡すクラス
+    場面の切替に使う結果とボスの出現，描画だけを持つ
+    """
+    def __init__(self, painter: SnapshotPainter):
+        self.painter = painter
+        self.snap = None  # 今のゲームの最新のスナップショット（Noneならまだ届いていない）
+
+    @property
+    def result(self) -> str | None:
+        return None if self.snap is None else self.snap.result
+
+    @property
+    def boss(self) -> "SnapshotWorld":
+        return self  # SceneManagerはworld.boss.flagでボスの出現を調べる
+
+    @property
+    def flag(self) -> bool:
+        return self.snap is not None and BOSS in self.snap.entities[::6]
+
+    def draw(self, renderer: Renderer, alpha: float = 1.0):
+        if self.snap is None:  # 新しいゲームの最初のスナップショットを待っている
+            renderer.begin()
+        else:
+            self.painter.draw(renderer, self.snap, alpha)
+
+    def draw_result(self, renderer: Renderer):
+        self.painter.draw_result(renderer.screen, self.snap)
+
+
+class SoundCollector:
+    """
+    シミュレーション側でSEの再生要求を集め，描画側に送るためのクラス（AudioManagerの代わり）
+    """
+    def __init__(self):
+        self.keys = []
+        self.per_frame = None
+
+    def play(self, key: str):
+        self.keys.append(key)
+
+
+def simulate(name: str, inputs, sounds, seed: int, stop, realtime: bool = True, scenario: str | None = None):
+    """
+    シミュレーション用プロセスの本体
+    入力を受け取ってティックごとにゲームを進め，スナップショットを書き込む
+    (None, シード)を受け取ると，ゲームをその場で初期化して始める（ゲームの終了後は次の開始まで待つ）
+    引数1 name：SnapshotBufferの共有メモリの名前
+    引数2 inputs：描画側から(押下キーのビット, イベントの符号)または(None, シード)を受け取るキュー
+    引数3 sounds：描画側にSEのキーのリストを送るキュー
+    引数4 seed：シナリオの乱数のシード
+    引数5 stop：描画側が終了を伝えるEvent
+    引数6 realtime：FalseならTICK_RATEに合わせず，できるだけ速く進める（計測用）
+    引数7 scenario：benchmark.pyのシナリオ名（計測用．指定すれば開始を待たずに進める）
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"  # 画面と音はメインプロセスが持つ
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    game.init(loading_screen=False)
+    buf = SnapshotBuffer(name)
+    random.seed(seed)
+    world = game.World()
+    world.audio = SoundCollector()
+    if scenario is not None:
+        import benchmark
+        benchmark.SCENARIOS[scenario][0](world)
+    keys = KeyMask()
+    running = scenario is not None
+    next_tick = time.perf_counter()
+    try:
+        while not stop.is_set():
+            events = []
+            while True:
+                try:
+                    mask, codes = inputs.get_nowait() if running else inputs.get(timeout=0.05)
+                except queue.Empty:
+                    break
+                if mask is None:  # 新しいゲームを始める
+                    random.seed(codes)
+                    world.reset()
+                    world.audio.keys = []
+                    keys, events = KeyMask(), []
+                    running = True
+                    next_tick = time.perf_counter()
+                    continue
+                keys = KeyMask(mask)
+                events += decode_events(codes)
+            if not running:
+                continue
+            result = world.step(keys, events)
+            hud, flat = encode_world(world)
+            buf.write(world.tmr, hud, flat)
+            if world.audio.keys:
+                sounds.put(world.audio.keys)
+                world.audio.keys = []
+            if result is not None:
+                running = False
+                continue
+            if realtime:
+                next_tick += game.DT
+                wait = next_tick - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                elif wait < -game.MAX_FRAME_TIME:  # 大きく遅れたら追いつくのをあきらめる
+                    next_tick = time.perf_counter()
+    finally:
+        buf.close()
+
+
+def start_worker(seed: int = 0, realtime: bool = True, scenario: str | None = None):
+    """
+    シミュレーション用プロセスを起動する
+    戻り値：(プロセス, SnapshotBuffer, 入力キュー, SEキュー, 終了Event)
+    """
+    ctx = mp.get_context("spawn")  # SDLを初期化済みのプロセスをforkしない
+    buf = SnapshotBuffer()
+    inputs, sounds, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+    proc = ctx.Process(target=simulate, args=(buf.name, inputs, sounds, seed, stop, realtime, scenario),
+                       daemon=True)
+    proc.start()
+    return proc, buf, inputs, sounds, stop
+
+
+def stop_worker(proc, buf: SnapshotBuffer, stop):
+    stop.set()
+    proc.join(timeout=2)
+    if proc.is_alive():
+        proc.terminate()
+    buf.close(unlink=True)
+
+
+def main(seed: int | None = None, max_fps: int = 0, full_redraw: bool = False, governor: bool = True):
+    """
+    シミュレーションを別プロセスで行うゲームのメインループ（描画と入力だけを行う）
+    場面はmusou_kokaton.main()と同じくSceneManagerで切り替え，ゲームオーバー・クリア後は
+    シミュレーション用プロセスもそのままで遊び直せる
+    引数1 seed：最初のゲームの乱数のシード（Noneなら時刻から決める）
+    引数2 max_fps：描画の最大fps（0なら上限なし）
+    引数3 full_redraw：Trueなら毎フレーム全画面を描き直す
+    引数4 governor：Trueなら処理時間に応じて品質を自動で下げる
+    """
+    proc, buf, inputs, sounds, stop = start_worker()
+    try:
+        pg.display.set_caption("真！こうかとん無双・改")
+        screen = game.init()
+        view = SnapshotWorld(SnapshotPainter())
+        renderer = Renderer(screen, game.bg_imgs_lst[0], dirty=not full_redraw)
+        scenes = game.SceneManager(view, renderer)
+        audio = game.make_audio()
+        gov = Governor(game.DT) if governor else None
+        clock = pg.time.Clock()
+        pg.mixer.music.set_volume(0.3)
+        pg.mixer.music.load(ASSETS.path("bgm/bgm.wav"))
+        last_mask = None
+        while True:
+            start = time.perf_counter()
+            events = pg.event.get()
+            mask = encode_keys(pg.key.get_pressed())
+            was_playing = scenes.playing()
+            for event in events:
+                if event.type == pg.QUIT:
+                    return
+                action = scenes.handle(event)
+                if action == "quit":
+                    return
+                if action == "start":  # シミュレーション側のゲームをその場で初期化して始める
+                    if seed is None:
+                        seed = time.time_ns() & 0xFFFFFFFF
+                    inputs.put((None, seed))
+                    seed = None  # 2回目以降は時刻から決める
+                    view.snap = None  # 前のゲームのスナップショットは使わない
+                    scenes.enter("playing")
+                    pg.mixer.music.play(-1)
+                    last_mask = None
+                    if gov is not None:  # 今の品質レベルから始める
+                        inputs.put((mask, encode_events([gov.event()])))
+                        last_mask = mask
+            if was_playing and scenes.playing():
+                codes = encode_events(events)
+                if mask != last_mask or codes:  # 変化があったときだけ送る
+                    inputs.put((mask, codes))
+                    last_mask = mask
+                snap = buf.read()
+                # 開始直後は前のゲームの最後（結果つき）が残っているので，新しいゲームのものが届くまで使わない
+                if snap is not None and (view.snap is not None or snap.result is None):
+                    new = view.snap is None or snap.stamp != view.snap.stamp  # 結果の出たティックはtickが進まない
+                    view.snap = snap
+                    if new:
+                        scenes.after_step()
+                    if snap.result is not None:
+                        pg.mixer.music.stop()
+            alpha = 1.0 if view.snap is None else min(1.0, (time.perf_counter() - view.snap.stamp) / game.DT)
+            if scenes.draw(alpha):
+                renderer.present()
+            while True:
+                try:
+                    for key in sounds.get_nowait():
+                        audio.play(key)
+                except queue.Empty:
+                    break
+            audio.flush()
+            if gov is not None and gov.update(time.perf_counter() - start) and scenes.playing():
+                inputs.put((mask, encode_events([gov.event()])))
+                last_mask = mask
+                audio.per_frame = gov.quality.sfx_per_frame
+            clock.tick(max_fps if scenes.playing() else min(max_fps or 60, 60))  # 止まっている画面は60fpsまで
+    finally:
+        stop_worker(proc, buf, stop)
+
+
+def bench(frames: int, scenario: str, seed: int = 0) -> dict:
+    """
+    同じシナリオを単一プロセスと別プロセスで実行し，描画のfps・シミュレーションのティック数/秒・
+    表示までの遅れ（単一プロセスはフレーム時間，別プロセスは表示したスナップショットの古さ）を比べる
+    """
+    from benchmark import SCENARIOS, percentile
+    ms = lambda v: round(v*1000, 3)
+    game.init(loading_screen=False)
+    results = {}
+
+    random.seed(seed)
+    world = game.World(mute=True)
+    setup, inputs = SCENARIOS[scenario]
+    setup(world)
+    renderer = Renderer(game.screen, game.bg_imgs_lst[0])
+    lat = []
+    start = time.perf_counter()
+    for n in range(frames):
+        t = time.perf_counter()
+        key_lst, events = inputs(n)
+        world.step(key_lst, events)
+        world.draw(renderer)
+        renderer.present()
+        lat.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    results["single"] = {"fps": round(frames/elapsed, 1), "ticks_per_s": round(frames/elapsed, 1),
+                         "latency_p50_ms": ms(percentile(lat, 50)), "latency_p95_ms": ms(percentile(lat, 95))}
+
+    proc, buf, q_in, q_snd, stop = start_worker(seed, realtime=False, scenario=scenario)
+    try:
+        painter = SnapshotPainter()
+        renderer = Renderer(game.screen, game.bg_imgs_lst[0])
+        while (snap := buf.read()) is None:
+            time.sleep(0.001)
+        first_tick, lat = snap.tick, []
+        start = time.perf_counter()
+        for n in range(frames):
+            key_lst, events = inputs(n)
+            q_in.put((encode_keys(key_lst), encode_events(events)))
+            snap = buf.read()
+            painter.draw(renderer, snap)
+            renderer.present()
+            lat.append(time.perf_counter() - snap.stamp)
+        elapsed = time.perf_counter() - start
+        results["split"] = {"fps": round(frames/elapsed, 1),
+                            "ticks_per_s": round((buf.read().tick - first_tick)/elapsed, 1),
+                            "latency_p50_ms": ms(percentile(lat, 50)), "latency_p95_ms": ms(percentile(lat, 95))}
+    finally:
+        stop_worker(proc, buf, stop)
+    return {"scenario": scenario, "frames": frames, "cpus": os.cpu_count(), **results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="シミュレーションを別プロセスで行う真！こうかとん無双・改")
+    parser.add_argument("--seed", type=int, help="乱数のシード")
+    parser.add_argument("--max-fps", type=int, default=0, help="描画の最大fps（0なら上限なし）")
+    parser.add_argument("--full-redraw", action="store_true", help="毎フレーム全画面を描き直す")
+    parser.add_argument("--no-governor", action="store_true", help="処理時間に応じた品質の自動調整をしない")
+    parser.add_argument("--bench", type=int, metavar="FRAMES", help="単一プロセスとの比較をFRAMESフレーム分行う")
+    parser.add_argument("--scenario", default="bombs2000", help="比較に使うbenchmark.pyのシナリオ")
+    args = parser.parse_args()
+    if args.bench:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+        print(json.dumps(bench(args.bench, args.scenario, args.seed or 0), ensure_ascii=False, indent=2))
+    else:
+        main(seed=args.seed, max_fps=args.max_fps, full_redraw=args.full_redraw, governor=not args.no_governor)
+    pg.quit()
+    sys.exit()
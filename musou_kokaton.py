@@ -1,3 +1,5 @@
+import argparse
+import bisect
 import math
 import random
 import sys
@@ -5,20 +7,86 @@ import time
 
 import pygame as pg
 
+from assets import ASSETS, RotationCache
+from audio import AudioManager
+from bomb_array import BombArray
+from collision import Collider
+from effects import EffectArray
+from governor import FULL_QUALITY, QUALITY_EVENT, QUALITY_LEVELS, Governor
+from hud import GlyphAtlas, HudText
+from pool import Pooled, SpritePool
+from profiler import FrameProfiler
+from render import Renderer
+from replay import InputLog, InputRecorder
+
 WIDTH = 1600  # ゲームウィンドウの幅
 HEIGHT = 900  # ゲームウィンドウの高さ
 
-# Pygameの初期化と画面設定
-pg.init()
-screen = pg.display.set_mode((WIDTH, HEIGHT))
+TICK_RATE = 50  # ゲームロジックを進める1秒あたりの回数（描画の速さによらず一定）
+DT = 1 / TICK_RATE  # 1ティックの長さ（秒）
+MAX_FRAME_TIME = 0.25  # 描画が止まったときに追いつこうとする最大時間（秒）
+
+# 時間はすべてシミュレーション時間（秒）で表す
+ENEMY_INTERVAL = 4.0  # 敵機の出現間隔
+BOSS_APPEAR_TIME = 20.0  # ボスが出現するまでの時間
+HYPER_TIME = 10.0  # 無敵状態の持続時間
+GRAVITY_TIME = 10.0  # 重力球の持続時間
+GRAVITY_PULL = 300.0  # 重力球が爆弾を引く強さ（中心からの距離で割った値が1ティックの速度の変化，px/tick）
+GRAVITY_REACH = 600  # 重力球の引力が届く中心からの距離（px）
+INVINCIBLE_TIME = 2.0  # ボスの爆弾に当たった後の無敵時間
+EXPLOSION_TIME = 2.0  # 敵機・ボスの爆発時間
+BOMB_EXPLOSION_TIME = 1.0  # 爆弾の爆発時間
+
+BOSS_HP = 50  # ボスのHP
+
+# スコアの節目
+LIFE_UP_SCORE = 300  # この点数ごとに残機が1増える（一度だけ）
+BOUNCE_SCORE = 100  # 爆弾が壁で跳ね返るようになるスコア
+ACCEL_SCORE = 200  # 跳ね返った爆弾が加速するようになるスコア
+BOMB_MAX_SPEED = 30  # 加速する爆弾の速さの上限（無いと画面の幅を1ティックで飛び越えて毎ティック加速し続ける）
+HYPER_COST = 100  # 無敵状態に必要なスコア（これより多く必要）
+GRAVITY_COST = 50  # 重力球に必要なスコア
+
+
+def sec2tick(sec: float) -> int:
+    """
+    シミュレーション時間（秒）をティック数に変換する
+    """
+    return round(sec * TICK_RATE)
+
 
-# 背景画像（朝・夕・夜）の読込みと拡大
-bg_img_morning = pg.transform.scale(pg.image.load("ex05/bg/bg_pattern2_aozora.png").convert(), (WIDTH, HEIGHT))
-bg_img_evening = pg.transform.scale(pg.image.load("ex05/bg/bg_pattern3_yuyake.png").convert(), (WIDTH, HEIGHT))
-bg_img_night = pg.transform.scale(pg.image.load("ex05/bg/bg_pattern4_yoru.png").convert(), (WIDTH, HEIGHT))
+screen = None  # 画面Surface（init()で作る）
+ATLAS_INDEX = "fig/atlas.json"  # スプライト画像のアトラスの索引（atlas_pack.pyで作る）
+startup_seconds = None  # 起動にかかった時間（秒）
 
-# 背景画像をリストに格納
-bg_imgs_lst = [bg_img_morning, bg_img_evening, bg_img_night]
+
+def register_assets():
+    """
+    ゲームで使う画像・音声をすべて登録する（読込みはinit()でまとめて行う）
+    """
+    # 背景画像（朝・夕・夜）は画面サイズに拡大しておく
+    ASSETS.image_spec("bg0", "bg/bg_pattern2_aozora.png", alpha=False, size=(WIDTH, HEIGHT))
+    ASSETS.image_spec("bg1", "bg/bg_pattern3_yuyake.png", alpha=False, size=(WIDTH, HEIGHT))
+    ASSETS.image_spec("bg2", "bg/bg_pattern4_yoru.png", alpha=False, size=(WIDTH, HEIGHT))
+    ASSETS.image_spec("pg_bg", "fig/pg_bg.jpg", alpha=False)
+    for num in range(10):  # こうかとん画像は2倍に拡大しておく
+        ASSETS.image_spec(f"bird{num}", f"fig/{num}.png", zoom=2.0)
+    for num in (3, *Bird.moods):  # 操作するこうかとんと表情の画像は8方向の画像も作っておく
+        Bird.register_dires(num)
+    ASSETS.image_spec("beam", "fig/beam.png")
+    ASSETS.image_spec("explosion", "fig/explosion.gif")
+    ASSETS.image_spec("explosion_flip", src="explosion", flip=(True, True))
+    for i in range(1, 4):
+        ASSETS.image_spec(f"alien{i}", f"fig/alien{i}.png")
+    ASSETS.image_spec("boss", src="alien1", zoom=5.0)  # 通常の敵の五倍の大きさ
+    ASSETS.sound_spec("explosion", "bgm/explosion.wav")
+    ASSETS.sound_spec("beam", "bgm/beam.wav")
+    ASSETS.sound_spec("damage", "bgm/damage.wav")
+    ASSETS.sound_spec("gravity", "bgm/gravity.wav")
+
+
+# 背景画像（朝・夕・夜）を格納するリスト（init()で読み込む）
+bg_imgs_lst = []
 
 # 表示する背景画像の番号（0:朝 1:夕 2:夜）
 bg_img_i = 0
@@ -63,6 +131,8 @@ class Bird(pg.sprite.Sprite):
         pg.K_LEFT: (-1, 0),
         pg.K_RIGHT: (+1, 0),
     }
+    moods = {6: "joy", 8: "sad"}  # こうかとん画像の番号 → 表情の状態
+    tables = {}  # こうかとん画像の番号 → 状態×方向の画像の表
 
     def __init__(self, num: int, xy: tuple[int, int]):
         """
@@ -71,18 +141,8 @@ class Bird(pg.sprite.Sprite):
         引数2 xy：こうかとん画像の位置座標タプル
         """
         super().__init__()
-        img0 = pg.transform.rotozoom(pg.image.load(f"ex05/fig/{num}.png"), 0, 2.0)
-        img = pg.transform.flip(img0, True, False)  # デフォルトのこうかとん
-        self.imgs = {
-            (+1, 0): img,  # 右
-            (+1, -1): pg.transform.rotozoom(img, 45, 1.0),  # 右上
-            (0, -1): pg.transform.rotozoom(img, 90, 1.0),  # 上
-            (-1, -1): pg.transform.rotozoom(img0, -45, 1.0),  # 左上
-            (-1, 0): img0,  # 左
-            (-1, +1): pg.transform.rotozoom(img0, 45, 1.0),  # 左下
-            (0, +1): pg.transform.rotozoom(img, -90, 1.0),  # 下
-            (+1, +1): pg.transform.rotozoom(img, -45, 1.0),  # 右下
-        }
+        self.sprites = __class__.sprite_table(num)
+        self.imgs = {dire: img for (state, dire), img in self.sprites.items() if state == "normal"}
         self.dire = (+1, 0)
         self.image = self.imgs[self.dire]
         self.rect = self.image.get_rect()
@@ -91,14 +151,74 @@ class Bird(pg.sprite.Sprite):
         self.state = "normal"
         self.hyper_life = -1
 
-    def change_img(self, num: int, screen: pg.Surface):
+    dire_keys = {  # 向き → 画像のキーの接尾辞（左向きは元の画像）
+        (+1, 0): "_r",  # 右
+        (+1, -1): "_ru",  # 右上
+        (0, -1): "_u",  # 上
+        (-1, -1): "_lu",  # 左上
+        (-1, 0): "",  # 左
+        (-1, +1): "_ld",  # 左下
+        (0, +1): "_d",  # 下
+        (+1, +1): "_rd",  # 右下
+    }
+
+    @staticmethod
+    def register_dires(num: int):
         """
-        こうかとん画像を切り替え，画面に転送する
-        引数1 num：こうかとん画像ファイル名の番号
-        引数2 screen：画面Surface
+        左向きのこうかとん画像から8方向の画像を作る読込み方法を登録する
+        引数 num：こうかとん画像ファイル名の番号
         """
-        self.image = pg.transform.rotozoom(pg.image.load(f"ex05/fig/{num}.png"), 0, 2.0)
-        screen.blit(self.image, self.rect)
+        base = f"bird{num}"
+        ASSETS.image_spec(f"{base}_r", src=base, flip=(True, False))  # デフォルトのこうかとん
+        ASSETS.image_spec(f"{base}_ru", src=f"{base}_r", angle=45)
+        ASSETS.image_spec(f"{base}_u", src=f"{base}_r", angle=90)
+        ASSETS.image_spec(f"{base}_lu", src=base, angle=-45)
+        ASSETS.image_spec(f"{base}_ld", src=base, angle=45)
+        ASSETS.image_spec(f"{base}_d", src=f"{base}_r", angle=-90)
+        ASSETS.image_spec(f"{base}_rd", src=f"{base}_r", angle=-45)
+
+    @classmethod
+    def dire_imgs(cls, num: int) -> dict[tuple[int, int], pg.Surface]:
+        """
+        こうかとん画像numの8方向の画像の辞書を作る（未登録の番号はここで登録する）
+        """
+        if f"bird{num}_r" not in ASSETS.image_specs:
+            cls.register_dires(num)
+        return {dire: ASSETS.image(f"bird{num}{suffix}") for dire, suffix in cls.dire_keys.items()}
+
+    @classmethod
+    def sprite_table(cls, num: int) -> dict[tuple[str, tuple[int, int]], pg.Surface]:
+        """
+        通常・hyper・喜び・悲しみの状態と8方向の組から画像を引く表を作る（番号ごとに一度だけ）
+        hyperの画像は通常の画像にラプラシアンフィルタをかけたもの
+        引数 num：通常時のこうかとん画像ファイル名の番号
+        """
+        table = cls.tables.get(num)
+        if table is None:
+            table = {}
+            for dire, img in cls.dire_imgs(num).items():
+                table["normal", dire] = img
+                table["hyper", dire] = pg.transform.laplacian(img)
+            for mood_num, mood in cls.moods.items():
+                for dire, img in cls.dire_imgs(mood_num).items():
+                    table[mood, dire] = img
+            cls.tables[num] = table
+        return table
+
+    def change_img(self, num: int, screen: pg.Surface | None = None):
+        """
+        こうかとん画像を今の向きの表情の画像に切り替え，画面に転送する
+        引数1 num：こうかとん画像ファイル名の番号（6：喜び，8：悲しみ）
+        引数2 screen：画面Surface（Noneなら転送しない）
+        戻り値：描画した矩形
+        """
+        mood = __class__.moods.get(num)
+        if mood is not None:
+            self.image = self.sprites[mood, self.dire]
+        else:
+            self.image = ASSETS.image(f"bird{num}")
+        if screen is not None:
+            return screen.blit(self.image, self.rect)
     
     def change_state(self, state: str, hyper_life: int):    # 追加機能3
         """
@@ -111,11 +231,12 @@ class Bird(pg.sprite.Sprite):
         if (hyper_life >= 0):
             hyper_life -= 1
 
-    def update(self, key_lst: list[bool], screen: pg.Surface):
+    def update(self, key_lst: list[bool], screen: pg.Surface | None = None):
         """
         押下キーに応じてこうかとんを移動させる
         引数1 key_lst：押下キーの真理値リスト
-        引数2 screen：画面Surface
+        引数2 screen：画面Surface（Noneなら転送しない）
+        戻り値：描画した矩形
         """
         sum_mv = [0, 0]
         for k, mv in __class__.delta.items():
@@ -131,21 +252,30 @@ class Bird(pg.sprite.Sprite):
             self.dire = tuple(sum_mv)
             self.image = self.imgs[self.dire]
         if (self.state == "hyper"): # 追加機能3
-            self.image = pg.transform.laplacian(self.image)
+            self.image = self.sprites["hyper", self.dire]
             self.hyper_life -= 1
         if (self.hyper_life < 0):
             self.change_state("normal", -1)
-        screen.blit(self.image, self.rect)
+        if screen is not None:
+            return screen.blit(self.image, self.rect)
     
     def get_direction(self) -> tuple[int, int]:
         return self.dire
+
+    @staticmethod
+    def delta_dires() -> list[tuple[int, int]]:
+        """
+        こうかとんが向きうる8方向の一覧を返す
+        """
+        return [(x, y) for x in (-1, 0, +1) for y in (-1, 0, +1) if (x, y) != (0, 0)]
     
 
-class Bomb(pg.sprite.Sprite):
+class Bomb(Pooled, pg.sprite.Sprite):
     """
     爆弾に関するクラス
     """
     colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255)]
+    rads = range(10, 51)  # 爆弾円の半径の取りうる値
 
     def __init__(self, emy: "Enemy", bird: Bird):
         """
@@ -154,41 +284,51 @@ class Bomb(pg.sprite.Sprite):
         引数2 bird：攻撃対象のこうかとん
         """
         super().__init__()
+        self.reset(emy, bird)
+
+    def reset(self, emy: "Enemy", bird: Bird):
+        """
+        爆弾の状態を初期化する（プールから使い回すときにも呼ばれる）
+        引数1 emy：爆弾を投下する敵機
+        引数2 bird：攻撃対象のこうかとん
+        """
         rad = random.randint(10, 50)  # 爆弾円の半径：10以上50以下の乱数
         color = random.choice(__class__.colors)  # 爆弾円の色：クラス変数からランダム選択
-        self.image = pg.Surface((2*rad, 2*rad))
-        pg.draw.circle(self.image, color, (rad, rad), rad)
-        self.image.set_colorkey((0, 0, 0))
+        self.image = ASSETS.circle(rad, color)  # 描画済みの円を使い回す
         self.rect = self.image.get_rect()
+        self.radius = rad  # 当たり判定用の半径
+        self.color = color
         # 爆弾を投下するemyから見た攻撃対象のbirdの方向を計算
         self.vx, self.vy = calc_orientation(emy.rect, bird.rect)  
         self.rect.centerx = emy.rect.centerx
         self.rect.centery = emy.rect.centery+emy.rect.height/2
         self.speed = 6
 
-    def update(self, score):
+    def update(self, tier):
         """
         爆弾を速度ベクトルself.vx, self.vyに基づき移動させる
-        引数 screen：画面Surface
+        引数 tier：スコアによる爆弾の段階（0：壁で消える，1：跳ね返る，2：跳ね返って加速する）
         """
         self.rect.move_ip(+self.speed*self.vx, +self.speed*self.vy)
         yoko, tate = check_bound(self.rect)
         if (yoko, tate) != (True, True):
-            if (score < 100):    # スコアが100以下の時、壁に当たると消える
+            if (tier == 0):    # スコアが100未満の時、壁に当たると消える
                 self.kill()
-            if (score >= 100):   # スコアが100以上の時、壁で跳ね返る
+            if (tier >= 1):   # スコアが100以上の時、壁で跳ね返る
                 if not yoko:
                     self.vx *= -1
                 if not tate:
                     self.vy *= -1
-            if (score >= 200):   # スコアが200以上の時、速さが1.15倍される
-                self.speed *= 1.15
+            if (tier >= 2):   # スコアが200以上の時、速さが1.15倍される（BOMB_MAX_SPEEDまで）
+                self.speed = min(self.speed*1.15, BOMB_MAX_SPEED)
 
 
-class Beam(pg.sprite.Sprite):
+class Beam(Pooled, pg.sprite.Sprite):
     """
     ビームに関するクラス
     """
+    rot_cache = None  # 角度ごとの回転済みビーム画像（RotationCache，setup_sprites()で作る）
+
     def __init__(self, bird: Bird, angle0: float=0.0):
         """
         ビーム画像Surfaceを生成する
@@ -196,9 +336,18 @@ class Beam(pg.sprite.Sprite):
         引数 angle0 ビームの回転角度
         """
         super().__init__()
+        self.reset(bird, angle0)
+
+    def reset(self, bird: Bird, angle0: float=0.0):
+        """
+        ビームの状態を初期化する（プールから使い回すときにも呼ばれる）
+        引数 bird：ビームを放つこうかとん
+        引数 angle0 ビームの回転角度
+        """
         self.vx, self.vy = bird.get_direction()
         angle = math.degrees(math.atan2(-self.vy, self.vx)) + angle0
-        self.image = pg.transform.rotozoom(pg.image.load(f"ex05/fig/beam.png"), angle, 2.0)
+        self.image = __class__.rot_cache.get(angle)
+        self.rot_key = __class__.rot_cache.key(angle)  # 回転画像のキー（描画だけ別プロセスで行うとき用）
         self.vx = math.cos(math.radians(angle))
         self.vy = -math.sin(math.radians(angle))
         self.rect = self.image.get_rect()
@@ -232,11 +381,32 @@ class NeoBeam:
         ビームを-50°~+51°の間で角度をつける
         リストbeamsに入れてリストbeamsを返す
         """
-        for angle in range(-50, +51, int(100/(self.num-1))):
-            self.beams.append(Beam(self.bird, angle))
+        for angle in __class__.offsets(self.num):
+            self.beams.append(Beam.pool.acquire(self.bird, angle))
         return self.beams
 
-class Explosion(pg.sprite.Sprite):
+    @staticmethod
+    def offsets(num: int) -> range:
+        """
+        num本のビームを撃つときの角度の一覧を返す
+        """
+        return range(-50, +51, int(100/(num-1)))
+
+
+def warm_beam_cache(nums: tuple[int, ...] = (5,)):
+    """
+    こうかとんの8方向×NeoBeamの角度の組み合わせについて，ビームの回転画像を先に作っておく
+    引数 nums：想定するNeoBeamのビーム数
+    """
+    angles = set()
+    for vx, vy in Bird.delta_dires():
+        base = math.degrees(math.atan2(-vy, vx))
+        angles.add(base)
+        for num in nums:
+            angles.update(base + a for a in NeoBeam.offsets(num))
+    Beam.rot_cache.warm(angles)
+
+class Explosion(Pooled, pg.sprite.Sprite):
     """
     爆発に関するクラス
     """
@@ -247,8 +417,15 @@ class Explosion(pg.sprite.Sprite):
         引数2 life：爆発時間
         """
         super().__init__()
-        img = pg.image.load("ex05/fig/explosion.gif")
-        self.imgs = [img, pg.transform.flip(img, 1, 1)]
+        self.reset(obj, life)
+
+    def reset(self, obj: "Bomb|Enemy", life: int):
+        """
+        爆発の状態を初期化する（プールから使い回すときにも呼ばれる）
+        引数1 obj：爆発するBombまたは敵機インスタンス
+        引数2 life：爆発時間
+        """
+        self.imgs = [ASSETS.image("explosion"), ASSETS.image("explosion_flip")]
         self.image = self.imgs[0]
         self.rect = self.image.get_rect(center=obj.rect.center)
         self.life = life
@@ -268,7 +445,7 @@ class Enemy(pg.sprite.Sprite):
     """
     敵機に関するクラス
     """
-    imgs = [pg.image.load(f"ex05/fig/alien{i}.png") for i in range(1, 4)]
+    imgs = []  # 敵機の画像（setup_sprites()で読み込む）
     
     def __init__(self):
         super().__init__()
@@ -297,12 +474,12 @@ class Boss(pg.sprite.Sprite):
     """
     ボスに関するクラス
     """
-    img = pg.transform.rotozoom(pg.image.load(f"ex05/fig/alien{1}.png"),0,5.0)#通常の敵の五倍の大きさ
+    img = None  # 通常の敵の五倍の大きさの画像（setup_sprites()で読み込む）
     
     def __init__(self):
         super().__init__()
         self.flag=0#場に一体だけ出現させるためのフラグ
-        self.boss_hp=50#ボスのＨＰ
+        self.boss_hp=BOSS_HP#ボスのＨＰ
         self.rect = self.img.get_rect()
         self.rect.center = WIDTH/2, 20
         self.image =__class__.img
@@ -328,10 +505,11 @@ class Boss(pg.sprite.Sprite):
         self.rect.centery += self.vy
 
 
-class Boss_bomb(pg.sprite.Sprite):
+class Boss_bomb(Pooled, pg.sprite.Sprite):
     """
     ボスが投下する爆弾に関するクラス
     """
+    color = (0,0,1)  # (0,0,0)だと透過してしまうため(0,0,1)
     def __init__(self, boss: "Boss", bird: Bird):
         """
         爆弾円Surfaceを生成する
@@ -339,40 +517,56 @@ class Boss_bomb(pg.sprite.Sprite):
         引数2 bird：攻撃対象のこうかとん
         """
         super().__init__()
+        self.reset(boss, bird)
+
+    def reset(self, boss: "Boss", bird: Bird):
+        """
+        爆弾の状態を初期化する（プールから使い回すときにも呼ばれる）
+        引数1 boss：爆弾を投下する敵機ボス
+        引数2 bird：攻撃対象のこうかとん
+        """
           # 爆弾円の半径：10以上50以下の乱数
         rads =random.randint(10,50)
-        color = (0,0,1)  # 爆弾円の色：黒
-        self.image = pg.Surface((2*rads, 2*rads))
-        pg.draw.circle(self.image, color, (rads, rads), rads)
-        self.image.set_colorkey((0, 0, 0))
+        color = __class__.color  # 爆弾円の色：黒
+        self.image = ASSETS.circle(rads, color)  # 描画済みの円を使い回す
         self.rect = self.image.get_rect()
+        self.radius = rads  # 当たり判定用の半径
         # 爆弾を投下するボスから見た攻撃対象のbirdの方向を計算
         self.vx, self.vy = calc_orientation(boss.rect, bird.rect)  
         self.rect.centerx = boss.rect.centerx+random.randrange(-200,200)
         self.rect.centery = boss.rect.centery+boss.rect.height/2
         self.speed = random.randint(2,10)#爆弾の速度を２～１０の乱数でランダムに設定
 
-    def update(self):
+    def update(self, tier: int = 0):
         """
-        爆弾を速度ベクトルself.vx, self.vyに基づき移動させる
-        引数 screen：画面Surface
+        爆弾を速度ベクトルself.vx, self.vyに基づき移動させ，画面外に出たら消す
+        引数 tier：使わない（BombArray.updateと同じ呼び方にするため）
         """
         self.rect.move_ip(+self.speed*self.vx, +self.speed*self.vy)
         if check_bound(self.rect) != (True, True):
             self.kill()
 
 
+# 爆弾・ビーム・爆発はkill()されるとプールに戻り，次の生成で使い回される
+Bomb.pool = SpritePool(Bomb)
+Beam.pool = SpritePool(Beam)
+Explosion.pool = SpritePool(Explosion)
+Boss_bomb.pool = SpritePool(Boss_bomb)
+
+
+def prerender_bombs():
+    """
+    爆弾とボスの爆弾で使う半径×色の円Surfaceをすべて描いておく
+    """
+    ASSETS.prerender_circles(Bomb.rads, Bomb.colors + [Boss_bomb.color])
+
+
 class Gravity(pg.sprite.Sprite):
     """
     重力球を発生させるクラス
+    こうかとんと一緒に動き，触れた爆弾を消す
+    GRAVITY_REACHの範囲の爆弾を距離に反比例する強さで引き寄せる（World.update）
     """
-    delta = {  # 押下キーと移動量の辞書
-        pg.K_UP: (0, -1),
-        pg.K_DOWN: (0, +1),
-        pg.K_LEFT: (-1, 0),
-        pg.K_RIGHT: (+1, 0),
-    }
-
     def __init__(self,bird:Bird,life:int):
         """
         引数１：発生対象のこうかとんbird
@@ -380,31 +574,63 @@ class Gravity(pg.sprite.Sprite):
         """
         super().__init__()
         rad = 200
-        color = (1,0,0)#(0,0,0)だと透過してしまうため(1,0,0)
-        self.image = pg.Surface((2*rad, 2*rad))
-        pg.draw.circle(self.image, color, (rad, rad), rad)
-        self.image.set_alpha(100)
+        self.image = __class__.make_image(rad)
         self.rect = self.image.get_rect()
-        self.image.set_colorkey((0, 0, 0))
+        self.radius = rad  # 当たり判定用の半径
         self.rect.center = bird.rect.center#中心,速度をこうかとんと合わせる
+        self.bird = bird
         self.life = life
-        self.speed = 10
 
-    def update(self, key_lst: list[bool], screen: pg.Surface):
+    @staticmethod
+    def make_image(rad: int) -> pg.Surface:
+        """
+        半径radの半透明の重力球の画像を作る
+        """
+        color = (1,0,0)#(0,0,0)だと透過してしまうため(1,0,0)
+        image = pg.Surface((2*rad, 2*rad))
+        pg.draw.circle(image, color, (rad, rad), rad)
+        image.set_alpha(100)
+        image.set_colorkey((0, 0, 0))
+        return image
+
+    @staticmethod
+    def pull(bombs, wells: list[tuple[int, int]], strength: float, reach: float):
+        """
+        爆弾のスプライトをBombArray.attract()と同じ計算で重力球の中心wellsに引き寄せる
+        （BombArrayを使うときと同じ結果になるよう，計算の順番と丸めを揃える）
+        """
+        for b in bombs:
+            cx, cy = b.rect.center
+            near = False
+            ax = ay = None  # 引力の合計（BombArrayと同じく届かない重力球の分は0として足す）
+            for wx, wy in wells:
+                dx, dy = wx-cx, wy-cy
+                dist = math.sqrt(dx*dx + dy*dy)
+                pull = 0.0
+                if 0 < dist < reach:
+                    pull = strength / (dist*dist)
+                    near = True
+                ax = dx*pull if ax is None else ax + dx*pull
+                ay = dy*pull if ay is None else ay + dy*pull
+            if not near:
+                continue
+            vx, vy = b.vx*b.speed + ax, b.vy*b.speed + ay
+            speed = math.sqrt(vx*vx + vy*vy)
+            if speed > 0:
+                b.vx, b.vy = vx/speed, vy/speed
+            b.speed = speed
+
+    def update(self, key_lst: list[bool], screen: pg.Surface | None = None):
         """
         lifeが０になった場合は消滅する
-        こうかとんの移動に追従する
+        こうかとんの移動に追従する（こうかとんを動かした後に呼ぶ）
         """
         self.life -= 1
         if self.life < 0:
             self.kill()
-        sum_mv = [0, 0]
-        for k, mv in __class__.delta.items():
-            if key_lst[k]:
-                self.rect.move_ip(+self.speed*mv[0], +self.speed*mv[1])
-                sum_mv[0] += mv[0]
-                sum_mv[1] += mv[1]  
-        screen.blit(self.image, self.rect)
+        self.rect.center = self.bird.rect.center
+        if screen is not None:
+            screen.blit(self.image, self.rect)
     
 class Life:
     """
@@ -414,18 +640,22 @@ class Life:
         self.font = pg.font.Font(None, 50)  
         self.color = (255,255, 0) 
         self.life = 3  # 初期の残機
-        self.image = self.font.render(f"LIFE: {self.life}", 0, self.color)
+        self.text = HudText(GlyphAtlas(self.font, self.color), "LIFE: ")  # 残機が変わったときだけ描き直す
+        self.image = self.text.get(self.life)
         self.rect = self.image.get_rect()
         self.rect.center = 90, HEIGHT-100
 
+    def reset(self):
+        self.life = 3
+
     def life_up(self):  # 残機が1増える 
         self.life += 1
     def life_down(self):    # 残機が1減る
         self.life -= 1
     
-    def update(self, screen: pg.Surface):
-        self.image = self.font.render(f"LIFE: {self.life}", 0, self.color)
-        screen.blit(self.image, self.rect)
+    def update(self, screen: "pg.Surface | Renderer"):
+        self.image = self.text.get(self.life)
+        return screen.blit(self.image, self.rect)
 
 
 class Gameover:
@@ -439,8 +669,7 @@ class Gameover:
         self.rect = self.image.get_rect()
         self.rect.center = WIDTH/2, HEIGHT/2
 
-    def update(self, screen: pg.Surface):
-        self.image = self.font.render("GAME OVER",0, self.color)
+    def update(self, screen: "pg.Surface | Renderer"):
         screen.blit(self.image, self.rect)
 
 
@@ -455,32 +684,102 @@ class Score:
     def __init__(self):
         self.font = pg.font.Font(None, 50)
         self.color = (0, 0, 255)
-        self.score = 0
-        self.image = self.font.render(f"Score: {self.score}", 0, self.color)
+        self.reset()
+        self.atlas = GlyphAtlas(self.font, self.color)  # 数字の文字画像（経過時間の表示にも使う）
+        self.text = HudText(self.atlas, "Score: ")  # スコアが変わったときだけ描き直す
+        self.image = self.text.get(self.score)
         self.rect = self.image.get_rect()
         self.rect.center = 100, HEIGHT-50
 
+    def reset(self):
+        """
+        スコアを0に戻し，登録した節目もすべて消す
+        """
+        self.score = 0
+        self.marks = []  # 節目のスコア（昇順）
+        self.mark_calls = []  # 節目ごとに呼ぶ関数
+        self.mark_i = 0  # 現在のスコア以下の節目の数
+        self.every_rules = []  # [間隔, 次に呼ぶスコア, 関数]
+        self.flags = {}  # 名前 → スコアが節目以上か
+
     def score_up(self, add):
-        self.score += add
+        self.set(self.score + add)
 
     def score_down(self,down):
-        self.score -= down
+        self.set(self.score - down)
 
-    def update(self, screen: pg.Surface):
-        self.image = self.font.render(f"Score: {self.score}", 0, self.color)
-        screen.blit(self.image, self.rect)
+    def set(self, score: int):
+        """
+        スコアを変更し，越えた節目の関数を呼ぶ
+        節目の数によらず，呼ぶのは実際に越えた節目の分だけ
+        """
+        old, self.score = self.score, score
+        marks, calls = self.marks, self.mark_calls
+        while self.mark_i < len(marks) and score >= marks[self.mark_i]:  # 上向きに越えた節目
+            calls[self.mark_i](True)
+            self.mark_i += 1
+        while self.mark_i > 0 and score < marks[self.mark_i-1]:  # 下向きに越えた節目
+            self.mark_i -= 1
+            calls[self.mark_i](False)
+        if score > old:
+            for rule in self.every_rules:
+                step, func = rule[0], rule[2]
+                while score >= rule[1]:  # 初めて達した倍数ごとに1回だけ呼ぶ
+                    rule[1] += step
+                    func()
+
+    def on_cross(self, threshold: int, func):
+        """
+        スコアがthresholdを越えたときに呼ぶ関数を登録する
+        引数1 threshold：節目のスコア
+        引数2 func：上向き（threshold以上になった）ならTrue，下向きならFalseを引数に呼ばれる関数
+        """
+        i = bisect.bisect_right(self.marks, threshold)
+        self.marks.insert(i, threshold)
+        self.mark_calls.insert(i, func)
+        if self.score >= threshold:  # 既に越えている節目は越えたものとして扱う
+            self.mark_i += 1
+
+    def every(self, step: int, func):
+        """
+        スコアがstepの倍数に初めて達するたびに呼ぶ関数を登録する（スコアが下がって再び達しても呼ばない）
+        """
+        self.every_rules.append([step, (self.score//step + 1) * step, func])
+
+    def flag(self, name: str, threshold: int):
+        """
+        スコアがthreshold以上かどうかをflags[name]に保つ
+        """
+        def set_flag(up: bool):
+            self.flags[name] = up
+        self.flags[name] = self.score >= threshold
+        self.on_cross(threshold, set_flag)
+
+    def update(self, screen: "pg.Surface | Renderer"):
+        """
+        スコアの文字画像を更新して描く（Rendererを渡すと内部解像度に合わせて描き，矩形を記録する）
+        """
+        self.image = self.text.get(self.score)
+        return screen.blit(self.image, self.rect)
 
 
 class Timer:
     """
-    プログラム開始からの経過時間を計算するクラス
+    ゲーム開始からの経過時間（シミュレーション時間）を計算するクラス
     """
     def __init__(self):
-        self.start_time = time.time()
+        self.elapsed = 0.0
+
+    def reset(self):
+        self.elapsed = 0.0
+
+    # ティックごとに経過時間を進める
+    def advance(self, dt: float):
+        self.elapsed += dt
 
     # 経過時間を計算
     def get_elapsed_time(self):
-        return time.time() - self.start_time
+        return self.elapsed
 
 
 def change_background(screen: pg.Surface, timer: Timer):
@@ -514,203 +813,759 @@ def change_background(screen: pg.Surface, timer: Timer):
         bg_img_i = 2
 
 
-def main():
-    pg.display.set_caption("真！こうかとん無双・改")
-    screen = pg.display.set_mode((WIDTH, HEIGHT))
-    bg_img = pg.image.load("ex05/fig/pg_bg.jpg")
-    score = Score()
-    life = Life()
-    gameover = Gameover()
-    boss=Boss()
-    bird = Bird(3, (900, 400))
-    bombs = pg.sprite.Group()
-    beams = pg.sprite.Group()
-    exps = pg.sprite.Group()
-    emys = pg.sprite.Group()
-    gravity = pg.sprite.Group()
-    boss_mv = pg.sprite.Group()
-    boss_bomb = pg.sprite.Group()
-    tmr = 0
-    clock = pg.time.Clock()
-    
-    # プログラム開始からの経過時間を初期化する
-    timer = Timer()
-    e_kill = pg.mixer.Sound("ex05/bgm/explosion.wav")  # 爆発SE
-    b_beam = pg.mixer.Sound("ex05/bgm/beam.wav")  #ビームSE
-    b_damame = pg.mixer.Sound("ex05/bgm/damage.wav")  # ダメージSE
-    gravity_bgm = pg.mixer.Sound("ex05/bgm/gravity.wav")  # 重力球SE
-    zankiup = [n * 300 for n in range(1, 999)]  # 残機が増えるか比較するためのリスト
-    pg.mixer.music.set_volume(0.3)  # 音量
-    pg.mixer.music.load("ex05/bgm/bgm.wav")  # 背景bgmを読み込み
-    pg.mixer.music.play(-1)  # 背景bgmを無限ループで再生
-    boss_bomb_tf = False # ***boss_bombのfor文付近を参照***
-    now_time = 0
-    while True:
-        key_lst = pg.key.get_pressed()
-        for event in pg.event.get():
-            if event.type == pg.QUIT:
-                return 0
-            if event.type == pg.KEYDOWN and event.key == pg.K_SPACE:
-                beams.add(Beam(bird))
-                b_beam.play()  # ビームSEの呼び出し
-            if (tmr)>=1000:#ボスは1000ｆ後に出現
-                if boss.flag ==0:#複数体出現するのを阻止
-                    boss_mv.add(Boss())
-                    boss.flag+=1
-
-                    
-            if event.type == pg.KEYDOWN and event.key == pg.K_RSHIFT:   # 追加機能3
-                if (score.score > 100):
-                    bird.change_state("hyper", 500)
-                    score.score_up(-100)
-            if event.type == pg.KEYDOWN and event.key == pg.K_TAB :#Tabキーで重力球の展開
-                if score.score>=50:#スコアが５０未満の時は発動しない
-                    gravity.add(Gravity(bird,500))#重力球の展開
-                    score.score_down(50)#50点消費する
-                    gravity_bgm.play()  # 重力球SEの呼び出し
-            if event.type == pg.KEYDOWN and event.key == pg.K_LSHIFT:
-                bird.speed = 20
+def setup_sprites():
+    """
+    読み込んだアセットをスプライトのクラスや背景画像のリストに設定し，回転画像や円を作っておく
+    """
+    bg_imgs_lst[:] = [ASSETS.image(f"bg{i}") for i in range(3)]
+    Enemy.imgs = [ASSETS.image(f"alien{i}") for i in range(1, 4)]
+    Boss.img = ASSETS.image("boss")
+    Beam.rot_cache = RotationCache(ASSETS.image("beam"), zoom=2.0)
+    warm_beam_cache()
+    prerender_bombs()
+
+
+def make_audio() -> AudioManager:
+    """
+    SEを優先度付きでAudioManagerに登録して返す
+    """
+    audio = AudioManager()
+    audio.register("damage", ASSETS.sound("damage"), priority=3)  # ダメージSE
+    audio.register("gravity", ASSETS.sound("gravity"), priority=2)  # 重力球SE
+    audio.register("explosion", ASSETS.sound("explosion"), priority=1)  # 爆発SE
+    audio.register("beam", ASSETS.sound("beam"), priority=0)  # ビームSE
+    return audio
+
+
+def draw_loading(screen: pg.Surface, font: pg.font.Font, progress: float):
+    """
+    読込み中の画面（文字と進み具合のバー）を描いて転送する
+    """
+    w, h = screen.get_size()  # 内部解像度で描く
+    screen.fill((0, 0, 0))
+    text = font.render(f"Now Loading... {int(progress*100)}%", True, (255, 255, 255))
+    screen.blit(text, text.get_rect(center=(w/2, h/2-40)))
+    pg.draw.rect(screen, (255, 255, 255), (w/4, h/2, w/2, 20), 2)
+    pg.draw.rect(screen, (255, 255, 255), (w/4, h/2, w/2*progress, 20))
+    pg.display.update()
+
+
+def set_resolution(size: tuple[int, int] | None = None) -> pg.Surface:
+    """
+    画面を内部解像度sizeで作り直し，画面Surfaceを返す
+    論理座標（WIDTH×HEIGHT）と違う大きさなら，pg.SCALEDでウィンドウに合わせて拡大して表示する
+    引数 size：内部解像度（Noneなら論理座標と同じ大きさ）
+    """
+    global screen
+    if size is None or tuple(size) == (WIDTH, HEIGHT):
+        screen = pg.display.set_mode((WIDTH, HEIGHT))
+    else:
+        try:
+            screen = pg.display.set_mode(size, pg.SCALED)
+        except pg.error:  # 拡大表示できない環境（ダミードライバなど）では内部解像度のウィンドウにする
+            screen = pg.display.set_mode(size)
+    return screen
+
+
+def render_scale() -> float:
+    """
+    内部解像度の論理座標に対する倍率を返す（Rendererのscaleに渡す）
+    """
+    return screen.get_width() / WIDTH
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    """
+    "800x450"の形の文字列を(幅, 高さ)に変換する
+    """
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def init(loading_screen: bool = True, resolution: tuple[int, int] | None = None) -> pg.Surface:
+    """
+    pygameの初期化，画面の作成，アセットの読込みを行い，画面Surfaceを返す（2回目以降は何もしない）
+    画像の読込みと拡大縮小はバックグラウンドのスレッドで行い，その間は読込み中の画面を表示する
+    引数1 loading_screen：Falseなら読込み中の画面を表示せずに待つ
+    引数2 resolution：描画する内部解像度（Noneなら論理座標と同じWIDTH×HEIGHT）
+    """
+    global screen, startup_seconds
+    if screen is not None:
+        return screen
+    start = time.perf_counter()
+    pg.init()
+    set_resolution(resolution)
+    register_assets()
+    ASSETS.use_atlas(ATLAS_INDEX)
+    ASSETS.load_in_background()
+    if loading_screen:
+        font = pg.font.Font(None, 60)
+        while ASSETS.loading():
+            pg.event.pump()
+            draw_loading(screen, font, ASSETS.progress())
+            pg.time.wait(15)
+    ASSETS.finish()
+    setup_sprites()
+    startup_seconds = time.perf_counter() - start
+    return screen
+
+
+class World:
+    """
+    ゲーム世界（こうかとん・敵機・爆弾などのグループ，スコア，残機，経過フレーム）をまとめたクラス
+    step()で1フレーム分のゲームを進め，draw()で画面に描く
+    """
+    def __init__(self, mute: bool = False, vector_bombs: bool | None = None, vector_effects: bool | None = None):
+        """
+        引数1 mute：TrueならSEを鳴らさない
+        引数2 vector_bombs：Trueなら爆弾をBombArrayでまとめて処理する（Noneならnumpyがあれば使う）
+        引数3 vector_effects：Trueなら爆発をEffectArrayでまとめて処理する（Noneならnumpyがあれば使う）
+        """
+        self.mute = mute
+        self.audio = None  # SEの再生を管理するAudioManager（Noneなら直接鳴らす）
+        self.score = Score()
+        self.life = Life()
+        self.gameover = Gameover()
+        if vector_bombs is None:
+            vector_bombs = BombArray.available()
+        self.vector_bombs = vector_bombs
+        if vector_bombs:
+            self.bombs = BombArray(Bomb.colors, WIDTH, HEIGHT, max_speed=BOMB_MAX_SPEED)
+            self.boss_bomb = BombArray([Boss_bomb.color], WIDTH, HEIGHT)
+        else:
+            self.bombs = pg.sprite.Group()
+            self.boss_bomb = pg.sprite.Group()
+        self.beams = pg.sprite.Group()
+        if vector_effects is None:
+            vector_effects = EffectArray.available()
+        self.vector_effects = vector_effects
+        if vector_effects:
+            self.exps = EffectArray()
+        else:
+            self.exps = pg.sprite.Group()
+        self.emys = pg.sprite.Group()
+        self.gravity = pg.sprite.Group()
+        self.boss_mv = pg.sprite.Group()
+        self.collider = Collider()  # 空間ハッシュによる当たり判定
+        self.timer = Timer()  # ゲーム開始からの経過時間
+        self.time_text = HudText(self.score.atlas)  # 経過時間の表示
+        self.phase_hook = None  # 処理の区切りごとに区切りの名前で呼ばれる関数（計測用）
+        self.reset()
+
+    def reset(self):
+        """
+        ゲームを最初の状態に戻す（画像・音声やHUDの文字画像，グループはそのまま使い回す）
+        """
+        self.clear_entities()
+        self.score.reset()
+        self.life.reset()
+        self.timer.reset()
+        self.boss = Boss()
+        self.bird = Bird(3, (900, 400))
+        self.tmr = 0
+        self.bomb_tier = 0  # 爆弾の段階（BOUNCE_SCORE，ACCEL_SCORE以上で1ずつ上がる）
+        self.score.every(LIFE_UP_SCORE, self.life.life_up)  # 300の倍数に達するたびに残機が1増える
+        self.score.on_cross(BOUNCE_SCORE, self.change_tier)
+        self.score.on_cross(ACCEL_SCORE, self.change_tier)
+        self.score.flag("hyper", HYPER_COST+1)
+        self.score.flag("gravity", GRAVITY_COST)
+        self.boss_bomb_tf = False # ***boss_bombのfor文付近を参照***
+        self.now_time = 0
+        self.result = None  # ゲームの結果（None：続行中，"gameover"，"clear"）
+        self.set_quality(FULL_QUALITY.level)  # 爆発・SE・敵機・爆弾の量の設定（Governorが変える）
+        self.throttled = {"explosions": 0, "enemies": 0, "bombs": 0}  # 品質の設定で省いた数
+
+    def clear_entities(self):
+        """
+        すべてのグループのスプライトと配列の爆弾・爆発を消す
+        """
+        for group in self.groups():
+            if isinstance(group, pg.sprite.AbstractGroup):
+                for sprite in group.sprites():
+                    sprite.kill()  # 爆弾・ビーム・爆発はプールに戻る
             else:
-                bird.speed = 10
-            if event.type == pg.KEYDOWN and event.key == pg.K_SPACE and key_lst[pg.K_LSHIFT]:  # 左シフトキーとスペースキーが同時に押されたとき複数のビームを出す
-                nb = NeoBeam(bird, 5)
-                beam_lst = nb.gen_beams()
-                beams.add(beam_lst)
-        screen.blit(bg_img, [0, 0])
-        
-        # 背景画像を表示する
-        screen.blit(bg_imgs_lst[bg_img_i], (0, 0))
-        
-        # 現在の経過時間を更新する
-        elapsed_time = timer.get_elapsed_time()
-        
-        # 背景画像を時刻に基づき変更する
-        change_background(screen, timer)
-        
-        # 経過時間を画面上に表示する
-        elapsed_minutes = int(elapsed_time // 60)  # 分を計算
-        elapsed_seconds = int(elapsed_time % 60)  # 秒を計算
-        time_text = f"{elapsed_minutes:02d}:{elapsed_seconds:02d}"  # 表示する時刻
-        time_image = score.font.render(time_text, 0, score.color)  # 画像に変換
-        screen.blit(time_image, (32, 100))  # 時刻を画面に表示
+                group.clear()
+
+    def set_quality(self, level: int):
+        """
+        品質レベルを変える（QUALITY_EVENTを受け取ったときに呼ばれる）
+        """
+        self.quality = QUALITY_LEVELS[level]
+        if self.audio is not None:
+            self.audio.per_frame = self.quality.sfx_per_frame
 
-        if tmr%200 == 0:  # 200フレームに1回，敵機を出現させる
-            emys.add(Enemy())
+    def explode(self, obj, life: int):
+        """
+        objの位置に爆発エフェクトを出す（品質の設定に応じて短くするか省く）
+        引数1 obj：爆発するスプライト
+        引数2 life：品質が最高のときの爆発時間（ティック）
+        """
+        q = self.quality
+        if q.max_explosions is not None and len(self.exps) >= q.max_explosions:
+            self.throttled["explosions"] += 1
+            return
+        life = int(life*q.explosion_scale)
+        if self.vector_effects:  # スプライトを作らずに配列へ直接入れる
+            self.exps.spawn(obj, life)
+        else:
+            self.exps.add(Explosion.pool.acquire(obj, life))
+
+    def change_tier(self, up: bool):
+        """
+        爆弾の段階の節目をスコアが越えたときに呼ばれ，段階を上下させる
+        """
+        self.bomb_tier += 1 if up else -1
+
+    def play(self, key: str):
+        """
+        キーに対応するSEを鳴らす（muteなら何もしない）
+        """
+        if self.mute:
+            return
+        if self.audio is not None:
+            self.audio.play(key)
+        else:
+            ASSETS.sound(key).play()
+
+    def handle_event(self, event: pg.event.Event, key_lst):
+        """
+        イベント1つ分の処理を行う
+        引数1 event：イベント
+        引数2 key_lst：押下キーの真理値リスト
+        """
+        bird, score = self.bird, self.score
+        if event.type == pg.KEYDOWN and event.key == pg.K_SPACE:
+            self.beams.add(Beam.pool.acquire(bird))
+            self.play("beam")  # ビームSEの呼び出し
+        if (self.tmr)>=sec2tick(BOSS_APPEAR_TIME):#ボスは一定時間後に出現
+            if self.boss.flag ==0:#複数体出現するのを阻止
+                self.boss_mv.add(Boss())
+                self.boss.flag+=1
+
+                
+        if event.type == pg.KEYDOWN and event.key == pg.K_RSHIFT:   # 追加機能3
+            if score.flags["hyper"]:  # スコアが100より多い時
+                bird.change_state("hyper", sec2tick(HYPER_TIME))
+                score.score_up(-HYPER_COST)
+        if event.type == pg.KEYDOWN and event.key == pg.K_TAB :#Tabキーで重力球の展開
+            if score.flags["gravity"]:#スコアが５０未満の時は発動しない
+                self.gravity.add(Gravity(bird,sec2tick(GRAVITY_TIME)))#重力球の展開
+                score.score_down(GRAVITY_COST)#50点消費する
+                self.play("gravity")  # 重力球SEの呼び出し
+        if event.type == pg.KEYDOWN and event.key == pg.K_LSHIFT:
+            bird.speed = 20
+        else:
+            bird.speed = 10
+        if event.type == pg.KEYDOWN and event.key == pg.K_SPACE and key_lst[pg.K_LSHIFT]:  # 左シフトキーとスペースキーが同時に押されたとき複数のビームを出す
+            nb = NeoBeam(bird, 5)
+            beam_lst = nb.gen_beams()
+            self.beams.add(beam_lst)
+
+    def spawn(self):
+        """
+        敵機の出現と，敵機・ボスの爆弾投下を行う
+        """
+        tmr, q = self.tmr, self.quality
+        if tmr%sec2tick(ENEMY_INTERVAL*q.enemy_interval_scale) == 0:  # 一定時間ごとに敵機を出現させる
+            if q.max_enemies is not None and len(self.emys) >= q.max_enemies:
+                self.throttled["enemies"] += 1
+            else:
+                self.emys.add(Enemy())
 
-        for emy in emys:
+        for emy in self.emys:
             if emy.state == "stop" and tmr%emy.interval == 0:
                 # 敵機が停止状態に入ったら，intervalに応じて爆弾投下
-                bombs.add(Bomb(emy, bird))
-        for bos in boss_mv:
+                self.drop_bomb(emy)
+        for bos in self.boss_mv:
             if bos.state == "stop" and tmr%bos.interval == 0:
                 # ボスが停止状態に入ったら，intervalに応じて爆弾投下
-                boss_bomb.add(Boss_bomb(bos, bird))
-        for emy in pg.sprite.groupcollide(emys, beams, True, True).keys():
-            exps.add(Explosion(emy, 100))  # 爆発エフェクト
+                self.drop_boss_bomb(bos)
+
+    def drop_bomb(self, emy: Enemy):
+        """
+        敵機emyからこうかとんに向けて爆弾を投下する
+        """
+        max_bombs = self.quality.max_bombs
+        if max_bombs is not None and len(self.bombs) >= max_bombs:
+            self.throttled["bombs"] += 1
+            return
+        if self.vector_bombs:
+            self.bombs.spawn(emy, self.bird)
+        else:
+            self.bombs.add(Bomb.pool.acquire(emy, self.bird))
+
+    def drop_boss_bomb(self, bos: "Boss"):
+        """
+        ボスbosからこうかとんに向けて爆弾を投下する
+        """
+        if self.vector_bombs:
+            self.boss_bomb.spawn_spread(bos, self.bird)
+        else:
+            self.boss_bomb.add(Boss_bomb.pool.acquire(bos, self.bird))
+
+    def bomb_hits(self, group: pg.sprite.Group, dokill: bool, bombs=None) -> list:
+        """
+        groupと接触した爆弾を取り除き，そのリストを返す
+        引数2 dokill：Trueなら爆弾に当たったgroupのスプライトもkill()する
+        引数3 bombs：判定する爆弾（Noneなら敵機の爆弾，ボスの爆弾はself.boss_bomb）
+        """
+        bombs = self.bombs if bombs is None else bombs
+        if self.vector_bombs:
+            return bombs.groupcollide(group, dokill, self.collider)
+        return list(self.collider.groupcollide(bombs, group, True, dokill).keys())
+
+    def bird_bomb_hits(self, bombs=None, dokill: bool = True) -> list:
+        """
+        こうかとんと接触した爆弾のリストを返す
+        引数1 bombs：判定する爆弾（Noneなら敵機の爆弾）
+        引数2 dokill：Trueなら接触した爆弾を取り除く
+        """
+        bombs = self.bombs if bombs is None else bombs
+        if self.vector_bombs:
+            return bombs.spritecollide(self.bird, dokill)
+        return self.collider.spritecollide(self.bird, bombs, dokill)
+
+    def collide(self) -> str | None:
+        """
+        当たり判定とその結果（スコア，残機，爆発）の処理を行う
+        戻り値：ゲームが終わったら"gameover"または"clear"，続行ならNone
+        """
+        bird, score, life = self.bird, self.score, self.life
+        collider = self.collider
+        collider.begin_frame()
+        for emy in collider.groupcollide(self.emys, self.beams, True, True).keys():
+            self.explode(emy, sec2tick(EXPLOSION_TIME))  # 爆発エフェクト
             score.score_up(10)  # 10点アップ
-            bird.change_img(6, screen)  # こうかとん喜びエフェクト
-            e_kill.play()  # 爆発SEの呼び出し
-        for bos in pg.sprite.groupcollide(boss_mv, beams, False, True).keys():
-            exps.add(Explosion(bos, 100))  # 爆発エフェクト
+            bird.change_img(6)  # こうかとん喜びエフェクト
+            self.play("explosion")  # 爆発SEの呼び出し
+        for bos in collider.groupcollide(self.boss_mv, self.beams, False, True).keys():
+            self.explode(bos, sec2tick(EXPLOSION_TIME))  # 爆発エフェクト
             score.score_up(5)  # 5点アップ
-            boss.damage(1)
-        for bomb in pg.sprite.groupcollide(bombs, beams, True, True).keys():
-            exps.add(Explosion(bomb, 50))  # 爆発エフェクト
+            self.boss.damage(1)
+        for bomb in self.bomb_hits(self.beams, True):
+            self.explode(bomb, sec2tick(BOMB_EXPLOSION_TIME))  # 爆発エフェクト
             score.score_up(1)  # 1点アップ
-            e_kill.play()  # 爆発SEの呼び出し
-        for bomb in pg.sprite.groupcollide(bombs, gravity, True, False).keys():#重力球と爆弾の接触
-            exps.add(Explosion(bomb, 50))  # 爆発エフェクト
+            self.play("explosion")  # 爆発SEの呼び出し
+        for bomb in self.bomb_hits(self.gravity, False):#重力球と爆弾の接触
+            self.explode(bomb, sec2tick(BOMB_EXPLOSION_TIME))  # 爆発エフェクト
             score.score_up(1)  # 1点アップ
-            e_kill.play()  # 爆発SEの呼び出し
-        for bomb in pg.sprite.groupcollide(boss_bomb, gravity, True, False).keys():#重力球とボスの爆弾の接触
-            exps.add(Explosion(bomb, 50))  # 爆発エフェクト
-            e_kill.play()  # 爆発SEの呼び出し
-
-        for i in zankiup:  
-            if score.score >= i:  # スコアが300の倍数を超える
-                life.life_up()  # 残機が1増える
-                life.update(screen)
-                zankiup.remove(i)  
-
-        for bomb in pg.sprite.spritecollide(bird, bombs, True):
+            self.play("explosion")  # 爆発SEの呼び出し
+        for bomb in self.bomb_hits(self.gravity, False, self.boss_bomb):#重力球とボスの爆弾の接触
+            self.explode(bomb, sec2tick(BOMB_EXPLOSION_TIME))  # 爆発エフェクト
+            self.play("explosion")  # 爆発SEの呼び出し
+
+
+        for bomb in self.bird_bomb_hits():
             if (bird.state == "hyper"): # hyperモードの時
-                exps.add(Explosion(bomb, 50))  # 爆発エフェクト
+                self.explode(bomb, sec2tick(BOMB_EXPLOSION_TIME))  # 爆発エフェクト
                 score.score_up(1)  # 1点アップ
-                e_kill.play()  # 爆発SEの呼び出し
+                self.play("explosion")  # 爆発SEの呼び出し
             elif life.life >= 2:  # normalモードかつ残機が2以上の時
                 life.life_down()  # 残機が1減る
-                bird.change_img(8, screen) # こうかとん悲しみエフェクト
-                score.update(screen)  
+                bird.change_img(8) # こうかとん悲しみエフェクト
             else:   # normalモードの時
-                bird.change_img(8, screen) # こうかとん悲しみエフェクト
-                pg.mixer.music.stop()  # 背景bgmを止める
-                b_damame.play()  # ダメージSEの呼び出し
+                bird.change_img(8) # こうかとん悲しみエフェクト
+                self.play("damage")  # ダメージSEの呼び出し
                 life.life_down()  # 残機が1減る
-                score.update(screen)
-                life.update(screen)
-                gameover.update(screen)
-                pg.display.update()
-                time.sleep(3)
-                return
-        diff_time = tmr - now_time # 「今の時間 - ボスの爆弾と当たった時間」
-        if boss_bomb_tf: # ボスの爆弾と当たっている最中なら無敵時間を継続
-            if (diff_time > 100): # 100フレームより時間が経っていれば、無敵時間の解除
-                boss_bomb_tf = False
+                return "gameover"
+        diff_time = self.tmr - self.now_time # 「今の時間 - ボスの爆弾と当たった時間」
+        if self.boss_bomb_tf: # ボスの爆弾と当たっている最中なら無敵時間を継続
+            if (diff_time > sec2tick(INVINCIBLE_TIME)): # 無敵時間より時間が経っていれば、無敵時間の解除
+                self.boss_bomb_tf = False
         else:   # ボスの爆弾と当たっていないなら
-            for boss_bombs in pg.sprite.spritecollide(bird, boss_bomb, False):
+            for boss_bombs in self.bird_bomb_hits(self.boss_bomb, False):
                 if (bird.state == "hyper"): # hyperモードの時
                     pass
                 elif life.life >= 2:  # normalモードかつ残機が2以上の時
-                    boss_bomb_tf = True
-                    now_time = tmr # 今の時間を保存
+                    self.boss_bomb_tf = True
+                    self.now_time = self.tmr # 今の時間を保存
                     life.life_down()  # 残機が1減る
-                    bird.change_img(8, screen) # こうかとん悲しみエフェクト
-                    score.update(screen)  
+                    bird.change_img(8) # こうかとん悲しみエフェクト
                 else:   # normalモードの時
-                    bird.change_img(8, screen) # こうかとん悲しみエフェクト
-                    pg.mixer.music.stop()  # 背景bgmを止める
-                    b_damame.play()  # ダメージSEの呼び出し
+                    bird.change_img(8) # こうかとん悲しみエフェクト
+                    self.play("damage")  # ダメージSEの呼び出し
                     life.life_down()  # 残機が1減る
-                    score.update(screen)
-                    life.update(screen)
-                    gameover.update(screen)
-                    pg.display.update()
-                    time.sleep(3)
-                    return
-
-        if boss.boss_hp<=0:#ボスのＨＰが尽きたら喜びエフェクトを取り終了する
+                    return "gameover"
+
+        if self.boss.boss_hp<=0:#ボスのＨＰが尽きたら喜びエフェクトを取り終了する
                 score.score_up(1000)
-                bird.change_img(6, screen)  # こうかとん喜びエフェクト
-                pg.mixer.music.stop()  # 背景bgmを止める
-                score.update(screen)
-                pg.display.update()
-                time.sleep(2)
-                return
-
-        gravity.update(key_lst, screen)
-        gravity.draw(screen)
-        bird.update(key_lst, screen)
-        beams.update()
-        beams.draw(screen)
-        emys.update()
-        emys.draw(screen)
-        boss_mv.update()
-        boss_mv.draw(screen)
-        bombs.update(score=score.score)
-        bombs.draw(screen)
-        boss_bomb.update()
-        boss_bomb.draw(screen)
-        exps.update()
-        exps.draw(screen)
-        score.update(screen)
-        life.update(screen)
+                bird.change_img(6)  # こうかとん喜びエフェクト
+                return "clear"
+        return None
+
+    def update(self, key_lst):
+        """
+        すべてのスプライトを1ティック分動かす
+        動かす前の位置をprev_posに覚えておき，描画時の補間に使う
+        引数 key_lst：押下キーの真理値リスト
+        """
+        for group in self.groups():
+            if isinstance(group, pg.sprite.AbstractGroup):  # BombArrayは自分で直前の位置を覚える
+                for sprite in group:
+                    sprite.prev_pos = sprite.rect.topleft
+        self.bird.prev_pos = self.bird.rect.topleft
+        self.bird.update(key_lst)
+        self.gravity.update(key_lst)
+        if self.gravity:  # 全爆弾を重力球に引き寄せる
+            wells = [g.rect.center for g in self.gravity]
+            if self.vector_bombs:  # 配列でまとめて計算する
+                self.bombs.attract(wells, GRAVITY_PULL, GRAVITY_REACH)
+                self.boss_bomb.attract(wells, GRAVITY_PULL, GRAVITY_REACH)
+            else:
+                Gravity.pull(self.bombs, wells, GRAVITY_PULL, GRAVITY_REACH)
+                Gravity.pull(self.boss_bomb, wells, GRAVITY_PULL, GRAVITY_REACH)
+        self.beams.update()
+        self.emys.update()
+        self.boss_mv.update()
+        self.bombs.update(self.bomb_tier)
+        self.boss_bomb.update(0)  # ボスの爆弾は画面外に出たら消える
+        self.exps.update()
+
+    def step(self, key_lst, events=()) -> str | None:
+        """
+        1フレーム分ゲームを進める
+        引数1 key_lst：押下キーの真理値リスト
+        引数2 events：このフレームのイベントの一覧
+        戻り値：ゲームが終わったら"gameover"または"clear"，続行ならNone
+        """
+        hook = self.phase_hook
+        for event in events:
+            if event.type == QUALITY_EVENT:
+                self.set_quality(event.level)
+                continue
+            self.handle_event(event, key_lst)
+        if hook is not None:
+            hook("event")
+        self.spawn()
+        if hook is not None:
+            hook("spawn")
+        self.result = self.collide()
+        if hook is not None:
+            hook("collide")
+        if self.result is None:
+            self.update(key_lst)
+            self.tmr += 1
+            self.timer.advance(DT)
+            if hook is not None:
+                hook("update")
+        return self.result
+
+    def groups(self) -> tuple[pg.sprite.Group, ...]:
+        """
+        描画順に並べたスプライトグループの一覧を返す
+        """
+        return (self.gravity, self.beams, self.emys, self.boss_mv, self.bombs, self.boss_bomb, self.exps)
+
+    def draw(self, renderer: Renderer, alpha: float = 1.0):
+        """
+        ゲーム世界を画面に描く
+        引数2 alpha：直前のティックから次のティックまでの進み具合（0～1）．スプライトの位置を補間する
+        """
+        screen = renderer.screen
+        # 背景画像を時刻に基づき変更する（切り替わったらこのフレームで全画面を描き直す）
+        change_background(screen, self.timer)
+        renderer.set_background(bg_imgs_lst[bg_img_i])
+        renderer.begin()  # 背景画像を表示する（差分描画では前フレームで描いた部分だけを消す）
+        
+        # 現在の経過時間を更新する
+        elapsed_time = self.timer.get_elapsed_time()
+        
+        # 経過時間を画面上に表示する
+        elapsed_minutes = int(elapsed_time // 60)  # 分を計算
+        elapsed_seconds = int(elapsed_time % 60)  # 秒を計算
+        time_text = f"{elapsed_minutes:02d}:{elapsed_seconds:02d}"  # 表示する時刻
+        time_image = self.time_text.get(time_text)  # 画像に変換（時刻が変わったときだけ）
+        renderer.blit(time_image, (32, 100))  # 時刻を画面に表示
+
+        renderer.draw_group(self.gravity, alpha)
+        renderer.blit(self.bird.image, renderer.lerp_pos(self.bird, alpha))
+        for group in self.groups()[1:]:
+            renderer.draw_group(group, alpha)
+        self.score.update(renderer)
+        self.life.update(renderer)
+
+    def draw_result(self, renderer: Renderer):
+        """
+        ゲーム終了時の画面（GAME OVERまたはクリア）を描いて転送する
+        """
+        renderer.blit(self.bird.image, self.bird.rect)
+        self.score.update(renderer)
+        if self.result == "gameover":
+            self.life.update(renderer)
+            self.gameover.update(renderer)
         pg.display.update()
-        tmr += 1
-        clock.tick(50)
+
+    def counts(self) -> dict[str, int]:
+        """
+        グループごとのスプライト数を返す
+        """
+        return {"bombs": len(self.bombs), "beams": len(self.beams), "emys": len(self.emys),
+                "exps": len(self.exps), "boss_bomb": len(self.boss_bomb), "quality": self.quality.level}
+
+    def state(self) -> dict:
+        """
+        ゲーム世界の状態を比較・表示用の辞書で返す
+        """
+        return {
+            "tmr": self.tmr,
+            "result": self.result,
+            "score": self.score.score,
+            "life": self.life.life,
+            "boss_hp": self.boss.boss_hp,
+            "bird": list(self.bird.rect.center),
+            "bird_state": self.bird.state,
+            "enemies": len(self.emys),
+            "bombs": len(self.bombs),
+            "beams": len(self.beams),
+            "explosions": len(self.exps),
+            "boss_bombs": len(self.boss_bomb),
+            "gravity": len(self.gravity),
+            "sprites": [[s.rect.x, s.rect.y] for g in (self.emys, self.bombs, self.beams, self.boss_bomb)
+                        for s in g],
+        }
+
+
+class SceneManager:
+    """
+    タイトル・プレイ中・ボス戦・ゲームオーバー・クリアの場面を管理するクラス
+    どの場面でも毎フレームイベントを処理して描画し，結果画面でもループを止めない
+    """
+    result_wait = {"gameover": 3.0, "victory": 2.0}  # 結果画面で再開を受け付けるまでの時間（秒）
+    banner_time = 2.0  # ボス戦の開始を知らせる表示の時間（秒）
+
+    def __init__(self, world: World, renderer: Renderer):
+        self.world = world
+        self.renderer = renderer
+        self.big = pg.font.Font(None, 120)
+        self.small = pg.font.Font(None, 50)
+        self.title = self.big.render("Shin! Koukaton Musou Kai", True, (255, 255, 255))
+        self.start = self.small.render("SPACE: start   ESC: quit", True, (255, 255, 255))
+        self.prompt = self.small.render("SPACE: restart   ESC: title", True, (255, 255, 255))
+        self.banner = self.big.render("BOSS!", True, (255, 0, 0))
+        self.scene = None
+        self.enter("title")
+
+    def enter(self, scene: str):
+        """
+        場面を切り替える（次のフレームは全画面を描き直す）
+        """
+        self.scene = scene
+        self.since = time.perf_counter()
+        self.result_shown = False  # 結果画面を描いたかどうか
+        self.prompt_shown = False  # 再開の案内を描いたかどうか
+        self.renderer.full = True
+
+    def playing(self) -> bool:
+        return self.scene in ("playing", "boss")
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.since
+
+    def handle(self, event: pg.event.Event) -> str | None:
+        """
+        場面の切替に関わるキー入力を処理する
+        戻り値："start"（ゲームを始める），"quit"（終了する），None
+        """
+        if event.type != pg.KEYDOWN:
+            return None
+        if self.scene == "title":
+            if event.key in (pg.K_SPACE, pg.K_RETURN):
+                return "start"
+            if event.key == pg.K_ESCAPE:
+                return "quit"
+        elif self.scene in __class__.result_wait and self.elapsed() >= __class__.result_wait[self.scene]:
+            if event.key in (pg.K_SPACE, pg.K_RETURN, pg.K_r):
+                return "start"
+            if event.key == pg.K_ESCAPE:
+                self.enter("title")
+        return None
+
+    def after_step(self):
+        """
+        ティックを進めた後に呼び，ボスの出現やゲームの結果に応じて場面を切り替える
+        """
+        world = self.world
+        if world.result is not None:
+            self.enter("gameover" if world.result == "gameover" else "victory")
+        elif self.scene == "playing" and world.boss.flag:
+            self.enter("boss")
+
+    def draw(self, alpha: float = 1.0) -> bool:
+        """
+        今の場面を描く
+        戻り値：renderer.present()で転送する必要があればTrue
+        """
+        renderer = self.renderer
+        if self.scene == "title":
+            renderer.begin()
+            renderer.blit(self.title, self.title.get_rect(center=(WIDTH/2, HEIGHT/2-60)))
+            renderer.blit(self.start, self.start.get_rect(center=(WIDTH/2, HEIGHT/2+60)))
+            return True
+        if self.playing():
+            self.world.draw(renderer, alpha)
+            if self.scene == "boss" and self.elapsed() < __class__.banner_time:
+                renderer.blit(self.banner, self.banner.get_rect(center=(WIDTH/2, HEIGHT/3)))
+            return True
+        if not self.result_shown:  # 結果画面は一度だけ描く
+            self.world.draw_result(renderer)
+            self.result_shown = True
+        elif not self.prompt_shown and self.elapsed() >= __class__.result_wait[self.scene]:
+            pg.display.update(renderer.blit(self.prompt, self.prompt.get_rect(center=(WIDTH/2, HEIGHT/2+100))))
+            self.prompt_shown = True
+        return False
+
+
+def main(full_redraw: bool = False, max_fps: int = 0, profile_out: str | None = None,
+         record: str | None = None, seed: int | None = None, governor: bool = True,
+         resolution: tuple[int, int] | None = None):
+    """
+    ゲームのメインループ
+    ゲームロジックはTICK_RATEの固定間隔で進め，描画はできるだけ速く行い，ティック間の位置を補間する
+    タイトル画面から始まり，ゲームオーバー・クリア後はその場で（読み込み済みの画像・音声のまま）遊び直せる
+    F3キーで処理時間のオーバーレイを表示し，F4キーで計測結果を書き出す
+    引数1 full_redraw：Trueなら毎フレーム全画面を描き直す（差分描画との比較用）
+    引数2 max_fps：描画の最大fps（0なら上限なし）
+    引数3 profile_out：終了時に計測結果を書き出すファイル（.csvまたは.json）
+    引数4 record：終了時に最後に遊んだゲームの入力の記録を書き出すファイル（replay()で再生できる）
+    引数5 seed：最初のゲームの乱数のシード（Noneなら時刻から決める）
+    引数6 governor：Trueなら処理時間に応じて爆発・SE・敵機・爆弾の量を自動で減らす
+    引数7 resolution：描画する内部解像度（ゲームの座標はWIDTH×HEIGHTのまま）
+    """
+    pg.display.set_caption("真！こうかとん無双・改")
+    screen = init(resolution=resolution)
+    bg_img = ASSETS.image("pg_bg")
+    clock = pg.time.Clock()
+    recorder = None
+    world = World()
+    world.audio = make_audio()
+    profiler = FrameProfiler()
+    world.phase_hook = profiler.mark
+    gov = Governor(DT) if governor else None  # 1ティック分の時間に描画まで収める
+    renderer = Renderer(screen, bg_imgs_lst[bg_img_i], dirty=not full_redraw, scale=render_scale())
+    scenes = SceneManager(world, renderer)
+    pg.mixer.music.set_volume(0.3)  # 音量
+    pg.mixer.music.load(ASSETS.path("bgm/bgm.wav"))  # 背景bgmを読み込み
+    acc = 0.0  # まだ進めていないシミュレーション時間
+    prev = time.perf_counter()
+    pending = []  # 次のティックで処理するイベント
+    try:
+        while True:
+            profiler.begin_frame()
+            now = time.perf_counter()
+            acc += min(now - prev, MAX_FRAME_TIME)
+            prev = now
+            key_lst = pg.key.get_pressed()
+            events = pg.event.get()
+            was_playing = scenes.playing()
+            for event in events:
+                if event.type == pg.QUIT:
+                    return 0
+                if event.type == pg.KEYDOWN and event.key == pg.K_F3:  # オーバーレイの表示切替
+                    profiler.toggle()
+                if event.type == pg.KEYDOWN and event.key == pg.K_F4:  # 計測結果の書き出し
+                    profiler.dump(profile_out or "profile.json")
+                action = scenes.handle(event)
+                if action == "quit":
+                    return 0
+                if action == "start":  # ゲームをその場で初期化して始める
+                    if seed is None:
+                        seed = time.time_ns() & 0xFFFFFFFF
+                    random.seed(seed)
+                    recorder = InputRecorder(seed) if record else None
+                    seed = None  # 2回目以降は時刻から決める
+                    world.reset()
+                    scenes.enter("playing")
+                    pg.mixer.music.play(-1)  # 背景bgmを無限ループで再生
+                    acc = 0.0
+                    pending = [gov.event()] if gov is not None else []  # 今の品質レベルから始める
+            profiler.mark("event")
+            if was_playing and scenes.playing():
+                pending += events
+                while acc >= DT:
+                    acc -= DT
+                    if recorder is not None:
+                        recorder.record(key_lst, pending)
+                    result = world.step(key_lst, pending)
+                    pending = []
+                    scenes.after_step()
+                    if result is not None:
+                        pg.mixer.music.stop()  # 背景bgmを止める
+                        break
+            else:
+                acc = 0.0
+            if full_redraw and scenes.playing():
+                renderer.blit(bg_img, [0, 0])
+            present = scenes.draw(acc / DT)
+            if present:
+                renderer.mark(profiler.draw(screen, (screen.get_width()-220, 10)))
+            profiler.mark("draw")
+            if present:
+                renderer.present()
+            world.audio.flush()  # このフレームのSEをまとめて鳴らす
+            profiler.mark("present")
+            profiler.end_frame(world.counts())
+            if gov is not None and gov.update(time.perf_counter() - now) and scenes.playing():
+                pending.append(gov.event())  # 次のティックから品質を変える（入力として記録される）
+            clock.tick(max_fps if scenes.playing() else min(max_fps or 60, 60))  # 止まっている画面は60fpsまで
+    finally:
+        if profile_out:
+            profiler.dump(profile_out)
+        if recorder is not None:
+            recorder.save(record)
+        if gov is not None and gov.decisions:
+            print(f"quality: {gov.state()} throttled: {world.throttled}", file=sys.stderr)  # 品質の調整の記録
+
+
+def replay(path: str, render: bool = True) -> dict:
+    """
+    main()で記録した入力を，時間調整をせずにできるだけ速く再生する
+    引数1 path：入力の記録ファイル
+    引数2 render：Falseなら描画をせずにゲームを進めるだけにする
+    戻り値：再生結果（ティック数，所要時間，fps，ゲームの結果）
+    """
+    log = InputLog.load(path)
+    screen = init(loading_screen=False)
+    random.seed(log.seed)
+    world = World(mute=True)
+    renderer = Renderer(screen, bg_imgs_lst[bg_img_i], scale=render_scale()) if render else None
+    start = time.perf_counter()
+    n = 0
+    while n < len(log):
+        if any(event.type == pg.QUIT for event in pg.event.get()):  # 再生中でもウィンドウを閉じられる
+            break
+        key_lst, events = log.frame(n)
+        n += 1
+        if world.step(key_lst, events) is not None:
+            break
+        if renderer is not None:
+            world.draw(renderer)
+            renderer.present()
+    elapsed = time.perf_counter() - start
+    return {"ticks": n, "seconds": elapsed, "fps": n / elapsed if elapsed > 0 else 0.0,
+            "result": world.result, "score": world.score.score}
    
 
 if __name__ == "__main__":
-    pg.init()
-    main()
+    parser = argparse.ArgumentParser(description="真！こうかとん無双・改")
+    parser.add_argument("--full-redraw", action="store_true", help="毎フレーム全画面を描き直す（差分描画との比較用）")
+    parser.add_argument("--max-fps", type=int, default=0, help="描画の最大fps（0なら上限なし）")
+    parser.add_argument("--profile-out", help="終了時に処理時間の計測結果を書き出すファイル（.csvまたは.json）")
+    parser.add_argument("--seed", type=int, help="乱数のシード")
+    parser.add_argument("--record", help="入力を記録するファイル")
+    parser.add_argument("--replay", help="記録した入力を時間調整なしで再生する")
+    parser.add_argument("--no-render", action="store_true", help="再生時に描画をしない")
+    parser.add_argument("--no-governor", action="store_true", help="処理時間に応じた品質の自動調整をしない")
+    parser.add_argument("--resolution", type=parse_size, metavar="WxH", help="描画する内部解像度（例：800x450）")
+    args = parser.parse_args()
+    init(resolution=args.resolution)
+    print(f"startup: {startup_seconds*1000:.1f} ms", file=sys.stderr)  # 起動時間の記録
+    if args.replay:
+        try:
+            print(replay(args.replay, render=not args.no_render), file=sys.stderr)
+        except ValueError as e:  # 入力記録でないか，形式のバージョンが違う
+            raise SystemExit(e)
+    else:
+        main(full_redraw=args.full_redraw, max_fps=args.max_fps, profile_out=args.profile_out,
+             record=args.record, seed=args.seed, governor=not args.no_governor, resolution=args.resolution)
     pg.quit()
     sys.exit()
@@ -0,0 +1,94 @@
+import pygame as pg
+
+
+class SpritePool:
+    """
+    kill()されたスプライトを捨てずに取っておき，次の生成で使い回すクラス
+    使い回すクラスは reset(*args) で状態を初期化できる必要がある
+    """
+    def __init__(self, cls: type, maxsize: int = 4096):
+        """
+        引数1 cls：プールするスプライトのクラス
+        引数2 maxsize：取っておくスプライトの最大数
+        """
+        self.cls = cls
+        self.maxsize = maxsize
+        self.free = []  # 使い回し待ちのスプライト
+        self.created = 0  # 新しく生成した数
+        self.reused = 0  # 使い回した数
+        self.live = 0  # 現在使用中の数
+        self.peak = 0  # 使用中の数の最大値
+
+    def acquire(self, *args) -> pg.sprite.Sprite:
+        """
+        プールからスプライトを取り出してreset(*args)する
+        プールが空なら新しく生成する
+        """
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            obj.pooled = False
+            self.reused += 1
+        else:
+            obj = self.cls(*args)
+            self.created += 1
+        self.live += 1
+        if self.live > self.peak:
+            self.peak = self.live
+        return obj
+
+    def take(self) -> pg.sprite.Sprite:
+        """
+        プールからスプライトをreset()せずに取り出す（状態は呼び出し側ですべて設定する）
+        プールが空なら__init__を呼ばずに新しく作る（保存した状態の復元用）
+        """
+        if self.free:
+            obj = self.free.pop()
+            obj.pooled = False
+            self.reused += 1
+        else:
+            obj = self.cls.__new__(self.cls)
+            pg.sprite.Sprite.__init__(obj)
+            self.created += 1
+        self.live += 1
+        if self.live > self.peak:
+            self.peak = self.live
+        return obj
+
+    def release(self, obj: pg.sprite.Sprite):
+        """
+        使い終わったスプライトをプールに戻す
+        """
+        self.live -= 1
+        if len(self.free) < self.maxsize:
+            self.free.append(obj)
+
+    def stats(self) -> dict:
+        """
+        プールの状態を辞書で返す
+        戻り値：プール中の数, 生成数, 使い回し数, 使い回し率, 使用中の数, その最大値
+        """
+        total = self.created + self.reused
+        return {
+            "pool_size": len(self.free),
+            "created": self.created,
+            "reused": self.reused,
+            "reuse_ratio": self.reused / total if total else 0.0,
+            "live": self.live,
+            "peak_live": self.peak,
+        }
+
+
+class Pooled:
+    """
+    kill()されるとクラスのプールへ自動で戻るスプライトの基底クラス
+    pg.sprite.Spriteより前に継承し，クラス属性poolにSpritePoolを設定して使う
+    """
+    pool: SpritePool
+    pooled = False  # プールに戻っているかどうか
+
+    def kill(self):
+        super().kill()
+        if not self.pooled:  # 二重にkillされてもプールへは一度だけ戻す
+            self.pooled = True
+            type(self).pool.release(self)
@@ -0,0 +1,93 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame as pg
+
+PHASES = ("event", "spawn", "collide", "update", "draw", "present")  # 計測する処理の区切り
+
+
+class FrameProfiler:
+    """
+    メインループの処理の区切りごとの時間を計測し，直近のフレームをリングバッファに保持するクラス
+    mark(区切り名)を呼ぶと，前回のmarkからの経過時間をその区切りに加算する
+    """
+    def __init__(self, size: int = 600):
+        """
+        引数 size：保持するフレーム数
+        """
+        self.frames = deque(maxlen=size)  # 1フレーム分の計測結果（辞書）のリングバッファ
+        self.cur = dict.fromkeys(PHASES, 0.0)
+        self.last = time.perf_counter()
+        self.count = 0  # 計測したフレームの総数
+        self.visible = False  # オーバーレイを表示するかどうか
+        self.font = None
+        self.overlay = None  # 描画済みのオーバーレイSurface
+
+    def begin_frame(self):
+        """
+        フレームの始めに呼ぶ
+        """
+        self.cur = dict.fromkeys(PHASES, 0.0)
+        self.last = time.perf_counter()
+
+    def mark(self, phase: str):
+        """
+        前回のmarkから今までの時間を区切りphaseに加算する
+        """
+        now = time.perf_counter()
+        self.cur[phase] = self.cur.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def end_frame(self, counts: dict[str, int]):
+        """
+        フレームの終わりに呼び，計測結果をリングバッファに追加する
+        引数 counts：グループ名 → スプライト数
+        """
+        record = {"frame": self.count}
+        record.update((phase, round(sec*1000, 4)) for phase, sec in self.cur.items())
+        record["total"] = round(sum(self.cur.values())*1000, 4)
+        record.update(counts)
+        self.frames.append(record)
+        self.count += 1
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.overlay = None
+
+    def draw(self, screen: pg.Surface, pos: tuple[int, int]) -> pg.Rect | None:
+        """
+        直近のフレームの計測結果をオーバーレイとして描く（10フレームごとに描き直す）
+        戻り値：描画した矩形（非表示ならNone）
+        """
+        if not self.visible or not self.frames:
+            return None
+        if self.overlay is None or self.count % 10 == 0:
+            if self.font is None:
+                self.font = pg.font.Font(None, 24)
+            last = self.frames[-1]
+            lines = [f"{k:8s}{v:7.2f} ms" for k, v in last.items() if k in PHASES or k == "total"]
+            lines += [f"{k:8s}{v:5d}" for k, v in last.items() if k not in PHASES and k not in ("frame", "total")]
+            imgs = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+            w = max(img.get_width() for img in imgs) + 10
+            self.overlay = pg.Surface((w, 20*len(imgs) + 10))
+            self.overlay.set_alpha(180)
+            for i, img in enumerate(imgs):
+                self.overlay.blit(img, (5, 5 + 20*i))
+        return screen.blit(self.overlay, pos)
+
+    def dump(self, path: str):
+        """
+        リングバッファの内容を書き出す（拡張子が.csvならCSV，それ以外はJSON）
+        """
+        frames = list(self.frames)
+        if path.endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                keys = list(frames[0]) if frames else ["frame", *PHASES]
+                writer = csv.DictWriter(f, fieldnames=keys)
+                writer.writeheader()
+                writer.writerows(frames)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(frames, f, indent=1)
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+
+import pygame as pg
+
+
+class Renderer:
+    """
+    画面の描画と転送を管理するクラス
+    dirty=Trueのときは前フレームと今フレームで描いた矩形だけを背景で消して転送し，
+    dirty=Falseのときは従来通り毎フレーム全画面を描き直して転送する
+    scaleが1でないときは，論理座標（ゲームの座標）で渡された位置と画像をscale倍して内部解像度の画面に描く
+    """
+    def __init__(self, screen: pg.Surface, background: pg.Surface, dirty: bool = True, scale: float = 1.0,
+                 max_scaled: int = 2048):
+        """
+        引数1 screen：画面Surface（内部解像度の大きさ）
+        引数2 background：背景画像Surface（論理座標での画面と同じ大きさ）
+        引数3 dirty：変化した矩形だけを転送するかどうか
+        引数4 scale：内部解像度の論理座標に対する倍率
+        引数5 max_scaled：保持する拡大縮小済みの画像の最大数
+        """
+        self.screen = screen
+        self.scale = scale
+        self.max_scaled = max_scaled
+        self.scaled = OrderedDict()  # id(元の画像) → (元の画像, 拡大縮小した画像)
+        self.src_bg = background  # 論理座標の大きさの背景画像
+        self.bg = self.fit(background)
+        self.dirty = dirty
+        self.full = True  # 次のフレームで全画面を描き直すかどうか（begin()で今フレームの分として受け取る）
+        self.full_frame = True  # 今フレームで全画面を描き直したかどうか
+        self.prev = []  # 前フレームで描いた矩形
+        self.cur = []  # 今フレームで描いた矩形
+        self.pushed = 0  # 直前のフレームで転送した矩形の数（全画面なら0）
+
+    def set_background(self, background: pg.Surface):
+        """
+        背景画像を切り替える．切り替わった後の最初のbegin()で全画面を描き直す
+        （begin()の後に呼んだときは，そのフレームではなく次のフレームで描き直す）
+        """
+        if background is not self.src_bg:
+            self.src_bg = background
+            self.bg = self.fit(background)
+            self.full = True
+
+    def fit(self, img: pg.Surface) -> pg.Surface:
+        """
+        画像を内部解像度に合わせて拡大縮小したものを返す（一度作ったものは使い回す）
+        透過色を使う画像は色が混ざらないように最近傍法で，それ以外は滑らかに拡大縮小する
+        """
+        if self.scale == 1.0:
+            return img
+        entry = self.scaled.get(id(img))
+        if entry is not None and entry[0] is img:
+            self.scaled.move_to_end(id(img))
+            return entry[1]
+        w, h = img.get_size()
+        size = max(1, round(w*self.scale)), max(1, round(h*self.scale))
+        if img.get_colorkey() is None and img.get_bitsize() >= 24:
+            out = pg.transform.smoothscale(img, size)
+        else:
+            out = pg.transform.scale(img, size)
+        self.scaled[id(img)] = (img, out)  # 元の画像も持っておき，idが使い回されないようにする
+        if len(self.scaled) > self.max_scaled:
+            self.scaled.popitem(last=False)
+        return out
+
+    def to_screen(self, pos) -> tuple[int, int]:
+        """
+        論理座標の位置（座標のタプルまたはRect）を内部解像度の画面の位置に変換する
+        """
+        return round(pos[0]*self.scale), round(pos[1]*self.scale)
+
+    def begin(self):
+        """
+        フレームの始めに呼び，背景を描く（差分モードでは前フレームで描いた部分だけ消す）
+        """
+        self.full_frame = self.full or not self.dirty
+        self.full = False
+        if self.full_frame:
+            self.screen.blit(self.bg, (0, 0))
+        else:
+            bg = self.bg
+            self.screen.blits([(bg, r, r) for r in self.prev], doreturn=False)
+
+    def mark(self, rect: pg.Rect | None):
+        """
+        直接screenに描いた矩形を今フレームの変化として記録する
+        """
+        if rect is not None:
+            self.cur.append(rect)
+
+    def blit(self, img: pg.Surface, pos) -> pg.Rect:
+        """
+        画像を論理座標の位置posに描き，その矩形（内部解像度の画面での矩形）を記録する
+        """
+        if self.scale != 1.0:
+            img, pos = self.fit(img), self.to_screen(pos)
+        rect = self.screen.blit(img, pos)
+        self.cur.append(rect)
+        return rect
+
+    @staticmethod
+    def lerp_pos(sprite: pg.sprite.Sprite, alpha: float) -> tuple[int, int]:
+        """
+        直前のティックの位置prev_posと現在の位置の間をalphaで補間した描画位置を返す
+        """
+        x, y = sprite.rect.topleft
+        prev = getattr(sprite, "prev_pos", None)
+        if prev is None or alpha >= 1.0:
+            return x, y
+        return round(prev[0] + (x-prev[0])*alpha), round(prev[1] + (y-prev[1])*alpha)
+
+    def draw_group(self, group: pg.sprite.AbstractGroup, alpha: float = 1.0):
+        """
+        グループのスプライトをまとめて描き，その矩形を記録する
+        引数2 alpha：ティック間の補間の割合（1.0なら現在の位置に描く）
+        """
+        if hasattr(group, "blit_list"):  # 配列で管理しているもの（BombArrayなど）は自分で描画リストを作る
+            blits = group.blit_list(alpha)
+        elif alpha >= 1.0:
+            blits = [(s.image, s.rect) for s in group]
+        else:
+            lerp = __class__.lerp_pos
+            blits = [(s.image, lerp(s, alpha)) for s in group]
+        if self.scale != 1.0:
+            fit, to_screen = self.fit, self.to_screen
+            blits = [(fit(img), to_screen(pos)) for img, pos in blits]
+        self.cur.extend(self.screen.blits(blits))
+
+    def present(self):
+        """
+        フレームの終わりに呼び，変化した部分（または全画面）をウィンドウに転送する
+        """
+        if self.full_frame:
+            pg.display.update()
+            self.pushed = 0
+        else:
+            rects = self.prev + self.cur
+            pg.display.update(rects)
+            self.pushed = len(rects)
+        self.prev = self.cur
+        self.cur = []
@@ -0,0 +1,146 @@
+"""
+入力の記録と再生を行うモジュール
+乱数のシードと，ティックごとの押下キー・KEYDOWNイベントを小さなバイナリ形式で保存する
+
+ファイル形式（リトルエンディアン）：
+  ヘッダ：マジック"KKRP"，版数(uint16)，シード(int64)，ティック数(uint32)
+  ティックごと：押下キーのビット(uint8)，イベント数(uint8)，イベントの符号(uint8)×イベント数
+イベントの符号はKEYSの番号，品質レベルの変更はQUALITY|レベル，
+それ以外のイベントはOTHER（連続するOTHERは1つにまとめる）
+"""
+import struct
+
+import pygame as pg
+
+from governor import QUALITY_EVENT
+
+MAGIC = b"KKRP"
+VERSION = 2  # 2：品質レベルの変更（QUALITY）の符号を追加した
+HEADER = struct.Struct("<4sHqI")
+KEYS = (pg.K_UP, pg.K_DOWN, pg.K_LEFT, pg.K_RIGHT,
+        pg.K_LSHIFT, pg.K_RSHIFT, pg.K_SPACE, pg.K_TAB)  # ゲームが参照するキー（ビットの順）
+KEY_BIT = {k: i for i, k in enumerate(KEYS)}
+QUALITY = 0x80  # 品質レベルの変更（下位ビットがレベル）
+OTHER = 0xFF  # KEYSのKEYDOWN以外のイベント
+MAX_EVENTS = 255  # 1ティックに記録できるイベント数
+
+
+class KeyMask:
+    """
+    押下キーのビットをpg.key.get_pressed()と同じく添字で引けるようにするクラス
+    """
+    __slots__ = ("mask",)
+
+    def __init__(self, mask: int = 0):
+        self.mask = mask
+
+    def __getitem__(self, key: int) -> bool:
+        bit = KEY_BIT.get(key)
+        return bit is not None and bool(self.mask >> bit & 1)
+
+
+def encode_keys(key_lst) -> int:
+    """
+    押下キーの真理値リストをビットに変換する
+    """
+    mask = 0
+    for i, k in enumerate(KEYS):
+        if key_lst[k]:
+            mask |= 1 << i
+    return mask
+
+
+def encode_events(events) -> bytes:
+    """
+    イベントの一覧を符号の列に変換する
+    """
+    codes = bytearray()
+    for event in events:
+        if event.type == pg.KEYDOWN:
+            code = KEY_BIT.get(event.key, OTHER)
+        elif event.type == QUALITY_EVENT:
+            code = QUALITY | event.level
+        else:
+            code = OTHER
+        if code == OTHER and codes and codes[-1] == OTHER:
+            continue  # 他のイベントは何個続いてもゲームへの影響は同じ
+        codes.append(code)
+    return bytes(codes[:MAX_EVENTS])
+
+
+def decode_event(code: int) -> pg.event.Event:
+    if code == OTHER:
+        return pg.event.Event(pg.USEREVENT)
+    if code & QUALITY:
+        return pg.event.Event(QUALITY_EVENT, level=code & ~QUALITY)
+    return pg.event.Event(pg.KEYDOWN, key=KEYS[code])
+
+
+def decode_events(codes: bytes) -> list[pg.event.Event]:
+    return [decode_event(c) for c in codes]
+
+
+class InputRecorder:
+    """
+    World.step()に渡した入力をティックごとに記録するクラス
+    """
+    def __init__(self, seed: int):
+        """
+        引数1 seed：ゲーム開始時に設定した乱数のシード
+        """
+        self.seed = seed
+        self.ticks = 0
+        self.data = bytearray()
+
+    def record(self, key_lst, events):
+        """
+        1ティック分の入力を記録する
+        引数1 key_lst：押下キーの真理値リスト
+        引数2 events：このティックのイベントの一覧
+        """
+        codes = encode_events(events)
+        self.data += bytes((encode_keys(key_lst), len(codes))) + codes
+        self.ticks += 1
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.ticks))
+            f.write(self.data)
+
+
+class InputLog:
+    """
+    記録した入力を読み込み，ティックごとに返すクラス
+    headless.ScriptedInputなどと同じくframe(n)で入力を返す
+    """
+    def __init__(self, seed: int, ticks: list[tuple[KeyMask, bytes]]):
+        self.seed = seed
+        self.ticks = ticks
+
+    @classmethod
+    def load(cls, path: str) -> "InputLog":
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}：入力記録のファイルではありません")
+        magic, version, seed, count = HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ValueError(f"{path}：入力記録の形式（バージョン{version}）に対応していません（対応：{VERSION}）")
+        ticks = []
+        i = HEADER.size
+        for _ in range(count):
+            mask, n = data[i], data[i+1]
+            ticks.append((KeyMask(mask), data[i+2:i+2+n]))
+            i += 2 + n
+        return cls(seed, ticks)
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    def frame(self, n: int) -> tuple[KeyMask, list[pg.event.Event]]:
+        """
+        nティック目の入力を返す
+        戻り値：押下キーの状態，イベントのリスト
+        """
+        keys, codes = self.ticks[n]
+        return keys, decode_events(codes)
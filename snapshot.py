@@ -0,0 +1,567 @@
+"""
+ゲーム世界の状態を小さなバイナリに保存し，そこから復元するモジュール（セーブ・ロードと巻き戻し用）
+スプライトは__slots__だけを持つ小さな記録（Record）に写してから固定長の構造体に詰める
+記録は保存形式のためのもので，ゲーム中のスプライト自体は今までどおり__dict__を持つ
+（pg.sprite.Spriteが__slots__を持たないので，サブクラスに__slots__を付けても__dict__は無くならない．
+  Bomb・Beam・Explosionで試しても，Sprite.__init__が作る__dict__と所属グループのsetが残って1個あたり約500バイトのままだった）
+配列で処理する爆弾・爆発（BombArray，EffectArray）は配列をそのまま書き出す
+
+形式（リトルエンディアン）：
+  ヘッダ：マジック"KKSS"，版数(uint16)，設定のビット(uint8)
+  世界：WorldRecord，スコアの倍数ごとの規則の数(uint8)と次に呼ぶスコア(int32)×規則数，BirdRecord
+  グループ：描画順（World.groups()）に，数(uint32)と記録×数（配列なら直前の位置以外の属性ごとの配列の中身）
+  乱数：random.getstate()の状態(uint32×625)と正規分布の残り（設定のビットにRNGがあるときだけ）
+
+使い方：python snapshot.py [--frames 1250] [--seed 1] [--rollback 200] [--policy dodger] [--sprites]
+"""
+import argparse
+import json
+import operator
+import os
+import random
+import statistics
+import struct
+import time
+import tracemalloc
+from collections import deque
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame as pg
+
+try:
+    import numpy as np
+except ImportError:  # numpyが無い環境では爆弾・爆発はスプライトなので配列を読み書きしない
+    np = None
+
+import musou_kokaton as game
+from assets import ASSETS
+
+MAGIC = b"KKSS"
+VERSION = 2  # 2：爆弾の位置を整数で持つようにした
+HEADER = struct.Struct("<4sHB")
+COUNT = struct.Struct("<I")
+RNG = struct.Struct("<625I?d")
+VECTOR_BOMBS, VECTOR_EFFECTS, WITH_RNG = 1, 2, 4  # 設定のビット
+RESULTS = (None, "gameover", "clear")
+
+
+class Record:
+    """
+    スプライト1つ分の状態を__slots__の属性だけで持つ記録の基底クラス
+    派生クラスは__slots__（属性名）とlayout（同じ順の構造体）を決める
+    """
+    __slots__ = ()
+    layout: struct.Struct
+
+    def __init_subclass__(cls):
+        cls.values = operator.attrgetter(*cls.__slots__)  # 属性をlayoutの順に並べたタプルを返す
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def pack(self) -> bytes:
+        return self.layout.pack(*self.values(self))
+
+    @classmethod
+    def unpack_from(cls, data, off: int) -> tuple["Record", int]:
+        """
+        offから記録を1つ読み出す
+        戻り値：記録，読み終えた位置
+        """
+        return cls(*cls.layout.unpack_from(data, off)), off + cls.layout.size
+
+    @classmethod
+    def unpack_all(cls, data, off: int) -> tuple[list["Record"], int]:
+        """
+        offから数(uint32)と記録の列を読み出す
+        戻り値：記録のリスト，読み終えた位置
+        """
+        n = COUNT.unpack_from(data, off)[0]
+        off += COUNT.size
+        end = off + n*cls.layout.size
+        return [cls(*v) for v in cls.layout.iter_unpack(data[off:end])], end
+
+
+class BirdRecord(Record):
+    """
+    こうかとん（画像はBird.sprite_table()の表の中の番号）
+    """
+    __slots__ = ("x", "y", "w", "h", "dx", "dy", "image", "hyper", "hyper_life", "speed")
+    layout = struct.Struct("<iiHHbbB?ih")
+
+    @classmethod
+    def capture(cls, bird: game.Bird) -> "BirdRecord":
+        imgs = list(bird.sprites.values())
+        image = next(i for i, img in enumerate(imgs) if img is bird.image)
+        return cls(*bird.rect, *bird.dire, image, bird.state == "hyper", bird.hyper_life, bird.speed)
+
+    def apply(self, bird: game.Bird):
+        bird.rect = pg.Rect(self.x, self.y, self.w, self.h)
+        bird.prev_pos = bird.rect.topleft
+        bird.dire = (self.dx, self.dy)
+        bird.image = list(bird.sprites.values())[self.image]
+        bird.state = "hyper" if self.hyper else "normal"
+        bird.hyper_life = self.hyper_life
+        bird.speed = self.speed
+
+
+class GravityRecord(Record):
+    """
+    重力球（位置はこうかとんに追従するので中心座標と残り時間だけ）
+    """
+    __slots__ = ("x", "y", "life")
+    layout = struct.Struct("<iii")
+
+    @classmethod
+    def capture(cls, g: game.Gravity) -> "GravityRecord":
+        return cls(*g.rect.center, g.life)
+
+    def build(self, bird: game.Bird) -> game.Gravity:
+        g = game.Gravity(bird, self.life)
+        g.rect.center = self.x, self.y
+        g.prev_pos = g.rect.topleft
+        return g
+
+
+class BeamRecord(Record):
+    """
+    ビーム（画像は回転画像のキーから引き直す）
+    """
+    __slots__ = ("x", "y", "rot_key", "vx", "vy", "speed")
+    layout = struct.Struct("<iiHddh")
+
+    @classmethod
+    def capture(cls, beam: game.Beam) -> "BeamRecord":
+        return cls(*beam.rect.topleft, beam.rot_key, beam.vx, beam.vy, beam.speed)
+
+    def apply(self, beam: game.Beam):
+        cache = game.Beam.rot_cache
+        beam.image = cache.get(self.rot_key * cache.step)
+        beam.rot_key = self.rot_key
+        beam.rect = beam.image.get_rect(topleft=(self.x, self.y))
+        beam.prev_pos = beam.rect.topleft
+        beam.vx, beam.vy, beam.speed = self.vx, self.vy, self.speed
+
+    def build(self) -> game.Beam:
+        beam = game.Beam.pool.take()
+        self.apply(beam)
+        return beam
+
+
+class EnemyRecord(Record):
+    """
+    敵機（画像はEnemy.imgsの番号）
+    """
+    __slots__ = ("x", "y", "image", "vy", "bound", "stop", "interval")
+    layout = struct.Struct("<iiBii?i")
+
+    @classmethod
+    def capture(cls, emy: game.Enemy) -> "EnemyRecord":
+        image = next(i for i, img in enumerate(game.Enemy.imgs) if img is emy.image)
+        return cls(*emy.rect.topleft, image, emy.vy, emy.bound, emy.state == "stop", emy.interval)
+
+    def build(self) -> game.Enemy:
+        emy = blank(game.Enemy)
+        emy.image = game.Enemy.imgs[self.image]
+        emy.rect = emy.image.get_rect(topleft=(self.x, self.y))
+        emy.prev_pos = emy.rect.topleft
+        emy.vy, emy.bound, emy.interval = self.vy, self.bound, self.interval
+        emy.state = "stop" if self.stop else "down"
+        return emy
+
+
+class BossRecord(Record):
+    """
+    ボス（場に出ている方．勝敗の判定に使うHPと出現済みのフラグはWorld.bossの方をWorldRecordが持つ）
+    """
+    __slots__ = ("x", "y", "vy", "bound", "stop", "interval", "hp", "flag")
+    layout = struct.Struct("<iiii?iiB")
+
+    @classmethod
+    def capture(cls, bos: game.Boss) -> "BossRecord":
+        return cls(*bos.rect.topleft, bos.vy, bos.bound, bos.state == "stop", bos.interval, bos.boss_hp, bos.flag)
+
+    def build(self) -> game.Boss:
+        bos = blank(game.Boss)
+        bos.image = game.Boss.img
+        bos.rect = bos.image.get_rect(topleft=(self.x, self.y))
+        bos.prev_pos = bos.rect.topleft
+        bos.vy, bos.bound, bos.interval = self.vy, self.bound, self.interval
+        bos.state = "stop" if self.stop else "down"
+        bos.boss_hp, bos.flag = self.hp, self.flag
+        return bos
+
+
+class BombRecord(Record):
+    """
+    爆弾・ボスの爆弾のスプライト（色は色の一覧の番号）
+    """
+    __slots__ = ("x", "y", "radius", "color", "vx", "vy", "speed")
+    layout = struct.Struct("<iiBBddd")
+
+    @classmethod
+    def capture(cls, bomb, colors: list[tuple[int, int, int]]) -> "BombRecord":
+        color = colors.index(getattr(bomb, "color", colors[0]))
+        return cls(*bomb.rect.topleft, bomb.radius, color, bomb.vx, bomb.vy, bomb.speed)
+
+    def apply(self, bomb, colors: list[tuple[int, int, int]]):
+        color = colors[self.color]
+        bomb.image = ASSETS.circle(self.radius, color)
+        bomb.rect = bomb.image.get_rect(topleft=(self.x, self.y))
+        bomb.prev_pos = bomb.rect.topleft
+        bomb.radius = self.radius
+        bomb.color = color
+        bomb.vx, bomb.vy, bomb.speed = self.vx, self.vy, self.speed
+
+
+class ExplosionRecord(Record):
+    """
+    爆発のスプライト（flipは表示中の画像が反転した方か）
+    """
+    __slots__ = ("x", "y", "life", "flip")
+    layout = struct.Struct("<iiiB")
+
+    @classmethod
+    def capture(cls, exp: game.Explosion) -> "ExplosionRecord":
+        return cls(*exp.rect.topleft, exp.life, exp.image is not exp.imgs[0])
+
+    def build(self) -> game.Explosion:
+        exp = game.Explosion.pool.take()
+        exp.imgs = [ASSETS.image("explosion"), ASSETS.image("explosion_flip")]
+        exp.image = exp.imgs[self.flip]
+        exp.rect = exp.image.get_rect(topleft=(self.x, self.y))
+        exp.prev_pos = exp.rect.topleft
+        exp.life = self.life
+        return exp
+
+
+class WorldRecord(Record):
+    """
+    スプライト以外のゲーム世界の状態（経過ティック，結果，スコアと節目，残機，ボスのHPなど）
+    """
+    __slots__ = ("tmr", "bomb_tier", "boss_bomb_tf", "now_time", "result", "quality", "elapsed",
+                 "score", "mark_i", "flags", "life", "boss_hp", "boss_flag",
+                 "throttled_explosions", "throttled_enemies", "throttled_bombs")
+    layout = struct.Struct("<Ib?iBBdiBBiiBIII")
+
+    @classmethod
+    def capture(cls, world: game.World) -> "WorldRecord":
+        score = world.score
+        flags = sum(1 << i for i, up in enumerate(score.flags.values()) if up)
+        return cls(world.tmr, world.bomb_tier, world.boss_bomb_tf, world.now_time, RESULTS.index(world.result),
+                   world.quality.level, world.timer.elapsed, score.score, score.mark_i, flags, world.life.life,
+                   world.boss.boss_hp, world.boss.flag, *world.throttled.values())
+
+    def apply(self, world: game.World):
+        world.tmr, world.bomb_tier, world.now_time = self.tmr, self.bomb_tier, self.now_time
+        world.boss_bomb_tf = self.boss_bomb_tf
+        world.result = RESULTS[self.result]
+        world.set_quality(self.quality)
+        world.timer.elapsed = self.elapsed
+        score = world.score
+        score.score, score.mark_i = self.score, self.mark_i
+        for i, name in enumerate(score.flags):
+            score.flags[name] = bool(self.flags >> i & 1)
+        world.life.life = self.life
+        world.boss.boss_hp, world.boss.flag = self.boss_hp, self.boss_flag
+        world.throttled.update(zip(world.throttled, (self.throttled_explosions, self.throttled_enemies,
+                                                     self.throttled_bombs)))
+
+
+def blank(cls: type) -> pg.sprite.Sprite:
+    """
+    __init__を呼ばずにスプライトを作る（状態は呼び出し側ですべて設定する）
+    """
+    obj = cls.__new__(cls)
+    pg.sprite.Sprite.__init__(obj)
+    return obj
+
+
+def pack_records(out: bytearray, records: list[Record]):
+    out += COUNT.pack(len(records))
+    for r in records:
+        out += r.pack()
+
+
+def pack_array(out: bytearray, arr):
+    """
+    BombArrayまたはEffectArrayの使用中の部分を属性ごとに書き出す
+    描画の補間にしか使わない直前の位置（prev）は書かない
+    """
+    n = len(arr)
+    out += COUNT.pack(n)
+    for name in arr.fields:
+        if name != "prev":
+            out += getattr(arr, name)[:n].tobytes()
+
+
+def unpack_array(data, off: int, arr) -> int:
+    """
+    pack_array()で書き出した配列を読み込む
+    戻り値：読み終えた位置
+    """
+    n = COUNT.unpack_from(data, off)[0]
+    off += COUNT.size
+    arr.reserve(n)
+    for name in arr.fields:
+        if name == "prev":
+            continue
+        dst = getattr(arr, name)[:n]
+        dst[...] = np.frombuffer(data, dst.dtype, dst.size, off).reshape(dst.shape)
+        off += dst.nbytes
+    if "prev" in arr.fields:
+        arr.prev[:n] = arr.pos[:n]
+    arr.n = n
+    return off
+
+
+def save(world: game.World, rng: bool = True) -> bytes:
+    """
+    ゲーム世界の状態をバイト列にする
+    引数1 world：保存するゲーム世界
+    引数2 rng：Trueならrandomモジュールの乱数の状態も保存する（同じ入力で同じ続きになる）
+    """
+    bits = VECTOR_BOMBS*world.vector_bombs | VECTOR_EFFECTS*world.vector_effects | WITH_RNG*rng
+    out = bytearray(HEADER.pack(MAGIC, VERSION, bits))
+    out += WorldRecord.capture(world).pack()
+    rules = world.score.every_rules
+    out += struct.pack(f"<B{len(rules)}i", len(rules), *(rule[1] for rule in rules))
+    out += BirdRecord.capture(world.bird).pack()
+    pack_records(out, [GravityRecord.capture(g) for g in world.gravity])
+    pack_records(out, [BeamRecord.capture(b) for b in world.beams])
+    pack_records(out, [EnemyRecord.capture(e) for e in world.emys])
+    pack_records(out, [BossRecord.capture(b) for b in world.boss_mv])
+    for bombs, colors in ((world.bombs, game.Bomb.colors), (world.boss_bomb, [game.Boss_bomb.color])):
+        if world.vector_bombs:
+            pack_array(out, bombs)
+        else:
+            pack_records(out, [BombRecord.capture(b, colors) for b in bombs])
+    if world.vector_effects:
+        pack_array(out, world.exps)
+    else:
+        pack_records(out, [ExplosionRecord.capture(e) for e in world.exps])
+    if rng:
+        state, gauss = random.getstate()[1:]
+        out += RNG.pack(*state, gauss is not None, gauss or 0.0)
+    return bytes(out)
+
+
+def load(world: game.World, data: bytes):
+    """
+    save()で作ったバイト列からゲーム世界の状態を復元する（画像・音声やHUD，グループはそのまま使い回す）
+    引数1 world：復元先のゲーム世界（爆弾・爆発の処理方法は保存したときと同じであること）
+    引数2 data：save()が返したバイト列
+    """
+    magic, version, bits = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("ゲーム世界の保存データではありません")
+    if version != VERSION:
+        raise ValueError(f"保存データの形式（バージョン{version}）に対応していません（対応：{VERSION}）")
+    if bool(bits & VECTOR_BOMBS) != world.vector_bombs or bool(bits & VECTOR_EFFECTS) != world.vector_effects:
+        raise ValueError("爆弾・爆発の処理方法（配列かスプライトか）が保存したときと違います")
+    world.clear_entities()
+    rec, off = WorldRecord.unpack_from(data, HEADER.size)
+    rec.apply(world)
+    n = data[off]
+    for rule, value in zip(world.score.every_rules, struct.unpack_from(f"<{n}i", data, off+1)):
+        rule[1] = value
+    off += 1 + 4*n
+    rec, off = BirdRecord.unpack_from(data, off)
+    rec.apply(world.bird)
+    records, off = GravityRecord.unpack_all(data, off)
+    world.gravity.add([r.build(world.bird) for r in records])
+    records, off = BeamRecord.unpack_all(data, off)
+    world.beams.add([r.build() for r in records])
+    records, off = EnemyRecord.unpack_all(data, off)
+    world.emys.add([r.build() for r in records])
+    records, off = BossRecord.unpack_all(data, off)
+    world.boss_mv.add([r.build() for r in records])
+    for bombs, cls, colors in ((world.bombs, game.Bomb, game.Bomb.colors),
+                               (world.boss_bomb, game.Boss_bomb, [game.Boss_bomb.color])):
+        if world.vector_bombs:
+            off = unpack_array(data, off, bombs)
+            continue
+        records, off = BombRecord.unpack_all(data, off)
+        for r in records:
+            bomb = cls.pool.take()
+            r.apply(bomb, colors)
+            bombs.add(bomb)
+    if world.vector_effects:
+        world.exps.load_images()
+        off = unpack_array(data, off, world.exps)
+    else:
+        records, off = ExplosionRecord.unpack_all(data, off)
+        world.exps.add([r.build() for r in records])
+    if bits & WITH_RNG:
+        *state, has_gauss, gauss = RNG.unpack_from(data, off)
+        random.setstate((3, tuple(state), gauss if has_gauss else None))
+
+
+class Rollback:
+    """
+    一定ティックごとに保存したゲーム世界の状態をリングバッファに持ち，過去のティックへ巻き戻すクラス
+    ボス戦などで起きた不具合を，少し前の状態から同じ入力で何度でも再現するのに使う
+    """
+    def __init__(self, interval: int = 50, depth: int = 30):
+        """
+        引数1 interval：状態を保存する間隔（ティック）
+        引数2 depth：覚えておく状態の数（古いものから捨てる）
+        """
+        self.interval = interval
+        self.states = deque(maxlen=depth)  # (経過ティック, save()のバイト列)
+
+    def push(self, world: game.World) -> bool:
+        """
+        保存する間隔のティックなら状態を保存する（World.step()の後に毎ティック呼ぶ）
+        戻り値：保存したらTrue
+        """
+        if world.tmr % self.interval or (self.states and self.states[-1][0] == world.tmr):
+            return False
+        self.states.append((world.tmr, save(world)))
+        return True
+
+    def rewind(self, world: game.World, tick: int) -> int:
+        """
+        tick以前で最も新しい状態に戻す（それより後に保存した状態は捨てる）
+        戻り値：戻った先の経過ティック
+        """
+        while self.states and self.states[-1][0] > tick:
+            self.states.pop()
+        if not self.states:
+            raise ValueError(f"{tick}ティック以前の状態は残っていません")
+        tmr, data = self.states[-1]
+        load(world, data)
+        return tmr
+
+    def nbytes(self) -> int:
+        return sum(len(data) for _, data in self.states)
+
+
+def measure_memory(n: int = 1000) -> dict:
+    """
+    爆弾n個分について，スプライト・記録・詰めたバイト列の1個あたりのメモリ量（バイト）を比べる
+    記録が小さいのは保存・巻き戻しで持つ状態だけで，ゲーム中のスプライトの大きさは変わらない
+    スプライトのグループへの登録分と，共有している画像は数えない
+    """
+    rng = random.Random(0)
+    colors = game.Bomb.colors
+    packed = b"".join(BombRecord(rng.randrange(game.WIDTH), rng.randrange(game.HEIGHT), rng.randint(10, 50),
+                                 rng.randrange(len(colors)), rng.uniform(-1, 1), rng.uniform(-1, 1),
+                                 6 * 1.15**rng.randrange(4)).pack() for _ in range(n))
+    values = list(BombRecord.layout.iter_unpack(packed))
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    records = [BombRecord(*v) for v in values]
+    record_bytes = tracemalloc.get_traced_memory()[0] - base
+    base = tracemalloc.get_traced_memory()[0]
+    sprites = []
+    for r in records:
+        bomb = blank(game.Bomb)
+        r.apply(bomb, colors)
+        sprites.append(bomb)
+    sprite_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return {"sprite": round(sprite_bytes/n, 1), "record": round(record_bytes/n, 1),
+            "packed": BombRecord.layout.size}
+
+
+def check_rollback(world: game.World, frames: int, seed: int, rollback: int,
+                   policy: str = "dodger") -> tuple[bytes, dict]:
+    """
+    ボットに最大framesティック遊ばせ，終わったティック（途中でゲームが終われば，そのティック）の
+    rollbackティック前までRollbackで巻き戻して記録した入力で進め直し，同じ最終状態になるかを確かめる
+    戻り値：巻き戻した先の状態，確認の結果
+    """
+    import botplay
+    import headless
+    random.seed(seed)
+    bot = botplay.load_policy(policy)
+    bot.reset(seed)
+    world.reset()
+    history = Rollback(interval=1, depth=rollback+1)  # 終わりのrollbackティック前まで毎ティック覚えておく
+    history.push(world)
+    log = []
+    for n in range(frames):
+        log.append(bot.frame(world, n))
+        result = world.step(*log[-1])
+        history.push(world)
+        if result is not None:
+            break
+    digest = headless.state_digest(world.state())
+    start = history.rewind(world, max(0, len(log) - rollback))
+    data = history.states[-1][1]
+    same_bytes = save(world) == data  # 保存→復元→保存で同じバイト列になるか
+    for key_lst, events in log[start:]:
+        if world.step(key_lst, events) is not None:
+            break
+    return data, {"tick": start, "ticks": len(log), "digest": digest,
+                  "deterministic": headless.state_digest(world.state()) == digest, "round_trip": same_bytes}
+
+
+def scenario_state(world: game.World, name: str, seed: int, ticks: int = 50) -> bytes:
+    """
+    benchmark.pyのシナリオnameをticksティック進めた状態を保存する（スプライトの多い世界での計測用）
+    """
+    import benchmark
+    setup, inputs = benchmark.SCENARIOS[name]
+    random.seed(seed)
+    world.reset()
+    setup(world)
+    for n in range(ticks):
+        world.step(*inputs(n))
+    return save(world)
+
+
+def time_ops(world: game.World, data: bytes, repeat: int) -> dict:
+    """
+    保存と復元の時間をrepeat回ずつ計測する
+    """
+    load(world, data)
+    result = {}
+    for name, func in (("save", lambda: save(world)), ("load", lambda: load(world, data))):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append((time.perf_counter() - start) * 1000)
+        result[f"{name}_ms"] = {"p50": round(statistics.median(times), 4), "max": round(max(times), 4)}
+    return result
+
+
+if __name__ == "__main__":
+    from benchmark import SCENARIOS
+    parser = argparse.ArgumentParser(description="ゲーム世界の保存・復元の大きさと時間，巻き戻しの再現性を調べる")
+    parser.add_argument("--frames", type=int, default=1250, help="進めるフレーム数")
+    parser.add_argument("--seed", type=int, default=1, help="乱数のシード")
+    parser.add_argument("--rollback", type=int, default=200, help="巻き戻すティック数")
+    parser.add_argument("--policy", default="dodger", help="遊ばせるボットの方針（botplay.pyと同じ）")
+    parser.add_argument("--repeat", type=int, default=200, help="保存・復元の時間を計測する回数")
+    parser.add_argument("--scenario", choices=SCENARIOS, help="保存・復元の時間をbenchmark.pyのシナリオの状態で計測する")
+    parser.add_argument("--sprites", action="store_true", help="爆弾・爆発を配列でなくスプライトで処理する")
+    args = parser.parse_args()
+    game.init(loading_screen=False)
+    vector = False if args.sprites else None
+    world = game.World(mute=True, vector_bombs=vector, vector_effects=vector)
+    data, rollback = check_rollback(world, args.frames, args.seed, args.rollback, args.policy)
+    if args.scenario:
+        data = scenario_state(world, args.scenario, args.seed)
+    timing = time_ops(world, data, args.repeat)  # 最後に復元した状態のまま数える
+    counts = world.counts()
+    del counts["quality"]
+    report = {
+        "scenario": args.scenario or f"{args.policy}@{rollback['tick']}",
+        "bytes": len(data),
+        "entities": counts,
+        **timing,
+        "frame_ms": round(game.DT*1000, 1),
+        "round_trip": save(world) == data,
+        "rollback": rollback,
+        "bytes_per_bomb": measure_memory(),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    pg.quit()
+    if not (report["round_trip"] and rollback["deterministic"] and rollback["round_trip"]):
+        raise SystemExit(1)
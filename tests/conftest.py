@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 画面・音声の無い環境でも動くように，pygameを読み込む前にSDLのダミードライバを指定する
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
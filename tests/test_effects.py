@@ -0,0 +1,35 @@
+import pygame as pg
+
+import musou_kokaton as game
+from effects import EffectArray
+
+
+class Spot:
+    def __init__(self, x: int, y: int):
+        self.rect = pg.Rect(x, y, 10, 10)
+
+
+def test_add_returns_explosions_to_pool():
+    """
+    取り込んだExplosionはプールに戻り，使用中の数が増え続けない
+    """
+    game.init(loading_screen=False)
+    exps = EffectArray()
+    live = game.Explosion.pool.live
+    for i in range(100):
+        exps.add(game.Explosion.pool.acquire(Spot(i, i), 30))
+    assert len(exps) == 100
+    assert game.Explosion.pool.live == live
+
+
+def test_spawn_grows_past_capacity():
+    """
+    最初の容量を超えても爆発を捨てずに配列を増やす
+    """
+    game.init(loading_screen=False)
+    exps = EffectArray(capacity=4)
+    for i in range(10):
+        exps.spawn(Spot(i, 2*i), 20 + i)
+    assert len(exps) == 10
+    assert exps.lifetime[:10].tolist() == list(range(20, 30))
+    assert exps.pos[9].tolist() == [9+5 - exps.imgs[0].get_width()//2, 18+5 - exps.imgs[0].get_height()//2]
@@ -0,0 +1,28 @@
+import random
+
+import musou_kokaton as game
+import multiproc
+
+
+def test_snapshot_keeps_coordinates_beyond_int16():
+    """
+    画面のはるか外に飛んだ爆弾（int16に入らない座標）もそのまま書き込んで読み出せる
+    """
+    game.init(loading_screen=False)
+    random.seed(0)
+    world = game.World(mute=True, vector_bombs=False, vector_effects=False)
+    world.drop_bomb(game.Enemy())
+    bomb = next(iter(world.bombs))
+    bomb.rect.topleft = 50000, -40000
+    bomb.prev_pos = (-70000, 70000)
+    hud, flat = multiproc.encode_world(world)
+    buf = multiproc.SnapshotBuffer(max_entities=16)
+    try:
+        buf.write(world.tmr, hud, flat)
+        snap = buf.read()
+    finally:
+        buf.close(unlink=True)
+    e = snap.entities
+    bombs = [e[i:i+6] for i in range(0, len(e), 6) if e[i] == multiproc.BOMB]
+    assert [b[2:] for b in bombs] == [(50000, -40000, -70000, 70000)]
+    assert snap.tick == world.tmr and snap.result is None
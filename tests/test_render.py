@@ -0,0 +1,51 @@
+import pygame as pg
+import pytest
+
+import musou_kokaton as game
+from render import Renderer
+
+PIXEL = (1500, 50)  # スプライトやHUDに隠れない背景の位置
+
+
+@pytest.fixture(scope="module")
+def world():
+    game.init(loading_screen=False)
+    return game.World(mute=True)
+
+
+def test_background_switch_redraws_whole_screen(world):
+    """
+    差分描画で30秒の背景の切替をまたいで描いたとき，画面全体が新しい背景になる
+    """
+    renderer = Renderer(game.screen, game.bg_imgs_lst[0], dirty=True)
+    bg0, bg1 = (img.get_at(PIXEL) for img in game.bg_imgs_lst[:2])
+    assert bg0 != bg1
+    world.timer.elapsed = 29.0
+    colors = []
+    for _ in range(100):  # 1ティックずつ29秒から31秒まで
+        world.draw(renderer)
+        renderer.present()
+        colors.append((game.bg_img_i, game.screen.get_at(PIXEL)))
+        world.timer.advance(game.DT)
+    assert colors[0] == (0, bg0)
+    assert colors[-1][0] == 1
+    assert all(color == (bg1 if i == 1 else bg0) for i, color in colors)
+
+
+def test_set_background_after_begin_redraws_next_frame():
+    """
+    begin()の後に背景を切り替えても，全画面の描き直しは次のフレームまで残る
+    """
+    screen = pg.Surface((40, 30))
+    old, new = pg.Surface((40, 30)), pg.Surface((40, 30))
+    old.fill((255, 0, 0))
+    new.fill((0, 0, 255))
+    renderer = Renderer(screen, old, dirty=True)
+    renderer.begin()
+    renderer.present()
+    renderer.begin()
+    renderer.set_background(new)
+    renderer.present()
+    assert screen.get_at((10, 10)) == (255, 0, 0)
+    renderer.begin()
+    assert screen.get_at((10, 10)) == (0, 0, 255)